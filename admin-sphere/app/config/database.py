@@ -1,20 +1,24 @@
 from typing import Annotated
 from sqlmodel import SQLModel, create_engine, Session
-from app.config.settings import DB_URL, TEST_DB_URL
+from quizcommon.backend import configure_sqlite, database_url
+from quizcommon.pool import MeasuredQueuePool, engine_options
+from app.config.settings import DB_URL
 from fastapi import Depends
 
-# Replace part of database connection strings
-db_connection_str = str(DB_URL).replace("postgresql", "postqresql+psycopg")
-test_db_connection_str = str(TEST_DB_URL).replace(
-    "postgresql", "postqresql+psycopg")
+# Connection string of the configured backend, Postgres or SQLite
+db_connection_str = database_url(DB_URL)
 
 # Create database engine
-db_engine = create_engine(db_connection_str, pool_pre_ping=True, connect_args={
-    "sslmode": "require"
-}, pool_recycle=600)
+db_engine = create_engine(db_connection_str, **engine_options(db_connection_str, MeasuredQueuePool))
+configure_sqlite(db_engine)
 
 def create_table():
-    """Creates tables in the database."""
+    """
+    Creates tables in the database.
+
+    Only for running this service on its own database, including the in-memory one created at startup;
+    the shared database is managed by the quizBackend migrations. Run once with: python -m app.config.database
+    """
     print("Creating Tables...")
     SQLModel.metadata.create_all(db_engine)
 
@@ -25,3 +29,9 @@ def get_session():
 
 # Annotate dependency for database session
 DB_SESSION = Annotated[Session, Depends(get_session)]
+
+
+if __name__ == "__main__":
+    # Register the tables of this service on the metadata
+    from app.models import admin_model  # noqa: F401
+    create_table()
@@ -21,3 +21,6 @@ admin_time: Any = config.get("ACCESS_TOKEN_EXPIRE_TIME")
 # Admin token settings
 ADMIN_TOKEN_EXPIRE_TIME = timedelta(minutes=int(admin_time))
 ADMIN_SECRET_KEY = config.get("ADMIN_SECRET_KEY")
+
+# Password hash cost (bcrypt log2 rounds, measured with quizBackend/benchmarks/calibrate_password_hash.py, hashes of another cost are rehashed at login)
+BCRYPT_ROUNDS = config.get("BCRYPT_ROUNDS", cast=int, default=12)
@@ -1,42 +1,85 @@
 from passlib.context import CryptContext
 
-# Password context for hashing and verification
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.config.settings import BCRYPT_ROUNDS
+from quizcommon.password_pool import run_password_job, run_password_job_sync
+
+# Password context for hashing and verification, hashes of another cost are flagged for a rehash
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # ===============================================================================================================================
 def passwordIntoHash(password: str) -> str:
     """
-    Hashes the provided password using bcrypt.
+    Hashes the provided password using bcrypt on the password worker pool.
+
+    Args:
+        password (str): The password to be hashed.
+
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
+    Returns:
+        str: The hashed password.
+    """
+    hash_password = run_password_job_sync(pwd_context.hash, password)
+    return hash_password
+
+
+# ===============================================================================================================================
+async def passwordIntoHashAsync(password: str) -> str:
+    """
+    Hashes the provided password using bcrypt on the password worker pool, leaving the event loop free.
 
     Args:
         password (str): The password to be hashed.
 
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
     Returns:
         str: The hashed password.
     """
-    hash_password = pwd_context.hash(password)
+    hash_password = await run_password_job(pwd_context.hash, password)
     return hash_password
 
 
 # ===============================================================================================================================
 def verifyPassword(plainText: str, hashedPassword: str) -> bool:
     """
-    Verifies if the provided plaintext password matches the hashed password.
+    Verifies if the provided plaintext password matches the hashed password on the password worker pool.
 
     Args:
         plainText (str): The plaintext password.
         hashedPassword (str): The hashed password to compare against.
 
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
     Returns:
         bool: True if the passwords match, False otherwise.
     """
-    # Print the plaintext and hashed passwords for debugging
-    print(plainText, hashedPassword)
-
     # Verify if the plaintext password matches the hashed password
-    isPasswordCorrect = pwd_context.verify(plainText, hash=hashedPassword)
-
-    # Print the result of password verification for debugging
-    print(isPasswordCorrect)
+    isPasswordCorrect = run_password_job_sync(pwd_context.verify, plainText, hashedPassword)
 
     return isPasswordCorrect
+
+
+# ===============================================================================================================================
+async def verifyAndUpdatePasswordAsync(plainText: str, hashedPassword: str) -> tuple[bool, str | None]:
+    """
+    Verifies the provided plaintext password on the password worker pool, and rehashes it when the stored
+    hash was made with another cost than BCRYPT_ROUNDS, leaving the event loop free.
+
+    Args:
+        plainText (str): The plaintext password.
+        hashedPassword (str): The hashed password to compare against.
+
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
+    Returns:
+        tuple[bool, str | None]: Whether the passwords match, and the hash to store instead of hashedPassword, if any.
+    """
+    # Verify the password and rehash it in the same job, so an outdated hash costs one trip to the pool
+    isPasswordCorrect, newHash = await run_password_job(pwd_context.verify_and_update, plainText, hashedPassword)
+
+    return isPasswordCorrect, newHash
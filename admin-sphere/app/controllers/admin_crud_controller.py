@@ -5,16 +5,17 @@ from jose import jwt, JWTError
 from fastapi import HTTPException, Depends
 from typing import Annotated
 
-from app.controllers.admin_auth_controller import verifyPassword
+from app.controllers.admin_auth_controller import verifyAndUpdatePasswordAsync
 from app.models.admin_model import Admin, AdminBaseModel, AdminToken
 from app.config.settings import ADMIN_TOKEN_EXPIRE_TIME, ALGORITHM, ADMIN_SECRET_KEY
 from app.utils.apierrors import NotFoundException
 from app.config.database import get_session
+from quizcommon.admin_revocations import is_admin_token_revoked, remember_revocation
 
 # define a Bearer token schema on "/token"  url
 auth_schema = OAuth2PasswordBearer(tokenUrl="/token")
 # ================================================================================================================================
-def admin_login_func(adminForm: AdminBaseModel, session: Session):
+async def admin_login_func(adminForm: AdminBaseModel, session: Session):
     """
     Function to authenticate admin and generate token.
 
@@ -35,24 +36,27 @@ def admin_login_func(adminForm: AdminBaseModel, session: Session):
             Admin.admin_email == adminForm.admin_email)).first()
         if admin_exist:
             # Verify admin password
-            password_verified = verifyPassword(
+            password_verified, new_hash = await verifyAndUpdatePasswordAsync(
                 adminForm.admin_password, admin_exist.admin_password)
+            # Store the hash at the configured cost, saved with the admin token below
+            if password_verified and new_hash:
+                admin_exist.admin_password = new_hash
         else:
             raise NotFoundException("admin")
 
         if admin_exist and password_verified:
+            # Record the token first, its ID is the jti claim it is revoked by
+            db_admin_token = add_admin_token_in_db(ADMIN_TOKEN_EXPIRE_TIME, session)
             # Generate token if admin is authenticated
-            data = {"admin_email": admin_exist.admin_email}
+            data = {"admin_email": admin_exist.admin_email, "jti": str(db_admin_token.admin_tokenId)}
             admin_token = generate_admin_token(
                 data=data, expires_delta=ADMIN_TOKEN_EXPIRE_TIME)
-            if admin_token:
-                db_admin_token = add_admin_token_in_db(admin_token, session)
-            else:
+            if not admin_token:
                 raise JWTError("Token has not been generated")
 
             # Return admin token and its details
             return {
-                "admin_token": db_admin_token.admin_token,
+                "admin_token": admin_token,
                 "admin_token_id": db_admin_token.admin_tokenId,
                 "expiry_time": ADMIN_TOKEN_EXPIRE_TIME
             }
@@ -69,22 +73,27 @@ def admin_verify_func(token: Annotated[str, Depends(auth_schema)], session:  Ann
     """
     Function to verify admin token.
 
+    The signature and expiry of the token are checked locally, and its ID against the in-memory set of
+    revoked tokens, so a request does not read the token table however many admin logins there were.
+
     Args:
         token (Annotated[str, Depends(auth_schema)]): Admin token.
-        session (Annotated[Session, Depends(get_session)]): SQLModel session.
+        session (Annotated[Session, Depends(get_session)]): SQLModel session, used when the revoked tokens are read again.
 
     Raises:
-        NotFoundException: Raised when admin token is not found in the database.
+        NotFoundException: Raised when admin token is invalid, expired or revoked.
 
     Returns:
         str: Verification message.
     """
-    # Get the first Admin token from database based on condition and then verify admin 
-    db_admin_token = session.exec(select(AdminToken).where(
-        AdminToken.admin_token == token)).first()
-    if db_admin_token:
-        return "Admin has verified."
-    raise NotFoundException("Token")
+    try:
+        claims = jwt.decode(token, ADMIN_SECRET_KEY, algorithms=[ALGORITHM])
+        token_id = int(claims["jti"])
+    except (JWTError, KeyError, ValueError):
+        raise NotFoundException("Token")
+    if is_admin_token_revoked(token_id, session, AdminToken):
+        raise NotFoundException("Token")
+    return "Admin has verified."
 
 
 # ================================================================================================================================
@@ -101,7 +110,6 @@ def generate_admin_token(data: dict, expires_delta: timedelta) -> str:
     """
     # Make a copy of the admin data
     to_encode = data.copy()
-    print("admin", data)
     
     # Calculate the expiry time
     expire = datetime.now(timezone.utc) + expires_delta
@@ -115,18 +123,18 @@ def generate_admin_token(data: dict, expires_delta: timedelta) -> str:
 
 
 # ================================================================================================================================
-def add_admin_token_in_db(token: str, session: Session):
+def add_admin_token_in_db(expires_delta: timedelta, session: Session):
     """
-    Add an admin token to the database.
+    Record an admin token about to be issued.
 
     Args:
-        token (str): Admin token to be added.
+        expires_delta (timedelta): Expiry time for the token.
         session (Session): Database session.
 
     Returns:
-        AdminToken: Added admin token.
+        AdminToken: Added admin token, whose ID is the jti claim of the token.
     """
-    admin_token = AdminToken(admin_token=token)
+    admin_token = AdminToken(expires_at=datetime.now(timezone.utc) + expires_delta)
     session.add(admin_token)
     session.commit()
     session.refresh(admin_token)
@@ -134,12 +142,14 @@ def add_admin_token_in_db(token: str, session: Session):
 
 
 # ================================================================================================================================
-def delete_admin_token_from_db(token_id: int, session: Session):
+def revoke_admin_token(token_id: int, session: Session):
     """
-    Delete an admin token from the database.
+    Revoke an admin token.
+
+    The row is kept until the token expires, every worker refuses the token once it reads the revocation.
 
     Args:
-        token_id (int): ID of the token to be deleted.
+        token_id (int): ID of the token to be revoked.
         session (Session): Database session.
 
     Returns:
@@ -152,7 +162,9 @@ def delete_admin_token_from_db(token_id: int, session: Session):
     db_admin_token = session.get(AdminToken, token_id)
     if db_admin_token is None:
         raise NotFoundException("Token")
-    # Delete the Admin token from database  
-    session.delete(db_admin_token)
-    session.commit()
+    # Mark the Admin token as revoked
+    if db_admin_token.revoked_at is None:
+        db_admin_token.revoked_at = datetime.now(timezone.utc)
+        session.commit()
+    remember_revocation(token_id)
     return "Token has been deleted"
@@ -2,9 +2,21 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
-from app.utils.apierrors import ConflictsException, InvalidInputException, NotFoundException
-from app.config.database import create_table
+from app.utils.apierrors import (
+    ConflictsException, InvalidInputException, NotFoundException, ServiceUnavailableException, TooManyRequestsException)
 from app.routes.admin_route import route
+from quizcommon.backend import is_memory_database
+from app.config.database import create_table, db_engine
+from quizcommon.pool import get_pool_metrics
+from app.models.admin_model import AdminToken
+from quizcommon.token_reaper import ReapedTables, get_token_reaper_metrics, start_token_reaper, stop_token_reaper
+from quizcommon.login_limiter import get_login_limiter_metrics
+from quizcommon.password_pool import get_password_pool_metrics
+
+# Key and expiry column of every table the token reaper empties of expired tokens
+REAPED_TABLES: ReapedTables = {
+    "admintoken": (AdminToken.__table__.c.admin_tokenId, AdminToken.__table__.c.expires_at)
+}
 
 
 @asynccontextmanager
@@ -18,9 +30,14 @@ async def lifespan(app: FastAPI):
     Yields:
         None: Yields control back to the caller.
     """
-    # Create necessary database tables
-    create_table()
+    # Tables are managed by migrations (python -m quizbackend.db.migrate), not at startup,
+    # except for the in-memory database which starts empty with every process
+    if is_memory_database():
+        create_table()
+    # Expired tokens are deleted in the background while the service runs
+    token_reaper = start_token_reaper(db_engine, REAPED_TABLES)
     yield
+    await stop_token_reaper(token_reaper)
 
 # Create the FastAPI application instance with the lifespan context manager
 app = FastAPI(title="QuizIQHub", lifespan=lifespan)
@@ -75,6 +92,40 @@ async def existingInputException(request: Request, exception: ConflictsException
     return JSONResponse(status_code=400, content={"message": f"This {exception.message} already exists. Please choose another."})
 
 
+# =================================================================================================================================
+@app.exception_handler(ServiceUnavailableException)
+async def serviceUnavailableException(request: Request, exception: ServiceUnavailableException):
+    """
+    Exception handler for ServiceUnavailableException.
+
+    Args:
+        request (Request): The incoming request object.
+        exception (ServiceUnavailableException): The ServiceUnavailableException instance.
+
+    Returns:
+        JSONResponse: JSON response asking the client to retry shortly.
+    """
+    return JSONResponse(status_code=503, headers={"Retry-After": "1"},
+                        content={"message": f"{exception.message} is busy. Please try again in a moment."})
+
+
+# =================================================================================================================================
+@app.exception_handler(TooManyRequestsException)
+async def tooManyRequestsException(request: Request, exception: TooManyRequestsException):
+    """
+    Exception handler for TooManyRequestsException.
+
+    Args:
+        request (Request): The incoming request object.
+        exception (TooManyRequestsException): The TooManyRequestsException instance.
+
+    Returns:
+        JSONResponse: JSON response telling the client when to try again.
+    """
+    return JSONResponse(status_code=429, headers={"Retry-After": str(exception.retry_after)},
+                        content={"message": f"Too many {exception.message.lower()}. Please try again in {exception.retry_after} seconds."})
+
+
 @app.get("/", response_model=dict[str, str])
 def adminHome():
 
@@ -84,4 +135,20 @@ def adminHome():
     }
 
 
+@app.get("/api/metrics")
+def metrics():
+    """
+    Endpoint reporting the live state of the database connection pool, of the password worker pool, of the token reaper and of the login limiter.
+
+    Returns:
+        dict: Usage and checkout telemetry of the engine pool, password queue depth, expired tokens removed and login attempts rejected.
+    """
+    return {
+        "database_pool": get_pool_metrics(db_engine.pool),
+        "password_pool": get_password_pool_metrics(),
+        "token_reaper": get_token_reaper_metrics(),
+        "login_limiter": get_login_limiter_metrics()
+    }
+
+
 app.include_router(router=route)
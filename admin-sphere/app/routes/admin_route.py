@@ -1,10 +1,11 @@
 from typing import Annotated
-from fastapi import Depends, HTTPException, APIRouter
+from fastapi import Depends, HTTPException, APIRouter, Request
 
 from app.controllers.admin_crud_controller import (
-    admin_login_func, admin_verify_func, delete_admin_token_from_db)
-from app.controllers.admin_auth_controller import passwordIntoHash
+    admin_login_func, admin_verify_func, revoke_admin_token)
+from app.controllers.admin_auth_controller import passwordIntoHashAsync
 from app.utils.apierrors import NotFoundException
+from quizcommon.login_limiter import check_login_attempt
 from app.models.admin_model import Admin, AdminBaseModel
 from app.config.database import DB_SESSION
 
@@ -13,11 +14,12 @@ route = APIRouter()
 
 # ================================================================================================================================
 @route.post("/api/adminLogin")
-def adminLogin(adminForm: AdminBaseModel, session: DB_SESSION):
+async def adminLogin(request: Request, adminForm: AdminBaseModel, session: DB_SESSION):
     """
     Endpoint for admin login.
 
     Args:
+        request (Request): The incoming request, identifying the client for the login limiter.
         adminForm (AdminBaseModel): Admin login form data.
         session (DB_SESSION): Database session.
 
@@ -26,9 +28,12 @@ def adminLogin(adminForm: AdminBaseModel, session: DB_SESSION):
 
     Raises:
         HTTPException: If admin is not found.
+        TooManyRequestsException: If the email or the client has made too many attempts.
     """
+    # Refuse excess attempts before verifying the password
+    check_login_attempt(adminForm.admin_email, request)
     # Call the admin_login_func to verify admin login
-    admin_data = admin_login_func(adminForm, session=session)
+    admin_data = await admin_login_func(adminForm, session=session)
 
     # Return admin data if found
     if admin_data:
@@ -65,10 +70,10 @@ def adminVerify(verification_message: Annotated[str, Depends(admin_verify_func)]
 @route.delete("/api/deleteToken")
 def deleteAdminToken(token_id: int, session: DB_SESSION):
     """
-    Delete admin token endpoint.
+    Delete admin token endpoint, the token is revoked and refused from then on.
 
     Args:
-        token_id (int): ID of the token to be deleted.
+        token_id (int): ID of the token to be revoked.
         session (DB_SESSION): Database session.
 
     Returns:
@@ -77,8 +82,8 @@ def deleteAdminToken(token_id: int, session: DB_SESSION):
     Raises:
         NotFoundException: If token is not found.
     """
-    # Attempt to delete the token
-    delete_message = delete_admin_token_from_db(token_id, session)
+    # Attempt to revoke the token
+    delete_message = revoke_admin_token(token_id, session)
 
     # Check if delete message exists
     if delete_message:
@@ -90,7 +95,7 @@ def deleteAdminToken(token_id: int, session: DB_SESSION):
 
 # ================================================================================================================================
 @route.post("/api/adminSign")
-def adminSign(adminForm: AdminBaseModel, session: DB_SESSION):
+async def adminSign(adminForm: AdminBaseModel, session: DB_SESSION):
     """
     Admin signup endpoint.
 
@@ -105,7 +110,7 @@ def adminSign(adminForm: AdminBaseModel, session: DB_SESSION):
         HTTPException: If admin data is not found.
     """
     # Hash the admin password
-    hashed_password = passwordIntoHash(adminForm.admin_password)
+    hashed_password = await passwordIntoHashAsync(adminForm.admin_password)
 
     # Create admin data
     admin_data = Admin(admin_email=adminForm.admin_email,
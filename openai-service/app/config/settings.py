@@ -6,9 +6,9 @@ try:
 except FileNotFoundError:
     print("Environment file (.env) not found")
 
-# Database connection URLs
-DB_URL = config.get("DB_CONNECTION_STR")
-TEST_DB_URL = config.get("TEST_DB_CONNECTION_STR")
+# Database connection URLs (DB_CONNECTION_STR is required with DB_BACKEND=postgres, the default)
+DB_URL = config.get("DB_CONNECTION_STR", default=None)
+TEST_DB_URL = config.get("TEST_DB_CONNECTION_STR", default=None)
 
 # OPENAPI KEY
-OPEN_AI_KEY = config.get("OPEN_AI_KEY")
\ No newline at end of file
+OPEN_AI_KEY = config.get("OPEN_AI_KEY")
@@ -4,7 +4,7 @@ from sqlmodel import select, Session
 
 from app.models.quiz_model import Category
 from app.utils.apierrors import InvalidInputException
-from app.utils.openai_helper import client, generate_quiz_messages, functions, ChatCompletionMessageParam
+from app.utils.openai_helper import client, build_generate_quiz_messages, functions, ChatCompletionMessageParam
 from app.controllers import db_controller
 
 def generate_question(category: int, session: Session):
@@ -13,15 +13,9 @@ def generate_question(category: int, session: Session):
 
     if db_category is None:
         raise InvalidInputException("Category")
-    generate_quiz_messages.append(
-        {
-            "role": "user",
-            "content": f"Generate a MCQ in {db_category.category_name}"
-        }
-    )
     openAi_response = client.chat.completions.create(
         model="gpt-3.5-turbo",
-        messages=generate_quiz_messages
+        messages=build_generate_quiz_messages(db_category.category_name)
     )
     print(openAi_response)
     return openAi_response.choices[0].message.content
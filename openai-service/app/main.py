@@ -4,7 +4,9 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from app.utils.apierrors import ConflictsException, InvalidInputException, NotFoundException
-from app.config.database import create_table, DB_SESSION
+from quizcommon.backend import is_memory_database
+from app.config.database import DB_SESSION, create_table, db_engine
+from quizcommon.pool import get_pool_metrics
 from app.controllers.openai_controller import generate_question, openai_conversation
 
 
@@ -19,8 +21,10 @@ async def lifespan(app: FastAPI):
     Yields:
         None: Yields control back to the caller.
     """
-    # Create necessary database tables
-    create_table()
+    # Tables are managed by migrations (python -m quizbackend.db.migrate), not at startup,
+    # except for the in-memory database which starts empty with every process
+    if is_memory_database():
+        create_table()
     yield
 
 # Create the FastAPI application instance with the lifespan context manager
@@ -90,6 +94,17 @@ def userHome():
     }
 
 
+@app.get("/api/metrics")
+def metrics():
+    """
+    Endpoint reporting the live state of the database connection pool.
+
+    Returns:
+        dict: Usage and checkout telemetry of the engine pool.
+    """
+    return {"database_pool": get_pool_metrics(db_engine.pool)}
+
+
 @app.get("/api/generate_mcqs")
 async def generateMcqs(category: int, session: DB_SESSION):
     openAi_mcq = generate_question(category=category, session=session)
@@ -1,14 +1,17 @@
-from sqlmodel import SQLModel, Field
+from sqlmodel import Index, SQLModel, Field
 from typing import Optional
 
 class Category(SQLModel, table=True):
     """Model for quiz categories."""
     category_id: int | None = Field(None, primary_key=True)
-    category_name: str  # Name of the category
+    category_name: str = Field(unique=True, index=True)  # Name of the category
     category_description: str  # Description of the category
 
 class CategoryQuizDetails(SQLModel, table=True):
     """Model for details of quizzes taken by users in specific categories."""
+    # A user has one quiz details row per category
+    __table_args__ = (Index("ix_categoryquizdetails_user_id_category_id",
+                            "user_id", "category_id", unique=True),)
     id: Optional[int] = Field(None, primary_key=True)
     user_id: int = Field(None, foreign_key="user.user_id")  # ID of the user
     category_id: int = Field(int, foreign_key="category.category_id")  # ID of the category
@@ -3,7 +3,7 @@ from sqlmodel import SQLModel, Field
 class User(SQLModel, table=True):
     user_id: int | None = Field(int, primary_key=True)
     user_name: str
-    user_email: str
+    user_email: str = Field(unique=True, index=True)
     user_password: str
     total_points: int
     
\ No newline at end of file
@@ -5,12 +5,35 @@ from app.config.settings import OPEN_AI_KEY
 
 client = OpenAI(api_key=OPEN_AI_KEY)
 
-generate_quiz_messages: list[ChatCompletionMessageParam] = [
-    {
-        "role": "system",
-        "content": "You will generate a mcq with four choices in json format. Each choice will have its own status that will show its true or false answer in boolean."
-    },
-]
+# Instructions sent with every MCQ generation
+GENERATE_QUIZ_SYSTEM_PROMPT = "You will generate a mcq with four choices in json format. Each choice will have its own status that will show its true or false answer in boolean."
+
+
+# ================================================================================================================================
+def build_generate_quiz_messages(category_name: str) -> list[ChatCompletionMessageParam]:
+    """
+    Build the prompt of one MCQ generation.
+
+    Every request gets a new list, so a prompt only holds its own category and
+    earlier generations neither stay in memory nor lengthen later prompts.
+
+    Args:
+        category_name (str): Name of the category the MCQ is about.
+
+    Returns:
+        list[ChatCompletionMessageParam]: The system instructions and the user request.
+    """
+    return [
+        {
+            "role": "system",
+            "content": GENERATE_QUIZ_SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": f"Generate a MCQ in {category_name}"
+        }
+    ]
+
 
 functions: Iterable[ChatCompletionToolParam] = [
     {
@@ -0,0 +1,127 @@
+"""
+Measure the prompt size and memory of MCQ generation across many requests.
+
+Serves the chat completions endpoint the way OpenAI does, points the client at
+it and runs generate_question the given number of times on an in-memory
+database. Every prompt the endpoint receives is measured, and the memory traced
+in this process is sampled as the generations go. Fails with a non-zero exit code
+when a prompt grew past the first one or the traced memory grew by more than
+MEMORY_GROWTH_BUDGET after the warm-up; tests/test_prompt_growth.py checks the
+same on a shorter run. Run from the openai-service directory:
+
+    poetry run python -m benchmarks.bench_prompt_growth --generations 10000
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+# Generations run before the memory baseline is taken, filling the client and database caches
+WARM_UP_GENERATIONS = 500
+# Traced memory the generations after the warm-up may add, the samples vary by about 20 KiB without any leak
+# while a generation keeping as little as a short string adds more than this over a thousand generations
+MEMORY_GROWTH_BUDGET = 64 * 1024
+
+# Prompts the endpoint received, and message count and body size of the first and of the largest one,
+# kept as counters so the measurement itself holds nothing per generation
+prompt_sizes = {"prompts": 0, "first": (0, 0), "largest": (0, 0)}
+
+COMPLETION = json.dumps({
+    "id": "chatcmpl-bench", "object": "chat.completion", "created": 0, "model": "gpt-3.5-turbo",
+    "choices": [{"index": 0, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": '{"question": "?", "choices": []}'}}]
+}).encode()
+
+
+class CompletionsHandler(BaseHTTPRequestHandler):
+    """Answer every POST with the same chat completion, recording the size of the prompt it carried."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, without this every response waits for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        size = (len(json.loads(body)["messages"]), len(body))
+        if not prompt_sizes["prompts"]:
+            prompt_sizes["first"] = size
+        prompt_sizes["prompts"] += 1
+        prompt_sizes["largest"] = max(prompt_sizes["largest"], size)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(COMPLETION)))
+        self.end_headers()
+        self.wfile.write(COMPLETION)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# ================================================================================================================================
+def run(generations: int, samples: int) -> list[tuple[int, int]]:
+    """
+    Run generate_question repeatedly and sample the traced memory.
+
+    Args:
+        generations (int): Number of MCQ generations.
+        samples (int): Number of memory samples taken after the warm-up.
+
+    Returns:
+        list[tuple[int, int]]: Generations done and traced memory in bytes at every sample, the first one ending the warm-up.
+    """
+    from sqlmodel import Session
+    from app.config.database import create_table, db_engine
+    from app.controllers.openai_controller import generate_question
+    from app.models.quiz_model import Category
+
+    create_table()
+    with Session(db_engine) as session:
+        category = Category(category_name="Python", category_description="Prompt growth benchmark")
+        session.add(category)
+        session.commit()
+        category_id = category.category_id
+
+    memory = []
+    sample_every = max(1, (generations - WARM_UP_GENERATIONS) // samples)
+    tracemalloc.start()
+    # generate_question prints every completion
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for number in range(1, generations + 1):
+            with Session(db_engine) as session:
+                generate_question(category_id, session)
+            if number >= WARM_UP_GENERATIONS and (number - WARM_UP_GENERATIONS) % sample_every == 0 or number == generations:
+                memory.append((number, tracemalloc.get_traced_memory()[0]))
+    tracemalloc.stop()
+    return memory
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--generations", type=int, default=10000)
+    parser.add_argument("--samples", type=int, default=10, help="memory samples taken after the warm-up")
+    arguments = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CompletionsHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    # The app reads its settings and builds the OpenAI client when first imported, so it is only imported from here on
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OPEN_AI_KEY", "bench-prompt-growth")
+    # The in-memory database, shared by every session of the process so the tables created by run are seen
+    os.environ.update({"DB_BACKEND": "sqlite", "SQLITE_PATH": ":memory:"})
+    try:
+        memory = run(max(arguments.generations, WARM_UP_GENERATIONS), arguments.samples)
+    finally:
+        server.shutdown()
+
+    for number, traced in memory:
+        print(f"after {number} generations: {traced / 1024:.1f} KiB traced")
+    growth = memory[-1][1] - memory[0][1]
+    print(f"prompts: {prompt_sizes['prompts']}, first (messages, bytes) {prompt_sizes['first']}, largest {prompt_sizes['largest']}")
+    print(f"memory growth after the warm-up: {growth / 1024:.1f} KiB, budget {MEMORY_GROWTH_BUDGET / 1024:.0f} KiB")
+    if prompt_sizes["largest"] > prompt_sizes["first"] or growth > MEMORY_GROWTH_BUDGET:
+        print("Prompts or memory grow across generations")
+        sys.exit(1)
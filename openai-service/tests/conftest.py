@@ -0,0 +1,31 @@
+"""
+Fixtures of the openai-service tests.
+
+The app reads its settings and builds the OpenAI client when first imported, so tests import it
+only after the completions_endpoint fixture has pointed the environment at a local endpoint.
+"""
+import os
+from http.server import ThreadingHTTPServer
+from threading import Thread
+from typing import Iterator
+import pytest
+
+from benchmarks.bench_prompt_growth import CompletionsHandler, prompt_sizes
+
+
+@pytest.fixture(scope="session")
+def completions_endpoint() -> Iterator[dict]:
+    """
+    Serve the chat completions endpoint locally and point the app at it and at an in-memory database.
+
+    Yields:
+        dict: Prompts received so far, and message count and body size of the first and of the largest one.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CompletionsHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["OPEN_AI_KEY"] = "tests"
+    # The in-memory database, shared by every session of the process
+    os.environ.update({"DB_BACKEND": "sqlite", "SQLITE_PATH": ":memory:"})
+    yield prompt_sizes
+    server.shutdown()
@@ -0,0 +1,21 @@
+"""Prompt size and memory of MCQ generation across requests."""
+import contextlib
+import io
+
+from benchmarks.bench_prompt_growth import MEMORY_GROWTH_BUDGET, WARM_UP_GENERATIONS, run
+
+# Generations sent, a thousand after the warm-up, enough for a prompt kept between requests
+# to grow past the first one and for memory kept per generation to exceed the budget
+GENERATIONS = WARM_UP_GENERATIONS + 1000
+
+
+def test_prompts_and_memory_do_not_grow_between_generations(completions_endpoint: dict):
+    # generate_question prints every completion
+    with contextlib.redirect_stdout(io.StringIO()):
+        memory = run(GENERATIONS, samples=1)
+
+    assert completions_endpoint["prompts"] == GENERATIONS
+    assert completions_endpoint["largest"] == completions_endpoint["first"]
+    # The first sample ends the warm-up
+    (_, after_warm_up), (_, after_all) = memory[0], memory[-1]
+    assert after_all - after_warm_up <= MEMORY_GROWTH_BUDGET, f"{(after_all - after_warm_up) / 1024:.1f} KiB"
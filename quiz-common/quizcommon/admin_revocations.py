@@ -0,0 +1,68 @@
+import time
+from datetime import datetime, timezone
+from threading import Lock
+from sqlmodel import Session, SQLModel, select
+
+from quizcommon.settings import ADMIN_REVOCATION_REFRESH
+
+# IDs of the revoked admin tokens that have not expired yet, the only admin token state read per request
+revoked_token_ids: frozenset[int] = frozenset()
+# Monotonic time of the last read of the revocations, 0 forces a read
+revocations_loaded_at = 0.0
+revocations_lock = Lock()
+
+
+# ================================================================================================================================
+def is_admin_token_revoked(token_id: int, session: Session, admin_token: type[SQLModel]) -> bool:
+    """
+    Check whether an admin token has been revoked, reading the revocations again once ADMIN_REVOCATION_REFRESH has passed.
+
+    Args:
+        token_id (int): The ID (jti claim) of the admin token.
+        session (Session): Database session, only used when the revocations are read again.
+        admin_token (type[SQLModel]): The AdminToken model of the service.
+
+    Returns:
+        bool: True if the token has been revoked.
+    """
+    if time.monotonic() - revocations_loaded_at >= ADMIN_REVOCATION_REFRESH:
+        load_revocations(session, admin_token)
+    return token_id in revoked_token_ids
+
+
+# ================================================================================================================================
+def load_revocations(session: Session, admin_token: type[SQLModel]):
+    """
+    Read the IDs of the revoked admin tokens that have not expired yet.
+
+    Expired tokens are refused by their exp claim, so the set only holds the tokens revoked early.
+    The lock is held during the read, so a revocation made by this worker meanwhile is not lost,
+    while requests keep checking the previous set.
+
+    Args:
+        session (Session): Database session.
+        admin_token (type[SQLModel]): The AdminToken model of the service, with admin_tokenId, revoked_at and expires_at columns.
+    """
+    global revoked_token_ids, revocations_loaded_at
+    with revocations_lock:
+        # Another request may have read them while this one waited
+        if time.monotonic() - revocations_loaded_at < ADMIN_REVOCATION_REFRESH:
+            return
+        loaded_at = time.monotonic()
+        revoked_token_ids = frozenset(session.exec(select(admin_token.admin_tokenId)
+                                                   .where(admin_token.revoked_at.is_not(None))
+                                                   .where(admin_token.expires_at > datetime.now(timezone.utc))).all())
+        revocations_loaded_at = loaded_at
+
+
+# ================================================================================================================================
+def remember_revocation(token_id: int):
+    """
+    Add a token revoked by this worker to the set at once, other workers see it at their next read.
+
+    Args:
+        token_id (int): The ID of the revoked admin token.
+    """
+    global revoked_token_ids
+    with revocations_lock:
+        revoked_token_ids = revoked_token_ids | {token_id}
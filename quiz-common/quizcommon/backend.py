@@ -0,0 +1,89 @@
+from sqlalchemy import Engine, event, make_url
+
+from quizcommon.settings import DB_BACKEND, SQLITE_PATH
+
+SUPPORTED_BACKENDS = ("postgres", "sqlite")
+
+# Named in-memory database shared by every connection of the process, sync and asyncio alike
+MEMORY_DATABASE_URL = "sqlite:///file:quiz?mode=memory&cache=shared&uri=true"
+
+
+# ================================================================================================================================
+def is_memory_database() -> bool:
+    """
+    Check whether the configured database lives in the memory of this process.
+
+    Returns:
+        bool: True for the in-memory SQLite backend.
+    """
+    return DB_BACKEND == "sqlite" and SQLITE_PATH == ":memory:"
+
+
+# ================================================================================================================================
+def driver_url(connection_str: str, asynchronous: bool = False) -> str:
+    """
+    Point a connection string at the driver used for its database.
+
+    Args:
+        connection_str (str): The database connection string.
+        asynchronous (bool): Whether the asyncio driver is wanted.
+
+    Returns:
+        str: The connection string with its driver set.
+    """
+    url = make_url(connection_str)
+    if url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite" if asynchronous else "sqlite")
+    else:
+        # psycopg serves both the sync and the asyncio engine, whether the string says postgres or postgresql
+        url = url.set(drivername="postgresql+psycopg")
+    return url.render_as_string(hide_password=False)
+
+
+# ================================================================================================================================
+def database_url(connection_str: str | None) -> str:
+    """
+    Build the connection string of the configured database backend.
+
+    Args:
+        connection_str (str | None): The Postgres connection string of the service, DB_CONNECTION_STR.
+
+    Raises:
+        ValueError: If DB_BACKEND names an unsupported backend, or is postgres without a connection string.
+
+    Returns:
+        str: The connection string, with the sync driver set.
+    """
+    if DB_BACKEND == "sqlite":
+        if is_memory_database():
+            return MEMORY_DATABASE_URL
+        return f"sqlite:///{SQLITE_PATH}"
+    if DB_BACKEND != "postgres":
+        raise ValueError(f"DB_BACKEND must be one of {', '.join(SUPPORTED_BACKENDS)}, got {DB_BACKEND!r}")
+    if not connection_str:
+        raise ValueError("DB_CONNECTION_STR must be set with DB_BACKEND=postgres, "
+                         "or DB_BACKEND=sqlite selects a SQLite database instead")
+    return driver_url(str(connection_str))
+
+
+# ================================================================================================================================
+def configure_sqlite(engine: Engine):
+    """
+    Make every SQLite connection of an engine enforce foreign keys as Postgres does.
+
+    File databases also switch to write-ahead logging so readers do not wait for writers.
+
+    Args:
+        engine (Engine): The engine, or the sync engine behind an asyncio engine.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    is_file_database = engine.url.database not in (None, "", ":memory:") and engine.url.query.get("mode") != "memory"
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        if is_file_database:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
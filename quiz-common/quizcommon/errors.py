@@ -0,0 +1,12 @@
+class ServiceUnavailableException(Exception):
+    """Exception raised when a service is too busy to take the request."""
+    def __init__(self, message: str) -> None:
+        self.message = message
+        super().__init__(self.message)
+
+class TooManyRequestsException(Exception):
+    """Exception raised when a client has made too many attempts and has to wait before the next one."""
+    def __init__(self, message: str, retry_after: int) -> None:
+        self.message = message
+        self.retry_after = retry_after
+        super().__init__(self.message)
@@ -0,0 +1,141 @@
+import math
+import time
+from collections import OrderedDict
+from threading import Lock
+from fastapi import Request
+
+from quizcommon.errors import TooManyRequestsException
+from quizcommon.settings import (
+    CLIENT_ADDRESS_HEADER, CLIENT_ADDRESS_PROXIES, LOGIN_ADDRESS_BURST, LOGIN_ADDRESS_PER_MINUTE, LOGIN_EMAIL_BURST,
+    LOGIN_EMAIL_PER_MINUTE, LOGIN_LIMITER_MAX_KEYS)
+from quizcommon.types import LoginLimiterMetricsType
+
+# Token bucket of every email and client address pair and of every client address: key -> (attempts left, monotonic time
+# they were counted), kept in least recently used order so the limiter stays bounded; an evicted key starts again with a full bucket
+email_buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+address_buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+# Counters of the attempts checked so far
+limiter_metrics = {
+    "allowed": 0,
+    "rejected_by_email": 0,
+    "rejected_by_address": 0,
+    "evicted": 0
+}
+limiter_lock = Lock()
+
+
+# ================================================================================================================================
+def attempts_left(buckets: OrderedDict[str, tuple[float, float]], key: str, burst: int, per_minute: int, now: float) -> float:
+    """
+    Count the attempts left in a bucket, refilled for the time since it was last counted.
+
+    Args:
+        buckets (OrderedDict[str, tuple[float, float]]): Buckets of the key kind.
+        key (str): The email and client address pair, or the client address.
+        burst (int): Attempts a full bucket holds.
+        per_minute (int): Attempts added back per minute.
+        now (float): Current monotonic time.
+
+    Returns:
+        float: Attempts left, a key without a bucket has a full one.
+    """
+    attempts, counted_at = buckets.get(key, (burst, now))
+    return min(burst, attempts + (now - counted_at) * per_minute / 60)
+
+
+# ================================================================================================================================
+def take_attempt(buckets: OrderedDict[str, tuple[float, float]], key: str, attempts: float, now: float):
+    """
+    Take one attempt from a bucket and evict the least recently used buckets past LOGIN_LIMITER_MAX_KEYS.
+
+    Args:
+        buckets (OrderedDict[str, tuple[float, float]]): Buckets of the key kind.
+        key (str): The email and client address pair, or the client address.
+        attempts (float): Attempts left before this one, as returned by attempts_left.
+        now (float): Current monotonic time.
+    """
+    buckets[key] = (attempts - 1, now)
+    buckets.move_to_end(key)
+    while len(buckets) > LOGIN_LIMITER_MAX_KEYS:
+        buckets.popitem(last=False)
+        limiter_metrics["evicted"] += 1
+
+
+# ================================================================================================================================
+def client_address(request: Request) -> str:
+    """
+    Find the address of the client that sent a request.
+
+    Behind a proxy the connection comes from the proxy, so when CLIENT_ADDRESS_HEADER is set the address is read
+    from that header instead, CLIENT_ADDRESS_PROXIES entries from its end: entries further left were written by
+    the client and can be forged. A request without the header falls back to the connection address.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        str: The client address, "unknown" when there is none.
+    """
+    if CLIENT_ADDRESS_HEADER:
+        forwarded = [entry.strip() for entry in request.headers.get(CLIENT_ADDRESS_HEADER, "").split(",") if entry.strip()]
+        if forwarded:
+            return forwarded[-min(CLIENT_ADDRESS_PROXIES, len(forwarded))]
+    return request.client.host if request.client else "unknown"
+
+
+# ================================================================================================================================
+def check_login_attempt(email: str, request: Request):
+    """
+    Count a login or signup attempt against its email and client address, before any password work is done.
+
+    The email bucket is kept per email and client address pair, so a client guessing one email's password
+    is slowed down without locking out its owner logging in from another address. An attempt takes one from
+    both buckets, or from none when either is empty, so attempts refused for their client address do not
+    drain the bucket of the email they target. A rate of 0 disables a bucket.
+
+    Args:
+        email (str): The email the attempt is for.
+        request (Request): The incoming request, identifying the client address.
+
+    Raises:
+        TooManyRequestsException: If the email or the client address has no attempt left.
+    """
+    # Same normalization as auth_controller.normalizeEmail
+    address = client_address(request)
+    email_key = f"{email.strip().lower()} {address}"
+    now = time.monotonic()
+    with limiter_lock:
+        email_attempts = attempts_left(email_buckets, email_key, LOGIN_EMAIL_BURST, LOGIN_EMAIL_PER_MINUTE, now)
+        address_attempts = attempts_left(address_buckets, address, LOGIN_ADDRESS_BURST, LOGIN_ADDRESS_PER_MINUTE, now)
+        if LOGIN_EMAIL_PER_MINUTE and email_attempts < 1:
+            limiter_metrics["rejected_by_email"] += 1
+            raise TooManyRequestsException("Login attempts", math.ceil((1 - email_attempts) * 60 / LOGIN_EMAIL_PER_MINUTE))
+        if LOGIN_ADDRESS_PER_MINUTE and address_attempts < 1:
+            limiter_metrics["rejected_by_address"] += 1
+            raise TooManyRequestsException("Login attempts", math.ceil((1 - address_attempts) * 60 / LOGIN_ADDRESS_PER_MINUTE))
+        if LOGIN_EMAIL_PER_MINUTE:
+            take_attempt(email_buckets, email_key, email_attempts, now)
+        if LOGIN_ADDRESS_PER_MINUTE:
+            take_attempt(address_buckets, address, address_attempts, now)
+        limiter_metrics["allowed"] += 1
+
+
+# ================================================================================================================================
+def get_login_limiter_metrics() -> LoginLimiterMetricsType:
+    """
+    Read the limits, the tracked keys and the counters of the login limiter.
+
+    Returns:
+        LoginLimiterMetricsType: Bucket sizes and rates, keys held in memory and attempts allowed or rejected.
+    """
+    with limiter_lock:
+        return {
+            "email_burst": LOGIN_EMAIL_BURST,
+            "email_per_minute": LOGIN_EMAIL_PER_MINUTE,
+            "address_burst": LOGIN_ADDRESS_BURST,
+            "address_per_minute": LOGIN_ADDRESS_PER_MINUTE,
+            "tracked_emails": len(email_buckets),
+            "tracked_addresses": len(address_buckets),
+            **limiter_metrics
+        }
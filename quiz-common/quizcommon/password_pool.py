@@ -0,0 +1,137 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, TypeVar
+
+from quizcommon.errors import ServiceUnavailableException
+from quizcommon.settings import PASSWORD_QUEUE_LIMIT, PASSWORD_WORKERS
+from quizcommon.types import PasswordPoolMetricsType
+
+Result = TypeVar("Result")
+
+# bcrypt releases the GIL while it hashes, so worker threads run it alongside the event loop or the request threads.
+# Fewer workers than cores leaves the other requests a core during login bursts
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password")
+
+# Jobs admitted to the pool and counters of the jobs done so far
+password_metrics = {
+    "pending": 0,
+    "running": 0,
+    "peak_queued": 0,
+    "completed": 0,
+    "rejected": 0,
+    "wait_total": 0.0,
+    "wait_max": 0.0,
+    "run_total": 0.0
+}
+password_metrics_lock = Lock()
+
+
+# ================================================================================================================================
+def admit_password_job():
+    """
+    Reserve a place in the pool for a password job, or turn it away when the queue is full.
+
+    Raises:
+        ServiceUnavailableException: If every worker is busy and the queue holds PASSWORD_QUEUE_LIMIT jobs.
+    """
+    with password_metrics_lock:
+        if password_metrics["pending"] >= PASSWORD_WORKERS + PASSWORD_QUEUE_LIMIT:
+            password_metrics["rejected"] += 1
+            raise ServiceUnavailableException("Password service")
+        password_metrics["pending"] += 1
+        queued = password_metrics["pending"] - password_metrics["running"]
+        password_metrics["peak_queued"] = max(password_metrics["peak_queued"], queued)
+
+
+# ================================================================================================================================
+def run_admitted_job(func: Callable[..., Result], args: tuple, admitted_at: float) -> Result:
+    """
+    Run an admitted password job on a worker, recording its wait and run time.
+
+    Args:
+        func (Callable[..., Result]): The password function.
+        args (tuple): Arguments of the function.
+        admitted_at (float): Monotonic time at which the job was admitted.
+
+    Returns:
+        Result: What the function returned.
+    """
+    started_at = time.perf_counter()
+    with password_metrics_lock:
+        password_metrics["running"] += 1
+        password_metrics["wait_total"] += started_at - admitted_at
+        password_metrics["wait_max"] = max(password_metrics["wait_max"], started_at - admitted_at)
+    try:
+        return func(*args)
+    finally:
+        # Released here rather than by the caller, so a cancelled request does not free a worker still hashing
+        with password_metrics_lock:
+            password_metrics["running"] -= 1
+            password_metrics["pending"] -= 1
+            password_metrics["completed"] += 1
+            password_metrics["run_total"] += time.perf_counter() - started_at
+
+
+# ================================================================================================================================
+async def run_password_job(func: Callable[..., Result], *args: Any) -> Result:
+    """
+    Run a password function on the worker pool without blocking the event loop.
+
+    Args:
+        func (Callable[..., Result]): The password function, such as pwd_context.hash.
+        *args (Any): Arguments of the function.
+
+    Raises:
+        ServiceUnavailableException: If the pool queue is full.
+
+    Returns:
+        Result: What the function returned.
+    """
+    admit_password_job()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, run_admitted_job, func, args, time.perf_counter())
+
+
+# ================================================================================================================================
+def run_password_job_sync(func: Callable[..., Result], *args: Any) -> Result:
+    """
+    Run a password function on the worker pool and wait for it, for code running outside the event loop.
+
+    Args:
+        func (Callable[..., Result]): The password function, such as pwd_context.hash.
+        *args (Any): Arguments of the function.
+
+    Raises:
+        ServiceUnavailableException: If the pool queue is full.
+
+    Returns:
+        Result: What the function returned.
+    """
+    admit_password_job()
+    return password_executor.submit(run_admitted_job, func, args, time.perf_counter()).result()
+
+
+# ================================================================================================================================
+def get_password_pool_metrics() -> PasswordPoolMetricsType:
+    """
+    Read the live state and the counters of the password pool.
+
+    Returns:
+        PasswordPoolMetricsType: Current queue depth and job telemetry.
+    """
+    with password_metrics_lock:
+        completed = password_metrics["completed"]
+        return {
+            "workers": PASSWORD_WORKERS,
+            "queue_limit": PASSWORD_QUEUE_LIMIT,
+            "running": password_metrics["running"],
+            "queued": password_metrics["pending"] - password_metrics["running"],
+            "peak_queued": password_metrics["peak_queued"],
+            "completed": completed,
+            "rejected": password_metrics["rejected"],
+            "wait_avg_ms": round(password_metrics["wait_total"] / completed * 1000, 3) if completed else 0.0,
+            "wait_max_ms": round(password_metrics["wait_max"] * 1000, 3),
+            "run_avg_ms": round(password_metrics["run_total"] / completed * 1000, 3) if completed else 0.0
+        }
@@ -0,0 +1,126 @@
+import time
+from threading import Lock
+from typing import Any
+from sqlalchemy import event, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from quizcommon.settings import (
+    DB_MAX_OVERFLOW, DB_POOL_PRE_PING, DB_POOL_RECYCLE, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_SSL_MODE, DB_STATEMENT_TIMEOUT)
+from quizcommon.types import PoolMetricsType
+
+
+class MeasuredPool:
+    """Pool mixin recording how long checkouts wait, how far the pool overflows and how many connections die."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics_lock = Lock()
+        self.checkouts = 0
+        self.checkout_wait = 0.0
+        self.checkout_wait_max = 0.0
+        self.checkout_timeouts = 0
+        self.peak_overflow = 0
+        self.invalidated_connections = 0
+        event.listen(self, "invalidate", self.record_invalidation)
+
+    def connect(self):
+        """Check a connection out of the pool, timing the wait including any pre-ping."""
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            with self.metrics_lock:
+                self.checkout_timeouts += 1
+            raise
+        wait = time.perf_counter() - start
+        with self.metrics_lock:
+            self.checkouts += 1
+            self.checkout_wait += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+            self.peak_overflow = max(self.peak_overflow, self.overflow())
+        return connection
+
+    def record_invalidation(self, dbapi_connection, connection_record, exception):
+        """Count a connection dropped by a failed pre-ping or a disconnect."""
+        with self.metrics_lock:
+            self.invalidated_connections += 1
+
+
+class MeasuredQueuePool(MeasuredPool, QueuePool):
+    """Queue pool of the sync engine with telemetry."""
+
+
+class MeasuredAsyncQueuePool(MeasuredPool, AsyncAdaptedQueuePool):
+    """Queue pool of the asyncio engine with telemetry."""
+
+
+# ================================================================================================================================
+def engine_options(connection_str: str, poolclass: type[Pool]) -> dict[str, Any]:
+    """
+    Build the engine options from the connection pool settings.
+
+    Args:
+        connection_str (str): The database connection string.
+        poolclass (type[Pool]): Pool class matching the engine, sync or asyncio, a measured one to report telemetry.
+
+    Returns:
+        dict[str, Any]: Keyword arguments for create_engine or create_async_engine.
+    """
+    url = make_url(connection_str)
+    if url.get_backend_name() == "sqlite":
+        # Sessions hand connections across threads, SQLite serializes the writes itself
+        options = {
+            "poolclass": poolclass,
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "connect_args": {"check_same_thread": False}
+        }
+        if url.query.get("mode") == "memory":
+            # A shared in-memory database fails concurrent writers instead of waiting, so one connection is
+            # used at a time, and it is never recycled since the database disappears with its last connection
+            options.update({"pool_size": 1, "max_overflow": 0, "pool_recycle": -1})
+        return options
+
+    connect_args = {}
+    if DB_SSL_MODE:
+        connect_args["sslmode"] = DB_SSL_MODE
+    if DB_STATEMENT_TIMEOUT:
+        # Postgres cancels any statement of these connections running longer than the timeout
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": connect_args
+    }
+
+
+# ================================================================================================================================
+def get_pool_metrics(pool: MeasuredPool) -> PoolMetricsType:
+    """
+    Read the live state and the counters of a measured pool.
+
+    Args:
+        pool (MeasuredPool): The pool of an engine, read from engine.pool since disposing an engine replaces it.
+
+    Returns:
+        PoolMetricsType: Current pool usage and checkout telemetry.
+    """
+    with pool.metrics_lock:
+        checkout_wait_avg = pool.checkout_wait / pool.checkouts if pool.checkouts else 0.0
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(0, pool.overflow()),
+            "peak_overflow": max(0, pool.peak_overflow),
+            "checkouts": pool.checkouts,
+            "checkout_wait_avg_ms": round(checkout_wait_avg * 1000, 3),
+            "checkout_wait_max_ms": round(pool.checkout_wait_max * 1000, 3),
+            "checkout_timeouts": pool.checkout_timeouts,
+            "invalidated_connections": pool.invalidated_connections
+        }
@@ -0,0 +1,104 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from sqlmodel import SQLModel
+
+from quizcommon.settings import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
+from quizcommon.types import PrincipalType
+
+# Principal of every cached token: token -> decoded claims and user record,
+# kept in least recently used order so the cache stays bounded
+principals: OrderedDict[str, PrincipalType] = OrderedDict()
+# Cached tokens of every user, so a change to the user drops all of them
+user_tokens: dict[int, set[str]] = {}
+# Bumped by every invalidation, a lookup that started before one does not store its stale user
+principals_generation = 0
+principals_lock = Lock()
+
+
+# ================================================================================================================================
+def get_principal_generation() -> int:
+    """
+    Read the invalidation counter, to be passed to remember_principal after the user lookup.
+
+    Returns:
+        int: Number of invalidations so far.
+    """
+    return principals_generation
+
+
+# ================================================================================================================================
+def get_principal(token: str) -> PrincipalType | None:
+    """
+    Get the cached principal of a token.
+
+    Args:
+        token (str): The JWT of the request.
+
+    Returns:
+        PrincipalType | None: Claims and user record of the token, None if it is not cached or has expired.
+    """
+    with principals_lock:
+        principal = principals.get(token)
+        if principal is None:
+            return None
+        if principal["expires_at"] <= time.time():
+            drop_token(token)
+            return None
+        principals.move_to_end(token)
+        return principal
+
+
+# ================================================================================================================================
+def remember_principal(token: str, claims: dict, user: SQLModel, generation: int):
+    """
+    Store the principal of a verified token in the cache, until the token expires or PRINCIPAL_CACHE_TTL passes.
+
+    Args:
+        token (str): The verified JWT.
+        claims (dict): Claims decoded from the token.
+        user (SQLModel): The user the token belongs to, as just read from the database, with a user_id column.
+        generation (int): get_principal_generation before the user was read.
+    """
+    expires_at = min(claims.get("exp", float("inf")), time.time() + PRINCIPAL_CACHE_TTL)
+    with principals_lock:
+        # The user may have changed since it was read
+        if generation != principals_generation:
+            return
+        principals[token] = {"claims": claims, "user": user.model_dump(), "expires_at": expires_at}
+        principals.move_to_end(token)
+        user_tokens.setdefault(user.user_id, set()).add(token)
+        while len(principals) > PRINCIPAL_CACHE_SIZE:
+            drop_token(next(iter(principals)))
+
+
+# ================================================================================================================================
+def forget_user_principals(user_id: int):
+    """
+    Drop the cached principals of a user, after the user has been updated or deleted.
+
+    Args:
+        user_id (int): The ID of the user.
+    """
+    global principals_generation
+    with principals_lock:
+        principals_generation += 1
+        for token in user_tokens.pop(user_id, set()):
+            principals.pop(token, None)
+
+
+# ================================================================================================================================
+def drop_token(token: str):
+    """
+    Remove a token from the cache, the caller holds principals_lock.
+
+    Args:
+        token (str): The token to remove.
+    """
+    principal = principals.pop(token)
+    tokens = user_tokens.get(principal["user"]["user_id"])
+    if tokens is not None:
+        tokens.discard(token)
+        if not tokens:
+            del user_tokens[principal["user"]["user_id"]]
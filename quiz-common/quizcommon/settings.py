@@ -0,0 +1,49 @@
+from starlette.config import Config
+# Load environment variables from the .env file of the service importing this package
+try:
+    config = Config(".env")
+except FileNotFoundError:
+    print("Environment file (.env) not found")
+
+# Connection pool settings (timeouts and recycle age in seconds, statement timeout in milliseconds, 0 disables it)
+DB_POOL_SIZE = config.get("DB_POOL_SIZE", cast=int, default=5)
+DB_MAX_OVERFLOW = config.get("DB_MAX_OVERFLOW", cast=int, default=10)
+DB_POOL_TIMEOUT = config.get("DB_POOL_TIMEOUT", cast=int, default=30)
+DB_POOL_RECYCLE = config.get("DB_POOL_RECYCLE", cast=int, default=600)
+DB_POOL_PRE_PING = config.get("DB_POOL_PRE_PING", cast=bool, default=True)
+DB_STATEMENT_TIMEOUT = config.get("DB_STATEMENT_TIMEOUT", cast=int, default=0)
+
+# Database backend settings ("postgres" or "sqlite", SQLITE_PATH is a file path or ":memory:",
+# and the Postgres sslmode of the connections, empty to use the driver default)
+DB_BACKEND = config.get("DB_BACKEND", default="postgres")
+SQLITE_PATH = config.get("SQLITE_PATH", default=":memory:")
+DB_SSL_MODE = config.get("DB_SSL_MODE", default="require")
+
+# Password hashing settings (worker threads running bcrypt, and jobs allowed to wait for one before requests get a 503)
+PASSWORD_WORKERS = config.get("PASSWORD_WORKERS", cast=int, default=2)
+PASSWORD_QUEUE_LIMIT = config.get("PASSWORD_QUEUE_LIMIT", cast=int, default=32)
+
+# Authenticated principal cache settings (tokens kept in memory, and seconds a cached user may lag a change made by another worker)
+PRINCIPAL_CACHE_SIZE = config.get("PRINCIPAL_CACHE_SIZE", cast=int, default=10000)
+PRINCIPAL_CACHE_TTL = config.get("PRINCIPAL_CACHE_TTL", cast=int, default=60)
+
+# Admin token revocation settings (seconds a token revoked through another worker may still be accepted here)
+ADMIN_REVOCATION_REFRESH = config.get("ADMIN_REVOCATION_REFRESH", cast=int, default=5)
+
+# Expired token reaper settings (seconds between runs, 0 disables it, rows deleted per transaction, and milliseconds a batch waits for a table lock)
+TOKEN_REAPER_INTERVAL = config.get("TOKEN_REAPER_INTERVAL", cast=int, default=300)
+TOKEN_REAPER_BATCH_SIZE = config.get("TOKEN_REAPER_BATCH_SIZE", cast=int, default=500)
+TOKEN_REAPER_LOCK_TIMEOUT = config.get("TOKEN_REAPER_LOCK_TIMEOUT", cast=int, default=1000)
+
+# Login limiter settings (attempts a bucket holds and attempts added back per minute, per email and client address pair
+# and per client address, 0 per minute disables a bucket)
+LOGIN_EMAIL_BURST = config.get("LOGIN_EMAIL_BURST", cast=int, default=5)
+LOGIN_EMAIL_PER_MINUTE = config.get("LOGIN_EMAIL_PER_MINUTE", cast=int, default=5)
+LOGIN_ADDRESS_BURST = config.get("LOGIN_ADDRESS_BURST", cast=int, default=30)
+LOGIN_ADDRESS_PER_MINUTE = config.get("LOGIN_ADDRESS_PER_MINUTE", cast=int, default=60)
+LOGIN_LIMITER_MAX_KEYS = config.get("LOGIN_LIMITER_MAX_KEYS", cast=int, default=100000)
+
+# Client address settings (header a trusted proxy writes the client address to, such as X-Forwarded-For, empty to use
+# the connection address, and the number of trusted proxies appending to it, the address is read that many entries from its end)
+CLIENT_ADDRESS_HEADER = config.get("CLIENT_ADDRESS_HEADER", default="")
+CLIENT_ADDRESS_PROXIES = config.get("CLIENT_ADDRESS_PROXIES", cast=int, default=1)
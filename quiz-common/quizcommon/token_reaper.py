@@ -0,0 +1,163 @@
+import asyncio
+import time
+from contextlib import suppress
+from datetime import datetime, timezone
+from threading import Lock
+from sqlalchemy import Column, Engine, delete, select, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from quizcommon.backend import is_memory_database
+from quizcommon.settings import TOKEN_REAPER_BATCH_SIZE, TOKEN_REAPER_INTERVAL, TOKEN_REAPER_LOCK_TIMEOUT
+from quizcommon.types import TokenReaperMetricsType
+
+# Key and expiry column of every table to empty of expired tokens, by table name, as passed by the service
+ReapedTables = dict[str, tuple[Column, Column]]
+
+# Counters of the runs done so far, the tables are added by start_token_reaper
+reaper_metrics: TokenReaperMetricsType = {
+    "interval": TOKEN_REAPER_INTERVAL,
+    "runs": 0,
+    "failed_runs": 0,
+    "last_run_ms": 0.0,
+    "last_removed": {},
+    "total_removed": {}
+}
+reaper_metrics_lock = Lock()
+
+
+# ================================================================================================================================
+def reap_table(engine: Engine, key: Column, expires_at: Column, now: datetime) -> int:
+    """
+    Delete the rows of a table that expired before the given time, TOKEN_REAPER_BATCH_SIZE rows per transaction.
+
+    Every batch is a short transaction of its own, skips rows locked by a request instead of waiting for them,
+    and on Postgres gives up after TOKEN_REAPER_LOCK_TIMEOUT when the table itself is locked.
+
+    Args:
+        engine (Engine): Engine bound to the database.
+        key (Column): Primary key column of the table.
+        expires_at (Column): Expiry column of the table.
+        now (datetime): Rows expiring before this time are deleted.
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    expired = select(key).where(expires_at <= now).limit(TOKEN_REAPER_BATCH_SIZE).with_for_update(skip_locked=True)
+    removed = 0
+    while True:
+        with engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text(f"SET LOCAL lock_timeout = {TOKEN_REAPER_LOCK_TIMEOUT}"))
+            deleted = connection.execute(delete(key.table).where(key.in_(expired))).rowcount
+        removed += deleted
+        if deleted < TOKEN_REAPER_BATCH_SIZE:
+            return removed
+
+
+# ================================================================================================================================
+def reap_expired_tokens(engine: Engine, tables: ReapedTables) -> dict[str, int]:
+    """
+    Delete the expired tokens of the given tables, and record the run in the reaper metrics.
+
+    Args:
+        engine (Engine): Engine bound to the database.
+        tables (ReapedTables): Key and expiry column of every table to empty.
+
+    Raises:
+        SQLAlchemyError: If a batch fails, such as when its lock timeout expires.
+
+    Returns:
+        dict[str, int]: Number of rows deleted from every table.
+    """
+    started_at = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    removed = {}
+    try:
+        for table, (key, expires_at) in tables.items():
+            removed[table] = reap_table(engine, key, expires_at, now)
+    except SQLAlchemyError:
+        with reaper_metrics_lock:
+            reaper_metrics["failed_runs"] += 1
+        raise
+    with reaper_metrics_lock:
+        reaper_metrics["runs"] += 1
+        reaper_metrics["last_run_ms"] = round((time.perf_counter() - started_at) * 1000, 3)
+        reaper_metrics["last_removed"] = removed
+        for table, count in removed.items():
+            reaper_metrics["total_removed"][table] = reaper_metrics["total_removed"].get(table, 0) + count
+    return removed
+
+
+# ================================================================================================================================
+async def run_token_reaper(engine: Engine, tables: ReapedTables):
+    """
+    Reap the expired tokens every TOKEN_REAPER_INTERVAL seconds until cancelled.
+
+    Runs go to a worker thread, as the engine is synchronous. A failed run is reported and retried
+    at the next interval, so a long lock held by a migration only delays the cleanup.
+
+    Args:
+        engine (Engine): Engine bound to the database.
+        tables (ReapedTables): Key and expiry column of every table to empty.
+    """
+    while True:
+        await asyncio.sleep(TOKEN_REAPER_INTERVAL)
+        try:
+            removed = await asyncio.to_thread(reap_expired_tokens, engine, tables)
+        except SQLAlchemyError as error:
+            print(f"Token reaper failed, retrying in {TOKEN_REAPER_INTERVAL} s: {error}")
+            continue
+        print("Token reaper removed " + ", ".join(f"{count} {table}" for table, count in removed.items()) + " rows")
+
+
+# ================================================================================================================================
+def start_token_reaper(engine: Engine, tables: ReapedTables) -> asyncio.Task | None:
+    """
+    Start the token reaper on the running event loop, unless TOKEN_REAPER_INTERVAL is 0 or the database is in memory.
+
+    The in-memory database disappears with the process, and its shared cache locks whole tables instead of
+    waiting for them, so a reaper batch and a request writing a token at the same time would make one of them fail.
+
+    Args:
+        engine (Engine): Engine bound to the database.
+        tables (ReapedTables): Key and expiry column of every table to empty.
+
+    Returns:
+        asyncio.Task | None: The reaper task, to be passed to stop_token_reaper.
+    """
+    with reaper_metrics_lock:
+        for table in tables:
+            reaper_metrics["last_removed"].setdefault(table, 0)
+            reaper_metrics["total_removed"].setdefault(table, 0)
+    if TOKEN_REAPER_INTERVAL <= 0 or is_memory_database():
+        return None
+    return asyncio.create_task(run_token_reaper(engine, tables), name="token-reaper")
+
+
+# ================================================================================================================================
+async def stop_token_reaper(task: asyncio.Task | None):
+    """
+    Cancel the token reaper and wait for it, a batch already running in its thread still completes.
+
+    Args:
+        task (asyncio.Task | None): The task returned by start_token_reaper.
+    """
+    if task is None:
+        return
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+
+# ================================================================================================================================
+def get_token_reaper_metrics() -> TokenReaperMetricsType:
+    """
+    Read the counters of the token reaper.
+
+    Returns:
+        TokenReaperMetricsType: Runs so far and rows they removed.
+    """
+    with reaper_metrics_lock:
+        return {**reaper_metrics,
+                "last_removed": dict(reaper_metrics["last_removed"]),
+                "total_removed": dict(reaper_metrics["total_removed"])}
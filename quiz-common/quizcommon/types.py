@@ -0,0 +1,78 @@
+from typing import TypedDict
+
+# Define the structure of the PoolMetricsType TypedDict
+PoolMetricsType = TypedDict(
+    "PoolMetricsType",  # Name of the TypedDict
+    {
+        "pool_size": int,  # Connections the pool keeps open
+        "checked_out": int,  # Connections currently in use
+        "overflow": int,  # Connections currently open beyond the pool size
+        "peak_overflow": int,  # Most connections ever open beyond the pool size
+        "checkouts": int,  # Connections handed out so far
+        "checkout_wait_avg_ms": float,  # Average time spent waiting for a connection
+        "checkout_wait_max_ms": float,  # Longest time spent waiting for a connection
+        "checkout_timeouts": int,  # Checkouts that gave up after the pool timeout
+        "invalidated_connections": int  # Connections dropped after a failed pre-ping or a disconnect
+    }
+)
+
+
+# Define the structure of the PasswordPoolMetricsType TypedDict
+PasswordPoolMetricsType = TypedDict(
+    "PasswordPoolMetricsType",  # Name of the TypedDict
+    {
+        "workers": int,  # Threads hashing and verifying passwords
+        "queue_limit": int,  # Jobs allowed to wait for a thread
+        "running": int,  # Jobs currently on a thread
+        "queued": int,  # Jobs currently waiting for a thread
+        "peak_queued": int,  # Most jobs ever waiting for a thread
+        "completed": int,  # Jobs finished so far
+        "rejected": int,  # Jobs turned away because the queue was full
+        "wait_avg_ms": float,  # Average time a job waited for a thread
+        "wait_max_ms": float,  # Longest time a job waited for a thread
+        "run_avg_ms": float  # Average time a job spent hashing or verifying
+    }
+)
+
+
+# Define the structure of the PrincipalType TypedDict
+PrincipalType = TypedDict(
+    "PrincipalType",  # Name of the TypedDict
+    {
+        "claims": dict,  # Claims decoded from the token
+        "user": dict,  # Columns of the user the token belongs to
+        "expires_at": float  # Wall clock time after which the token or the cached user is no longer trusted
+    }
+)
+
+
+# Define the structure of the TokenReaperMetricsType TypedDict
+TokenReaperMetricsType = TypedDict(
+    "TokenReaperMetricsType",  # Name of the TypedDict
+    {
+        "interval": int,  # Seconds between runs, 0 when the reaper is disabled
+        "runs": int,  # Runs completed so far
+        "failed_runs": int,  # Runs stopped by a database error, such as a lock timeout
+        "last_run_ms": float,  # Duration of the last completed run
+        "last_removed": dict[str, int],  # Expired rows deleted from every table by the last completed run
+        "total_removed": dict[str, int]  # Expired rows deleted from every table so far
+    }
+)
+
+
+# Define the structure of the LoginLimiterMetricsType TypedDict
+LoginLimiterMetricsType = TypedDict(
+    "LoginLimiterMetricsType",  # Name of the TypedDict
+    {
+        "email_burst": int,  # Attempts an email may make at once from one client address
+        "email_per_minute": int,  # Attempts an email regains per minute and client address, 0 when the email limit is disabled
+        "address_burst": int,  # Attempts a client address may make at once
+        "address_per_minute": int,  # Attempts a client address regains per minute, 0 when the address limit is disabled
+        "tracked_emails": int,  # Email and client address pairs currently holding a bucket
+        "tracked_addresses": int,  # Client addresses currently holding a bucket
+        "allowed": int,  # Attempts let through so far
+        "rejected_by_email": int,  # Attempts refused because their email had no attempt left
+        "rejected_by_address": int,  # Attempts refused because their client address had no attempt left
+        "evicted": int  # Buckets dropped to stay within LOGIN_LIMITER_MAX_KEYS
+    }
+)
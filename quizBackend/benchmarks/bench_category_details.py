@@ -0,0 +1,143 @@
+"""
+Benchmark get_categories_details as the number of categories grows.
+
+Compares the previous loop (one CategoryQuizDetails query per category plus one
+CategoryMarks query per finished category) with the single aggregated query.
+Run from the quizBackend directory against a disposable test database:
+
+    poetry run python -m benchmarks.bench_category_details --sizes 10 50 200 1000
+"""
+import argparse
+import asyncio
+from sqlalchemy import Engine, delete, insert
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from quizbackend.db.query_counter import count_queries
+from quizbackend.controllers.quiz_controller import get_categories_details
+from quizbackend.models.quiz_model import Category, CategoryMarks, CategoryQuizDetails
+from quizbackend.models.user_model import User
+from benchmarks.utils import (
+    async_time_call, create_async_benchmark_engine, create_benchmark_engine, print_table, summarize, time_call)
+
+
+# ================================================================================================================================
+def legacy_categories_details(user_id: int, session: Session):
+    """Previous implementation of get_categories_details, kept as the benchmark baseline."""
+    details = []
+    all_category_marks = 0
+    categories = session.exec(select(Category))
+    for category in categories:
+        category_details = session.exec(select(CategoryQuizDetails)
+                                        .where(CategoryQuizDetails.user_id == user_id)
+                                        .where(CategoryQuizDetails.category_id == category.category_id)).first()
+        if category_details and category_details.is_finished:
+            category_marks = session.exec(select(CategoryMarks).where(
+                CategoryMarks.category_id == category.category_id)).one()
+            details.append({"category_name": category.category_name, "isAttempt": True})
+            all_category_marks += category_marks.marks
+        else:
+            details.append({"category_name": category.category_name, "isAttempt": False})
+    return {"allCategoryDetails": details, "allCategoryMarks": all_category_marks}
+
+
+# ================================================================================================================================
+def seed_categories(engine: Engine, size: int) -> int:
+    """
+    Create a user and the given number of categories, half of them finished by the user.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+        size (int): Number of categories to create.
+
+    Returns:
+        int: ID of the created user.
+    """
+    with Session(engine) as session:
+        user = User(user_name="bench-categories", user_email=f"bench-categories-{size}@bench.local",
+                    user_password="not-a-real-hash")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        session.execute(insert(Category), [{"category_name": f"bench-details-{number}",
+                                            "category_description": "Category details benchmark"}
+                                           for number in range(size)])
+        category_ids = session.exec(select(Category.category_id).where(
+            Category.category_name.startswith("bench-details-"))).all()
+        session.execute(insert(CategoryMarks), [{"category_id": category_id, "marks": 50}
+                                                for category_id in category_ids])
+        session.execute(insert(CategoryQuizDetails), [{"user_id": user.user_id, "category_id": category_id,
+                                                       "obtaining_marks": 30, "remaining_questions": 0,
+                                                       "is_finished": index % 2 == 0}
+                                                      for index, category_id in enumerate(category_ids)])
+        session.commit()
+        return user.user_id
+
+
+# ================================================================================================================================
+def drop_categories(engine: Engine, user_id: int):
+    """
+    Delete the rows created by seed_categories.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+        user_id (int): ID of the seeded user.
+    """
+    with Session(engine) as session:
+        category_ids = session.exec(select(Category.category_id).where(
+            Category.category_name.startswith("bench-details-"))).all()
+        session.execute(delete(CategoryQuizDetails).where(
+            CategoryQuizDetails.category_id.in_(category_ids)))
+        session.execute(delete(CategoryMarks).where(
+            CategoryMarks.category_id.in_(category_ids)))
+        session.execute(delete(Category).where(
+            Category.category_id.in_(category_ids)))
+        session.execute(delete(User).where(User.user_id == user_id))
+        session.commit()
+
+
+# ================================================================================================================================
+async def run(sizes: list[int], repeat: int):
+    """
+    Run the category details benchmark for every category count and print the results.
+
+    Args:
+        sizes (list[int]): Category counts to benchmark.
+        repeat (int): Number of calls measured per implementation.
+    """
+    engine = create_benchmark_engine()
+    async_engine = create_async_benchmark_engine()
+    rows = []
+    for size in sizes:
+        user_id = seed_categories(engine, size)
+        try:
+            with Session(engine) as session, count_queries(engine) as legacy_statements:
+                legacy_details = legacy_categories_details(user_id, session)
+            async with AsyncSession(async_engine) as async_session:
+                with count_queries(async_engine.sync_engine) as statements:
+                    details = await get_categories_details(user_id, async_session)
+                # Both implementations must return the same payload
+                if legacy_details != details:
+                    raise AssertionError(f"Category details differ with {size} categories")
+                aggregated = summarize(await async_time_call(
+                    lambda: get_categories_details(user_id, async_session), repeat))
+            with Session(engine) as session:
+                legacy = summarize(time_call(
+                    lambda: legacy_categories_details(user_id, session), repeat))
+            rows.append([size, len(legacy_statements), legacy["p50_ms"], legacy["p95_ms"],
+                         len(statements), aggregated["p50_ms"], aggregated["p95_ms"]])
+        finally:
+            drop_categories(engine, user_id)
+    await async_engine.dispose()
+
+    print_table(["categories", "loop queries", "loop p50", "loop p95",
+                 "join queries", "join p50", "join p95"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10, 50, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    arguments = parser.parse_args()
+    asyncio.run(run(arguments.sizes, arguments.repeat))
@@ -0,0 +1,190 @@
+"""
+Benchmark request throughput as the number of in-flight requests grows.
+
+Every request runs the quiz details lookup behind get_quiz. In blocking mode
+it goes through a synchronous Session inside the coroutine, as the async
+routes did before the async database layer, so requests on the event loop
+run one after another. In async mode it goes through an AsyncSession and
+requests overlap while waiting on the database. On Postgres every request
+can also wait on a server-side pg_sleep, standing in for a slow query or a
+remote database. Run from the quizBackend directory against a disposable test
+database:
+
+    poetry run python -m benchmarks.bench_concurrency --concurrency 1 4 16 64 --query-delay-ms 5
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+from sqlalchemy import Engine, delete, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from quizbackend.models.quiz_model import Category, CategoryQuizDetails, CategorySummary, Choice, Question
+from quizbackend.models.user_model import User
+from benchmarks.utils import create_async_benchmark_engine, create_benchmark_engine, print_table, summarize
+
+
+# ================================================================================================================================
+def seed_quiz(engine: Engine) -> tuple[int, int, str]:
+    """
+    Create a user and a category with enough questions for a full quiz.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+
+    Returns:
+        tuple[int, int, str]: User ID, category ID and category name.
+    """
+    with Session(engine) as session:
+        user = User(user_name="bench-concurrency", user_email="bench-concurrency@bench.local",
+                    user_password="not-a-real-hash")
+        category = Category(category_name="bench-concurrency",
+                            category_description="Concurrency benchmark")
+        session.add(user)
+        session.add(category)
+        session.commit()
+        session.refresh(user)
+        session.refresh(category)
+        for number in range(12):
+            choices = [Choice(choice=f"Choice {index}", choice_status=index == 0)
+                       for index in range(4)]
+            session.add(Question(question=f"Question {number}",
+                        category_id=category.category_id, choices=choices))
+        session.add(CategoryQuizDetails(
+            user_id=user.user_id, category_id=category.category_id))
+        session.commit()
+        return user.user_id, category.category_id, category.category_name
+
+
+# ================================================================================================================================
+def drop_quiz(engine: Engine, user_id: int, category_id: int):
+    """
+    Delete the rows created by seed_quiz.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+        user_id (int): ID of the seeded user.
+        category_id (int): ID of the seeded category.
+    """
+    with Session(engine) as session:
+        question_ids = session.exec(select(Question.question_id).where(
+            Question.category_id == category_id)).all()
+        session.execute(delete(Choice).where(
+            Choice.question_id.in_(question_ids)))
+        session.execute(delete(Question).where(
+            Question.category_id == category_id))
+        session.execute(delete(CategoryQuizDetails).where(
+            CategoryQuizDetails.category_id == category_id))
+        session.execute(delete(CategorySummary).where(
+            CategorySummary.category_id == category_id))
+        session.execute(delete(Category).where(
+            Category.category_id == category_id))
+        session.execute(delete(User).where(User.user_id == user_id))
+        session.commit()
+
+
+# ================================================================================================================================
+def quiz_details_statement(user_id: int, category_name: str):
+    """Build the quiz details lookup issued by get_quiz."""
+    return (select(CategoryQuizDetails).join(Category)
+            .where(Category.category_name == category_name)
+            .where(CategoryQuizDetails.user_id == user_id))
+
+
+# Server-side wait added to every request, standing in for a slow query
+QUERY_DELAY = text("SELECT pg_sleep(:seconds)")
+
+
+# ================================================================================================================================
+async def blocking_request(engine: Engine, user_id: int, category_name: str, query_delay: float):
+    """Run the lookup through a synchronous session, blocking the event loop for the round trip."""
+    with Session(engine) as session:
+        if query_delay:
+            session.execute(QUERY_DELAY, {"seconds": query_delay})
+        session.exec(quiz_details_statement(user_id, category_name)).one()
+
+
+# ================================================================================================================================
+async def async_request(engine: AsyncEngine, user_id: int, category_name: str, query_delay: float):
+    """Run the lookup through an asyncio session, yielding to other requests during the round trip."""
+    async with AsyncSession(engine) as session:
+        if query_delay:
+            await session.execute(QUERY_DELAY, {"seconds": query_delay})
+        (await session.exec(quiz_details_statement(user_id, category_name))).one()
+
+
+# ================================================================================================================================
+async def measure_throughput(request: Callable[[], Awaitable[None]], concurrency: int, requests: int) -> dict[str, float]:
+    """
+    Run requests with a fixed number in flight and measure throughput and latency.
+
+    Args:
+        request (Callable[[], Awaitable[None]]): Coroutine function running one request.
+        concurrency (int): Number of requests kept in flight.
+        requests (int): Total number of requests.
+
+    Returns:
+        dict[str, float]: Requests per second, median and 95th percentile latency in milliseconds.
+    """
+    samples = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            await request()
+            samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latency = summarize(samples)
+    return {
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": latency["p50_ms"],
+        "p95_ms": latency["p95_ms"]
+    }
+
+
+# ================================================================================================================================
+async def run(concurrency_levels: list[int], requests: int, query_delay_ms: float):
+    """
+    Run the concurrency benchmark for every concurrency level and print the results.
+
+    Args:
+        concurrency_levels (list[int]): Numbers of in-flight requests to benchmark.
+        requests (int): Requests issued per concurrency level and mode.
+        query_delay_ms (float): Server-side wait added to every request, Postgres only.
+    """
+    query_delay = query_delay_ms / 1000
+    sync_engine = create_benchmark_engine()
+    # The async pool holds a connection per in-flight request, so requests never wait on a checkout
+    async_engine = create_async_benchmark_engine(pool_size=max(concurrency_levels))
+    user_id, category_id, category_name = seed_quiz(sync_engine)
+    rows = []
+    try:
+        for concurrency in concurrency_levels:
+            blocking = await measure_throughput(
+                lambda: blocking_request(sync_engine, user_id, category_name, query_delay), concurrency, requests)
+            overlapped = await measure_throughput(
+                lambda: async_request(async_engine, user_id, category_name, query_delay), concurrency, requests)
+            rows.append([concurrency, blocking["requests_per_second"], blocking["p95_ms"],
+                         overlapped["requests_per_second"], overlapped["p95_ms"]])
+    finally:
+        drop_quiz(sync_engine, user_id, category_id)
+        await async_engine.dispose()
+
+    print_table(["in flight", "blocking req/s", "blocking p95",
+                 "async req/s", "async p95"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, nargs="+",
+                        default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--query-delay-ms", type=float, default=0)
+    arguments = parser.parse_args()
+    asyncio.run(run(arguments.concurrency, arguments.requests, arguments.query_delay_ms))
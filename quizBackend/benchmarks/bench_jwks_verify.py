@@ -0,0 +1,187 @@
+"""
+Benchmark access token verification with the public keys published by user-sphere.
+
+Serves a JWKS the way user-sphere does, points USER_JWKS_URL at it and verifies
+fresh tokens through verifyUser, reporting the tokens accepted and refused, the
+SQL statements and JWKS fetches they cost and their latency. Tokens signed with
+SECRET_KEY that only carry the email are verified as the baseline, then tokens
+naming an unknown key ID, then tokens of a key published after the first fetch.
+Fails with a non-zero exit code when a user-sphere token costs a query or the
+JWKS is fetched more often than JWKS_MIN_REFETCH allows. Run from the
+quizBackend directory against a disposable test database:
+
+    poetry run python -m benchmarks.bench_jwks_verify --tokens 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from jose import jwk, jwt
+
+# Private keys published by the JWKS server, by key ID, and the number of JWKS requests it answered
+published_keys: dict[str, bytes] = {}
+jwks_requests = [0]
+
+
+class JwksHandler(BaseHTTPRequestHandler):
+    """Answer every GET with the public keys of published_keys, as user-sphere's /.well-known/jwks.json does."""
+
+    def do_GET(self):
+        jwks_requests[0] += 1
+        body = json.dumps({"keys": [{**jwk.construct(private_key, "RS256").public_key().to_dict(), "kid": key_id, "use": "sig"}
+                                    for key_id, private_key in published_keys.items()]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# ================================================================================================================================
+def publish_key() -> str:
+    """
+    Generate an RSA key and publish its public key on the JWKS server.
+
+    Returns:
+        str: ID of the new key.
+    """
+    key_id = f"bench-{secrets.token_hex(4)}"
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    published_keys[key_id] = private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                                       serialization.NoEncryption())
+    return key_id
+
+
+# ================================================================================================================================
+def sign_tokens(count: int, claims: dict, key_id: str | None) -> list[str]:
+    """
+    Sign distinct access tokens, so no verification is answered by the principal cache.
+
+    Args:
+        count (int): Number of tokens.
+        claims (dict): Claims of every token.
+        key_id (str | None): Published key to sign with in RS256, an unpublished one when not in published_keys,
+            None to sign with SECRET_KEY in HS256 as quizBackend itself does.
+
+    Returns:
+        list[str]: The tokens.
+    """
+    from quizbackend.settings import ALGORITHM, SECRET_KEY
+
+    expire = datetime.now(timezone.utc) + timedelta(minutes=15)
+    if key_id is None:
+        return [jwt.encode({**claims, "exp": expire, "n": number}, SECRET_KEY, algorithm=ALGORITHM) for number in range(count)]
+    private_key = published_keys.get(key_id) or next(iter(published_keys.values()))
+    return [jwt.encode({**claims, "exp": expire, "n": number}, private_key, algorithm="RS256", headers={"kid": key_id})
+            for number in range(count)]
+
+
+# ================================================================================================================================
+async def verify_tokens(name: str, tokens: list[str], engine) -> list:
+    """
+    Verify tokens one after another through verifyUser and summarize what they cost.
+
+    Args:
+        name (str): Name of the token kind.
+        tokens (list[str]): Tokens to verify.
+        engine (AsyncEngine): Asyncio engine bound to the test database.
+
+    Returns:
+        list: Table row of the token kind.
+    """
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from quizbackend.controllers.user_controller import verifyUser
+    from quizbackend.db.query_counter import count_queries
+    from benchmarks.utils import summarize
+
+    durations = []
+    verified = refused = 0
+    fetches = jwks_requests[0]
+    with count_queries(engine.sync_engine) as statements:
+        for token in tokens:
+            started_at = time.perf_counter()
+            async with AsyncSession(engine) as session:
+                try:
+                    verified += await verifyUser(token, session) is True
+                except HTTPException:
+                    refused += 1
+            durations.append((time.perf_counter() - started_at) * 1000)
+    latency = summarize(durations)
+    return [name, len(tokens), verified, refused, len(statements), jwks_requests[0] - fetches, latency["p50_ms"], latency["p95_ms"]]
+
+
+# ================================================================================================================================
+async def run(count: int) -> bool:
+    """
+    Verify every kind of token and print the results.
+
+    Args:
+        count (int): Number of tokens of every kind.
+
+    Returns:
+        bool: Whether user-sphere tokens cost no query and the JWKS was fetched only when needed.
+    """
+    from sqlmodel import Session, delete
+    import quizbackend.controllers.auth_controller as auth
+    from quizbackend.models.user_model import User
+    from quizbackend.settings import JWKS_MIN_REFETCH
+    from benchmarks.utils import create_async_benchmark_engine, create_benchmark_engine, print_table
+
+    engine = create_benchmark_engine()
+    async_engine = create_async_benchmark_engine()
+    with Session(engine) as session:
+        user = User(user_name="bench-jwks", user_email="bench-jwks@bench.local", user_password=auth.passwordIntoHash("-"))
+        session.add(user)
+        session.commit()
+        claims = {"user_id": user.user_id, "user_name": user.user_name, "user_email": user.user_email}
+    try:
+        first_key = publish_key()
+        rows = [await verify_tokens("user-sphere, first key", sign_tokens(count, claims, first_key), async_engine),
+                await verify_tokens("HS256, email only", sign_tokens(count, {"user_email": claims["user_email"]}, None), async_engine),
+                await verify_tokens("unknown key ID", sign_tokens(count, claims, "bench-unpublished"), async_engine)]
+        # A key published after the last fetch is picked up by the first token naming it past JWKS_MIN_REFETCH
+        rotated_key = publish_key()
+        await asyncio.sleep(JWKS_MIN_REFETCH)
+        rows.append(await verify_tokens("user-sphere, rotated key", sign_tokens(count, claims, rotated_key), async_engine))
+    finally:
+        with Session(engine) as session:
+            session.execute(delete(User).where(User.user_email == "bench-jwks@bench.local"))
+            session.commit()
+        await async_engine.dispose()
+
+    print_table(["tokens", "sent", "verified", "refused (401)", "SQL statements", "JWKS fetches", "p50 ms", "p95 ms"], rows)
+    first, _, unknown, rotated = rows
+    return (first[2] == rotated[2] == count and unknown[3] == count
+            and first[4] == unknown[4] == rotated[4] == 0
+            and first[5] == rotated[5] == 1 and unknown[5] <= 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=500, help="tokens of every kind")
+    arguments = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), JwksHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    # quizbackend reads its settings when first imported, so it is only imported from here on
+    os.environ["USER_JWKS_URL"] = f"http://127.0.0.1:{server.server_port}/.well-known/jwks.json"
+    os.environ.setdefault("JWKS_MIN_REFETCH", "2")
+    try:
+        passed = asyncio.run(run(arguments.tokens))
+    finally:
+        server.shutdown()
+    if not passed:
+        print("A user-sphere token cost a query, or the JWKS was fetched more often than needed")
+        sys.exit(1)
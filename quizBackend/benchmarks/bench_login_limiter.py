@@ -0,0 +1,90 @@
+"""
+Benchmark the login limiter against bursts of bad-password logins.
+
+Sends each burst to /api/login in process and reports how many attempts got
+through to bcrypt, how many were refused with a 429, the latency of both and
+the password jobs the burst cost. Three bursts are measured: one client
+retrying one email, many clients trying one email, and one client trying many
+emails. Run from the quizBackend directory against a disposable test database:
+
+    poetry run python -m benchmarks.bench_login_limiter --attempts 200
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+import httpx
+
+from quizbackend.routes.adminRoute import app
+from quizcommon.login_limiter import get_login_limiter_metrics
+from quizcommon.password_pool import get_password_pool_metrics
+from benchmarks.utils import print_table, summarize
+
+# Burst name -> how the client address and the email of the attempt number are chosen
+BURSTS = {
+    "one client, one email": lambda number: ("203.0.113.1", "target@bench.local"),
+    "many clients, one email": lambda number: (f"198.51.100.{number % 250}", "target@bench.local"),
+    "one client, many emails": lambda number: ("203.0.113.2", f"stuffed-{number}@bench.local"),
+}
+
+
+# ================================================================================================================================
+async def send_burst(name: str, attempts: int, concurrency: int) -> list:
+    """
+    Send a burst of bad-password logins and summarize how the limiter answered.
+
+    Args:
+        name (str): Key of the burst in BURSTS.
+        attempts (int): Number of login attempts.
+        concurrency (int): Attempts in flight at once.
+
+    Returns:
+        list: Table row of the burst.
+    """
+    latencies = {400: [], 429: []}
+    statuses = Counter()
+    password_jobs = get_password_pool_metrics()["completed"]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def attempt(number: int):
+        address, email = BURSTS[name](number)
+        transport = httpx.ASGITransport(app=app, client=(address, 4000 + number % 1000))
+        async with semaphore, httpx.AsyncClient(transport=transport, base_url="http://quizbackend") as client:
+            started_at = time.perf_counter()
+            response = await client.post("/api/login", json={"user_email": email, "user_password": "wrong-password"})
+            latencies.setdefault(response.status_code, []).append((time.perf_counter() - started_at) * 1000)
+            statuses[response.status_code] += 1
+
+    await asyncio.gather(*(attempt(number) for number in range(attempts)))
+    refused = statuses[429]
+    return [name, attempts - refused, refused,
+            summarize(latencies[400])["p50_ms"] if latencies[400] else "-",
+            summarize(latencies[429])["p50_ms"] if latencies[429] else "-",
+            get_password_pool_metrics()["completed"] - password_jobs]
+
+
+# ================================================================================================================================
+async def run(attempts: int, concurrency: int):
+    """
+    Create the targeted user, send every burst and print the results.
+
+    Args:
+        attempts (int): Number of login attempts per burst.
+        concurrency (int): Attempts in flight at once.
+    """
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://quizbackend") as client:
+            await client.post("/api/signup", json={"user_name": "Target", "user_email": "target@bench.local",
+                                                   "user_password": "right-password"})
+        rows = [await send_burst(name, attempts, concurrency) for name in BURSTS]
+
+    print_table(["burst", "let through", "refused (429)", "let through p50", "refused p50", "bcrypt jobs"], rows)
+    print(get_login_limiter_metrics())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--attempts", type=int, default=200, help="login attempts per burst")
+    parser.add_argument("--concurrency", type=int, default=20, help="attempts in flight at once")
+    arguments = parser.parse_args()
+    asyncio.run(run(arguments.attempts, arguments.concurrency))
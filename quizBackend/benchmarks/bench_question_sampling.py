@@ -0,0 +1,115 @@
+"""
+Benchmark question sampling for get_quiz.
+
+Compares the previous ``ORDER BY random() LIMIT n`` query with the cached
+question pool (draw ids in O(n), fetch them by primary key) for categories of
+different sizes. Run from the quizBackend directory against a disposable test
+database:
+
+    poetry run python -m benchmarks.bench_question_sampling --sizes 1000 100000 1000000
+"""
+import argparse
+from sqlalchemy import Engine, delete, func, insert
+from sqlmodel import Session, select
+
+from quizbackend.models.quiz_model import Category, Question
+from quizbackend.utils.question_sampler import invalidate_category_pool, sample_question_ids
+from benchmarks.utils import create_benchmark_engine, print_table, summarize, time_call
+
+SEED_CHUNK_SIZE = 10_000
+
+
+# ================================================================================================================================
+def seed_category(engine: Engine, size: int) -> int:
+    """
+    Create a benchmark category holding the given number of questions.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+        size (int): Number of questions to insert.
+
+    Returns:
+        int: ID of the created category.
+    """
+    with Session(engine) as session:
+        category = Category(category_name=f"bench-sampling-{size}",
+                            category_description="Question sampling benchmark")
+        session.add(category)
+        session.commit()
+        session.refresh(category)
+        category_id = category.category_id
+        # Insert questions in chunks through executemany instead of one ORM object per row
+        for start in range(0, size, SEED_CHUNK_SIZE):
+            rows = [{"question": f"Benchmark question {number}", "category_id": category_id}
+                    for number in range(start, min(start + SEED_CHUNK_SIZE, size))]
+            session.execute(insert(Question), rows)
+            session.commit()
+    return category_id
+
+
+# ================================================================================================================================
+def drop_category(engine: Engine, category_id: int):
+    """
+    Delete a benchmark category together with its questions.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+        category_id (int): ID of the category.
+    """
+    with Session(engine) as session:
+        session.execute(delete(Question).where(
+            Question.category_id == category_id))
+        session.execute(delete(Category).where(
+            Category.category_id == category_id))
+        session.commit()
+    invalidate_category_pool(category_id)
+
+
+# ================================================================================================================================
+def run(sizes: list[int], count: int, repeat: int):
+    """
+    Run the sampling benchmark for every category size and print the results.
+
+    Args:
+        sizes (list[int]): Category sizes to benchmark.
+        count (int): Number of questions drawn per quiz.
+        repeat (int): Number of draws measured per strategy.
+    """
+    engine = create_benchmark_engine()
+    rows = []
+    for size in sizes:
+        category_id = seed_category(engine, size)
+        try:
+            with Session(engine) as session:
+                def order_by_random():
+                    session.exec(select(Question).where(Question.category_id == category_id)
+                                 .order_by(func.random()).limit(count)).all()
+
+                def pooled_draw():
+                    question_ids = sample_question_ids(
+                        category_id, count, session)
+                    session.exec(select(Question).where(
+                        Question.question_id.in_(question_ids))).all()
+
+                legacy = summarize(time_call(order_by_random, repeat))
+                # The first draw loads the pool, later draws are served from memory
+                invalidate_category_pool(category_id)
+                cold = time_call(pooled_draw, 1)[0]
+                pooled = summarize(time_call(pooled_draw, repeat))
+            rows.append([size, legacy["p50_ms"], legacy["p95_ms"], round(cold, 3),
+                         pooled["p50_ms"], pooled["p95_ms"]])
+        finally:
+            drop_category(engine, category_id)
+
+    print_table(["questions", "random p50", "random p95", "pool load",
+                 "pool p50", "pool p95"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    arguments = parser.parse_args()
+    run(arguments.sizes, arguments.count, arguments.repeat)
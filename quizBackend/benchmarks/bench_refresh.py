@@ -0,0 +1,116 @@
+"""
+Benchmark tokenService as the number of stored refresh tokens grows.
+
+Every refresh rotates the presented token and resolves its user in one
+statement on the unique digest index, so its latency and statement count
+should not depend on the size of the token table. Run from the quizBackend
+directory against a disposable test database:
+
+    poetry run python -m benchmarks.bench_refresh --sizes 0 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import secrets
+from datetime import datetime, timezone
+from sqlalchemy import Engine, delete, insert
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import quizbackend.controllers.auth_controller as auth
+from quizbackend.db.query_counter import count_queries
+from quizbackend.controllers.user_controller import logIn_func
+from quizbackend.models.user_model import Token, User
+from quizbackend.settings import REFRESH_TOKEN_EXPIRE_TIME
+from benchmarks.utils import async_time_call, create_async_benchmark_engine, create_benchmark_engine, print_table, summarize
+
+SEED_CHUNK_SIZE = 10_000
+SEED_PASSWORD = "bench-refresh-password"
+
+
+# ================================================================================================================================
+def seed_tokens(engine: Engine, size: int):
+    """
+    Create the given number of users holding a refresh token, plus the user the benchmark logs in as.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+        size (int): Number of users with a token to create.
+    """
+    expires_at = datetime.now(timezone.utc) + REFRESH_TOKEN_EXPIRE_TIME
+    with Session(engine) as session:
+        session.add(User(user_name="bench-refresh", user_email="bench-refresh@bench.local",
+                         user_password=auth.passwordIntoHash(SEED_PASSWORD)))
+        for chunk_start in range(0, size, SEED_CHUNK_SIZE):
+            numbers = range(chunk_start, min(size, chunk_start + SEED_CHUNK_SIZE))
+            user_ids = session.execute(insert(User).returning(User.user_id), [
+                {"user_name": f"bench-refresh-{number}", "user_email": f"bench-refresh-{number}@bench.local",
+                 "user_password": "-"} for number in numbers]).scalars().all()
+            session.execute(insert(Token), [{"user_id": user_id, "expires_at": expires_at,
+                                             "refresh_token_digest": auth.digestRefreshToken(secrets.token_urlsafe())}
+                                            for user_id in user_ids])
+        session.commit()
+
+    # Vacuum the fresh rows now, so autovacuum does not run during the measurement
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql('VACUUM ANALYZE token, "user"')
+        else:
+            connection.exec_driver_sql("ANALYZE")
+
+
+# ================================================================================================================================
+def drop_tokens(engine: Engine):
+    """
+    Delete the users created by seed_tokens, with their tokens.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+    """
+    with Session(engine) as session:
+        user_ids = select(User.user_id).where(User.user_email.startswith("bench-refresh"))
+        session.execute(delete(Token).where(Token.user_id.in_(user_ids)))
+        session.execute(delete(User).where(User.user_email.startswith("bench-refresh")))
+        session.commit()
+
+
+# ================================================================================================================================
+async def run(sizes: list[int], repeat: int):
+    """
+    Run the refresh benchmark for every token count and print the results.
+
+    Args:
+        sizes (list[int]): Token counts to benchmark.
+        repeat (int): Number of refreshes measured per token count.
+    """
+    engine = create_benchmark_engine()
+    async_engine = create_async_benchmark_engine()
+    rows = []
+    for size in sizes:
+        seed_tokens(engine, size)
+        try:
+            async with AsyncSession(async_engine) as session:
+                tokens = await logIn_func("bench-refresh@bench.local", SEED_PASSWORD, session)
+
+            async def refresh():
+                # Every refresh rotates the token, the next one presents the new token
+                async with AsyncSession(async_engine) as session:
+                    rotated = await auth.tokenService(tokens["refresh_token"], session)
+                tokens["refresh_token"] = rotated["refresh_token"]
+
+            with count_queries(async_engine.sync_engine) as statements:
+                await refresh()
+            latency = summarize(await async_time_call(refresh, repeat))
+            rows.append([size, latency["p50_ms"], latency["p95_ms"], len(statements)])
+        finally:
+            drop_tokens(engine)
+    await async_engine.dispose()
+
+    print_table(["tokens", "refresh p50", "refresh p95", "refresh queries"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=200)
+    arguments = parser.parse_args()
+    asyncio.run(run(arguments.sizes, arguments.repeat))
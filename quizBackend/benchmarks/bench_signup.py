@@ -0,0 +1,126 @@
+"""
+Benchmark signup_func as the number of users grows.
+
+Compares the previous uniqueness check (bcrypt verification of the new password
+against every stored hash) with the full signup on the normalized email lookup,
+which should not depend on the number of users. The previous check takes about
+a quarter of a second per existing user, so it is only measured up to
+--legacy-limit users. Run from the quizBackend directory against a disposable
+test database:
+
+    poetry run python -m benchmarks.bench_signup --sizes 0 1000 100000
+"""
+import argparse
+import asyncio
+import itertools
+from sqlalchemy import Engine, delete, insert
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import quizbackend.controllers.auth_controller as auth
+from quizbackend.db.query_counter import count_queries
+from quizbackend.controllers.user_controller import signup_func
+from quizbackend.models.user_model import Token, User
+from quizbackend.utils.apierrors import ConflictsException
+from benchmarks.utils import (
+    async_time_call, create_async_benchmark_engine, create_benchmark_engine, print_table, summarize, time_call)
+
+SEED_CHUNK_SIZE = 10_000
+SEED_PASSWORD = "bench-signup-password"
+
+
+# ================================================================================================================================
+def legacy_signup_check(user_email: str, user_password: str, session: Session):
+    """Uniqueness check of the previous signup_func, kept as the benchmark baseline."""
+    users = session.exec(select(User))
+    for user in users:
+        password_exist = auth.verifyPassword(user_password, user.user_password)
+        if user.user_email == user_email and password_exist:
+            raise ConflictsException("email and password")
+        elif user.user_email == user_email:
+            raise ConflictsException("email")
+        elif password_exist:
+            raise ConflictsException("password")
+
+
+# ================================================================================================================================
+def seed_users(engine: Engine, size: int):
+    """
+    Create the given number of users sharing one password hash.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+        size (int): Number of users to create.
+    """
+    password_hash = auth.passwordIntoHash(SEED_PASSWORD)
+    with Session(engine) as session:
+        for chunk_start in range(0, size, SEED_CHUNK_SIZE):
+            session.execute(insert(User), [{"user_name": f"bench-signup-{number}",
+                                            "user_email": f"bench-signup-{number}@bench.local",
+                                            "user_password": password_hash}
+                                           for number in range(chunk_start, min(size, chunk_start + SEED_CHUNK_SIZE))])
+        session.commit()
+
+
+# ================================================================================================================================
+def drop_users(engine: Engine):
+    """
+    Delete the users created by seed_users and by the measured signups, with their tokens.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+    """
+    with Session(engine) as session:
+        user_ids = select(User.user_id).where(User.user_email.startswith("bench-signup-"))
+        session.execute(delete(Token).where(Token.user_id.in_(user_ids)))
+        session.execute(delete(User).where(User.user_email.startswith("bench-signup-")))
+        session.commit()
+
+
+# ================================================================================================================================
+async def run(sizes: list[int], repeat: int, legacy_limit: int):
+    """
+    Run the signup benchmark for every user count and print the results.
+
+    Args:
+        sizes (list[int]): User counts to benchmark.
+        repeat (int): Number of signups measured per user count.
+        legacy_limit (int): Largest user count the previous uniqueness check is measured at.
+    """
+    engine = create_benchmark_engine()
+    async_engine = create_async_benchmark_engine()
+    signups = itertools.count()
+    rows = []
+    for size in sizes:
+        seed_users(engine, size)
+        try:
+            legacy_p50 = "-"
+            if size <= legacy_limit:
+                with Session(engine) as session:
+                    legacy_p50 = summarize(time_call(lambda: legacy_signup_check(
+                        "bench-signup-new@bench.local", "another-password", session), 1))["p50_ms"]
+
+            async def signup():
+                number = next(signups)
+                async with AsyncSession(async_engine) as session:
+                    await signup_func(f"bench-signup-new-{number}", f" Bench-Signup-New-{number}@Bench.Local ",
+                                      SEED_PASSWORD, session)
+
+            with count_queries(async_engine.sync_engine) as statements:
+                await signup()
+            latency = summarize(await async_time_call(signup, repeat))
+            rows.append([size, legacy_p50, latency["p50_ms"], latency["p95_ms"], len(statements)])
+        finally:
+            drop_users(engine)
+    await async_engine.dispose()
+
+    print_table(["users", "legacy check", "signup p50", "signup p95", "signup queries"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 1000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--legacy-limit", type=int, default=50)
+    arguments = parser.parse_args()
+    asyncio.run(run(arguments.sizes, arguments.repeat, arguments.legacy_limit))
@@ -0,0 +1,173 @@
+"""
+Benchmark one run of the expired token reaper and check it keeps the live tokens.
+
+Seeds users holding refresh tokens and admin tokens, a given share of them
+expired, runs reap_expired_tokens once and reports the rows removed, the run
+time and the refresh latency measured while the run was in progress. Runs against
+Postgres or a file SQLite database, not the in-memory one: its shared cache refuses
+a batch while a refresh holds the token table, which is why the services never start
+the reaper on it. Run from the quizBackend directory against a disposable test
+database, such as TEST_DB_CONNECTION_STR=sqlite:////tmp/bench_reaper.db:
+
+    poetry run python -m benchmarks.bench_token_reaper --size 200000 --expired 0.8
+"""
+import argparse
+import asyncio
+import secrets
+import sys
+import time
+from datetime import datetime, timezone
+from sqlalchemy import Engine, delete, func, insert
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import quizbackend.controllers.auth_controller as auth
+from quizbackend.controllers.user_controller import logIn_func
+from quizcommon.token_reaper import reap_expired_tokens
+from quizbackend.models.admin_model import AdminToken
+from quizbackend.models.user_model import Token, User
+from quizbackend.routes.userRoute import REAPED_TABLES
+from quizbackend.settings import ADMIN_TOKEN_EXPIRE_TIME, REFRESH_TOKEN_EXPIRE_TIME
+from quizcommon.backend import MEMORY_DATABASE_URL
+from quizcommon.settings import TOKEN_REAPER_BATCH_SIZE
+from benchmarks.bench_refresh import SEED_CHUNK_SIZE
+from benchmarks.utils import (benchmark_database_url, create_async_benchmark_engine, create_benchmark_engine, print_table,
+                              summarize)
+
+SEED_PASSWORD = "bench-reaper-password"
+
+
+# ================================================================================================================================
+def seed_tokens(engine: Engine, size: int, expired_share: float):
+    """
+    Create users holding a refresh token and as many admin tokens, the given share of both expired.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+        size (int): Number of users and admin tokens to create.
+        expired_share (float): Share of the tokens already expired.
+    """
+    now = datetime.now(timezone.utc)
+    expired_count = int(size * expired_share)
+    with Session(engine) as session:
+        session.add(User(user_name="bench-reaper", user_email="bench-reaper@bench.local",
+                         user_password=auth.passwordIntoHash(SEED_PASSWORD)))
+        for chunk_start in range(0, size, SEED_CHUNK_SIZE):
+            numbers = range(chunk_start, min(size, chunk_start + SEED_CHUNK_SIZE))
+            expiries = [now - REFRESH_TOKEN_EXPIRE_TIME if number < expired_count else now + REFRESH_TOKEN_EXPIRE_TIME
+                        for number in numbers]
+            user_ids = session.execute(insert(User).returning(User.user_id), [
+                {"user_name": f"bench-reaper-{number}", "user_email": f"bench-reaper-{number}@bench.local",
+                 "user_password": "-"} for number in numbers]).scalars().all()
+            session.execute(insert(Token), [{"user_id": user_id, "expires_at": expires_at,
+                                             "refresh_token_digest": auth.digestRefreshToken(secrets.token_urlsafe())}
+                                            for user_id, expires_at in zip(user_ids, expiries)])
+            session.execute(insert(AdminToken), [
+                {"expires_at": expires_at - REFRESH_TOKEN_EXPIRE_TIME + ADMIN_TOKEN_EXPIRE_TIME
+                 if expires_at > now else expires_at} for expires_at in expiries])
+        session.commit()
+
+    # Vacuum the fresh rows now, so autovacuum does not run during the measurement
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql('VACUUM ANALYZE token, admintoken, "user"')
+        else:
+            connection.exec_driver_sql("ANALYZE")
+
+
+# ================================================================================================================================
+def count_live_tokens(engine: Engine) -> tuple[int, int]:
+    """
+    Count the refresh and admin tokens that have not expired.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+
+    Returns:
+        tuple[int, int]: Live refresh tokens and live admin tokens.
+    """
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        return (session.exec(select(func.count()).select_from(Token).where(Token.expires_at > now)).one(),
+                session.exec(select(func.count()).select_from(AdminToken).where(AdminToken.expires_at > now)).one())
+
+
+# ================================================================================================================================
+def drop_tokens(engine: Engine):
+    """
+    Delete the users created by seed_tokens with their tokens, and every admin token.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+    """
+    with Session(engine) as session:
+        user_ids = select(User.user_id).where(User.user_email.startswith("bench-reaper"))
+        session.execute(delete(Token).where(Token.user_id.in_(user_ids)))
+        session.execute(delete(User).where(User.user_email.startswith("bench-reaper")))
+        session.execute(delete(AdminToken))
+        session.commit()
+
+
+# ================================================================================================================================
+async def run(size: int, expired_share: float) -> bool:
+    """
+    Run the reaper once over the seeded tokens while refreshing a token, and print the results.
+
+    Args:
+        size (int): Number of users and admin tokens to create.
+        expired_share (float): Share of the tokens already expired.
+
+    Returns:
+        bool: Whether every expired token was removed and every live one kept.
+    """
+    engine = create_benchmark_engine()
+    async_engine = create_async_benchmark_engine()
+    drop_tokens(engine)
+    seed_tokens(engine, size, expired_share)
+    try:
+        live_before = count_live_tokens(engine)
+        async with AsyncSession(async_engine) as session:
+            tokens = await logIn_func("bench-reaper@bench.local", SEED_PASSWORD, session)
+
+        async def refresh_during(reaping: asyncio.Task) -> list[float]:
+            # Requests keep refreshing while the reaper deletes, their latency shows what the batches cost them
+            durations = []
+            while not reaping.done():
+                started_at = time.perf_counter()
+                async with AsyncSession(async_engine) as session:
+                    rotated = await auth.tokenService(tokens["refresh_token"], session)
+                tokens["refresh_token"] = rotated["refresh_token"]
+                durations.append((time.perf_counter() - started_at) * 1000)
+            return durations
+
+        started_at = time.perf_counter()
+        # The reaper runs in a worker thread on the sync engine, as it does in the service
+        reaping = asyncio.create_task(asyncio.to_thread(reap_expired_tokens, engine, REAPED_TABLES))
+        durations = await refresh_during(reaping)
+        removed = reaping.result()
+        run_ms = round((time.perf_counter() - started_at) * 1000, 3)
+        live_after = count_live_tokens(engine)
+    finally:
+        drop_tokens(engine)
+        await async_engine.dispose()
+
+    latency = summarize(durations) if durations else {"p50_ms": 0.0, "p95_ms": 0.0}
+    print_table(["tokens", "batch size", "token removed", "admintoken removed", "run ms", "refreshes", "refresh p50", "refresh p95"],
+                [[size, TOKEN_REAPER_BATCH_SIZE, removed["token"], removed["admintoken"], run_ms, len(durations),
+                  latency["p50_ms"], latency["p95_ms"]]])
+    expired_count = int(size * expired_share)
+    # The benchmark login adds one live refresh token
+    return (removed == {"token": expired_count, "admintoken": expired_count}
+            and live_after == (live_before[0] + 1, live_before[1]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--expired", type=float, default=0.8, help="share of the seeded tokens already expired")
+    arguments = parser.parse_args()
+    if benchmark_database_url() == MEMORY_DATABASE_URL:
+        raise SystemExit("The in-memory database locks whole tables, run against Postgres or a file SQLite database")
+    if not asyncio.run(run(arguments.size, arguments.expired)):
+        print("The reaper removed a live token or left an expired one")
+        sys.exit(1)
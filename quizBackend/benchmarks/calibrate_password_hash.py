@@ -0,0 +1,102 @@
+"""
+Pick the bcrypt cost fitting a login latency budget on this host.
+
+Every extra round doubles the time of a hash, so the tool measures each cost
+from --min-rounds up, stopping at the first one past the budget, and proposes
+the highest cost whose p95 stays within it. Throughput is measured with
+PASSWORD_WORKERS threads hashing at once, as the password worker pool does,
+so the table shows how many signups and logins per second every cost leaves
+the host. Run it on the machine serving the API, from the quizBackend directory,
+and copy the proposed BCRYPT_ROUNDS into the settings of every service:
+
+    poetry run python -m benchmarks.calibrate_password_hash --budget-ms 250
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from passlib.hash import bcrypt
+
+from quizbackend.settings import BCRYPT_ROUNDS
+from quizcommon.settings import PASSWORD_WORKERS
+from benchmarks.utils import print_table, summarize, time_call
+
+CALIBRATION_PASSWORD = "calibration-password"
+
+# Below this cost a hash no longer slows down guessing enough to be worth storing
+SAFE_MIN_ROUNDS = 10
+
+
+# ================================================================================================================================
+def measure_throughput(rounds: int, workers: int, hashes: int) -> float:
+    """
+    Hash with several threads at once and measure how many hashes the host completes per second.
+
+    Args:
+        rounds (int): bcrypt cost (log2 rounds).
+        workers (int): Number of threads hashing at once.
+        hashes (int): Number of hashes per thread.
+
+    Returns:
+        float: Hashes completed per second.
+    """
+    handler = bcrypt.using(rounds=rounds)
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(handler.hash, [CALIBRATION_PASSWORD] * (workers * hashes)))
+    return workers * hashes / (time.perf_counter() - started_at)
+
+
+# ================================================================================================================================
+def calibrate(budget_ms: float, min_rounds: int, max_rounds: int, repeat: int, workers: int) -> int | None:
+    """
+    Measure every cost until one exceeds the budget, print the results and return the cost to use.
+
+    Args:
+        budget_ms (float): Longest acceptable p95 of one hash in milliseconds.
+        min_rounds (int): First cost measured.
+        max_rounds (int): Last cost measured.
+        repeat (int): Number of hashes timed per cost.
+        workers (int): Number of threads hashing at once in the throughput measurement.
+
+    Returns:
+        int | None: Highest cost whose p95 fits the budget, None if even min_rounds exceeds it.
+    """
+    chosen = None
+    rows = []
+    for rounds in range(min_rounds, max_rounds + 1):
+        handler = bcrypt.using(rounds=rounds)
+        # The first hash of a cost is not timed, it pays for loading the backend
+        handler.hash(CALIBRATION_PASSWORD)
+        latency = summarize(time_call(lambda: handler.hash(CALIBRATION_PASSWORD), repeat))
+        throughput = measure_throughput(rounds, workers, max(1, repeat // workers))
+        fits = latency["p95_ms"] <= budget_ms
+        rows.append([rounds, latency["p50_ms"], latency["p95_ms"], round(throughput, 2), "yes" if fits else "no"])
+        if not fits:
+            break
+        chosen = rounds
+
+    print_table(["rounds", "hash p50", "hash p95", f"hashes/s ({workers} workers)", f"within {budget_ms:g} ms"], rows)
+    return chosen
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=250, help="longest acceptable p95 of one hash")
+    parser.add_argument("--min-rounds", type=int, default=SAFE_MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=6, help="hashes timed per cost")
+    parser.add_argument("--workers", type=int, default=PASSWORD_WORKERS, help="threads hashing at once, defaults to PASSWORD_WORKERS")
+    arguments = parser.parse_args()
+
+    print(f"Calibrating on {os.cpu_count()} CPUs, BCRYPT_ROUNDS is currently {BCRYPT_ROUNDS}")
+    chosen = calibrate(arguments.budget_ms, arguments.min_rounds, arguments.max_rounds, arguments.repeat, arguments.workers)
+    if chosen is None:
+        print(f"No cost from {arguments.min_rounds} rounds fits {arguments.budget_ms:g} ms, raise the budget or add CPUs")
+        sys.exit(1)
+    if chosen < SAFE_MIN_ROUNDS:
+        print(f"Warning: {chosen} rounds is below the recommended minimum of {SAFE_MIN_ROUNDS}")
+    print(f"BCRYPT_ROUNDS = {chosen}")
+    if chosen != BCRYPT_ROUNDS:
+        print("Stored hashes of the previous cost are rehashed as their users log in")
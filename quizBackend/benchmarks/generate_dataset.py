@@ -0,0 +1,312 @@
+"""
+Bulk-load a synthetic dataset into the test database for scale testing.
+
+Generates users, categories, questions, choices, quiz attempts and refresh
+tokens with controllable distributions, and loads them with COPY on Postgres
+and batched executemany on other backends. Rows get explicit IDs above the
+existing ones, so the generator can be run several times on the same database.
+Run from the quizBackend directory against a disposable test database:
+
+    poetry run python -m benchmarks.generate_dataset --users 1000000 --questions 1000000 --categories 500
+"""
+import argparse
+import bisect
+import itertools
+import random
+import time
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+from sqlalchemy import Connection, Engine, Table, func, insert, select, text, update
+
+import quizbackend.controllers.auth_controller as auth
+from quizbackend.controllers.quiz_controller import MARKS_PER_QUESTION, RANK_MARK_BOUNDS, TOP_RANK
+from quizbackend.controllers.summary_controller import QUIZ_QUESTION_COUNT
+from quizbackend.models.quiz_model import (
+    Category, CategoryMarks, CategoryQuizDetails, CategorySummary, Choice, Question)
+from quizbackend.models.user_model import Token, User
+from quizbackend.settings import REFRESH_TOKEN_EXPIRE_TIME
+from benchmarks.utils import create_benchmark_engine
+
+CHOICES_PER_QUESTION = 4
+QUIZ_MARKS = QUIZ_QUESTION_COUNT * MARKS_PER_QUESTION
+# Rows sent per executemany batch on backends without COPY
+BATCH_SIZE = 10_000
+
+
+# ================================================================================================================================
+def category_weights(categories: int, skew: float) -> list[float]:
+    """
+    Weight the categories with a Zipf distribution, so a few categories hold most questions and attempts.
+
+    Args:
+        categories (int): Number of categories.
+        skew (float): Zipf exponent, 0 for a uniform distribution.
+
+    Returns:
+        list[float]: Weight of every category, summing to 1.
+    """
+    weights = [1 / (rank + 1) ** skew for rank in range(categories)]
+    total = sum(weights)
+    return [weight / total for weight in weights]
+
+
+# ================================================================================================================================
+def rank_name(obtaining_marks: int) -> str:
+    """
+    Rank obtained marks as rank_for_marks does in the database.
+
+    Args:
+        obtaining_marks (int): Marks obtained in a quiz.
+
+    Returns:
+        str: Rank of the marks.
+    """
+    return next((rank for bound, rank in RANK_MARK_BOUNDS if obtaining_marks < bound), TOP_RANK)
+
+
+# ================================================================================================================================
+def split_questions(questions: int, weights: list[float]) -> list[int]:
+    """
+    Split the questions between the categories: the quiz minimum each, and the rest by weight.
+
+    The shares of the rest are rounded down and the questions left over go one each to the first
+    categories, the most popular ones, so the counts add up to the requested number of questions.
+
+    Args:
+        questions (int): Number of questions over all categories.
+        weights (list[float]): Weight of every category, summing to 1.
+
+    Returns:
+        list[int]: Number of questions of every category.
+    """
+    spare_questions = max(0, questions - len(weights) * QUIZ_QUESTION_COUNT)
+    shares = [int(spare_questions * weight) for weight in weights]
+    left_over = spare_questions - sum(shares)
+    return [QUIZ_QUESTION_COUNT + share + (index < left_over) for index, share in enumerate(shares)]
+
+
+# ================================================================================================================================
+def next_id(connection: Connection, column) -> int:
+    """
+    Get the first ID above every existing row of a table.
+
+    Args:
+        connection (Connection): Connection to the test database.
+        column: Primary key column of the table.
+
+    Returns:
+        int: The first free ID.
+    """
+    return (connection.execute(select(func.max(column))).scalar() or 0) + 1
+
+
+# ================================================================================================================================
+def load_rows(connection: Connection, table: Table, columns: list[str], rows: Iterable[tuple]) -> int:
+    """
+    Load rows into a table, streaming them through COPY on Postgres and executemany batches elsewhere.
+
+    Args:
+        connection (Connection): Connection to the test database.
+        table (Table): Table to load.
+        columns (list[str]): Column of every value of a row.
+        rows (Iterable[tuple]): Rows to load, generated lazily.
+
+    Returns:
+        int: Number of loaded rows.
+    """
+    start = time.perf_counter()
+    count = 0
+    if connection.dialect.name == "postgresql":
+        # The psycopg connection behind the SQLAlchemy one, in the same transaction
+        cursor = connection.connection.driver_connection.cursor()
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        with cursor.copy(f'COPY "{table.name}" ({column_list}) FROM STDIN') as copy:
+            for row in rows:
+                copy.write_row(row)
+                count += 1
+    else:
+        statement = insert(table)
+        for batch in itertools.batched(rows, BATCH_SIZE):
+            connection.execute(statement, [dict(zip(columns, row)) for row in batch])
+            count += len(batch)
+    elapsed = time.perf_counter() - start
+    print(f"{table.name}: {count} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+    return count
+
+
+# ================================================================================================================================
+def reset_sequences(connection: Connection, tables: list[tuple[Table, str]]):
+    """
+    Move the ID sequences of Postgres past the explicitly inserted IDs.
+
+    Args:
+        connection (Connection): Connection to the test database.
+        tables (list[tuple[Table, str]]): Tables and the name of their serial primary key.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    for table, column in tables:
+        connection.execute(text(f'SELECT setval(pg_get_serial_sequence(:table, :column), '
+                                f'(SELECT COALESCE(MAX("{column}"), 1) FROM "{table.name}"))'),
+                           {"table": f'"{table.name}"', "column": column})
+
+
+# ================================================================================================================================
+def generate_dataset(engine: Engine, users: int, categories: int, questions: int, attempts_per_user: float,
+                     completion_rate: float, category_skew: float, token_rate: float, seed: int) -> dict[str, int]:
+    """
+    Generate the synthetic dataset and load it in a single transaction.
+
+    Every category gets at least enough questions for a quiz, the rest of the questions and the quiz
+    attempts follow the category skew. Users attempt an exponentially distributed number of categories,
+    and finish each attempt with the completion rate. Every user shares one password hash of the
+    configured bcrypt cost, since hashing millions of passwords would take days. The total points of the
+    users are summed from their finished quizzes once everything is loaded.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+        users (int): Number of users.
+        categories (int): Number of categories.
+        questions (int): Number of questions over all categories.
+        attempts_per_user (float): Mean number of categories attempted by a user.
+        completion_rate (float): Fraction of attempts that are finished.
+        category_skew (float): Zipf exponent of the category popularity, 0 for uniform.
+        token_rate (float): Fraction of users holding a refresh token.
+        seed (int): Seed of the random generator, the same seed generates the same dataset.
+
+    Returns:
+        dict[str, int]: Number of rows loaded into every table.
+    """
+    rng = random.Random(seed)
+    weights = category_weights(categories, category_skew)
+    cumulative_weights = list(itertools.accumulate(weights))
+    password_hash = auth.passwordIntoHash("synthetic-password")
+    loaded = {}
+
+    with engine.begin() as connection:
+        first_user_id = next_id(connection, User.user_id)
+        first_category_id = next_id(connection, Category.category_id)
+        first_question_id = next_id(connection, Question.question_id)
+        first_choice_id = next_id(connection, Choice.choice_id)
+        first_details_id = next_id(connection, CategoryQuizDetails.id)
+        first_marks_id = next_id(connection, CategoryMarks.id)
+        first_token_id = next_id(connection, Token.id)
+        category_ids = range(first_category_id, first_category_id + categories)
+
+        question_counts = split_questions(questions, weights)
+
+        def category_rows() -> Iterator[tuple]:
+            for category_id in category_ids:
+                yield category_id, f"synthetic-{category_id}", "Synthetic scale test category"
+
+        def question_rows() -> Iterator[tuple]:
+            question_id = first_question_id
+            for category_id, count in zip(category_ids, question_counts):
+                for _ in range(count):
+                    yield question_id, f"Synthetic question {question_id}", category_id
+                    question_id += 1
+
+        def choice_rows() -> Iterator[tuple]:
+            choice_id = first_choice_id
+            for question_id in range(first_question_id, first_question_id + sum(question_counts)):
+                correct_choice = rng.randrange(CHOICES_PER_QUESTION)
+                for index in range(CHOICES_PER_QUESTION):
+                    yield choice_id, f"Choice {index}", index == correct_choice, question_id
+                    choice_id += 1
+
+        def attempt_rows() -> Iterator[tuple]:
+            details_id = first_details_id
+            for user_id in range(first_user_id, first_user_id + users):
+                # Draws with the category skew, repeated categories collapse into one attempt
+                draws = min(categories, int(rng.expovariate(1 / attempts_per_user) + 0.5)) if attempts_per_user else 0
+                attempted = {category_ids[min(categories - 1, bisect.bisect(cumulative_weights, rng.random()))]
+                             for _ in range(draws)}
+                for category_id in sorted(attempted):
+                    if rng.random() < completion_rate:
+                        obtaining_marks = MARKS_PER_QUESTION * rng.randint(0, QUIZ_QUESTION_COUNT)
+                        yield (details_id, user_id, category_id, obtaining_marks,
+                               obtaining_marks * 100 // QUIZ_MARKS, rank_name(obtaining_marks), 0, True)
+                    else:
+                        remaining_questions = rng.randint(1, QUIZ_QUESTION_COUNT)
+                        obtaining_marks = MARKS_PER_QUESTION * rng.randint(0, QUIZ_QUESTION_COUNT - remaining_questions)
+                        yield (details_id, user_id, category_id, obtaining_marks,
+                               obtaining_marks * 100 // QUIZ_MARKS, None, remaining_questions, False)
+                    details_id += 1
+
+        def user_rows() -> Iterator[tuple]:
+            for user_id in range(first_user_id, first_user_id + users):
+                yield (user_id, f"Synthetic user {user_id}", f"synthetic-{user_id}@synthetic.local",
+                       password_hash, 0)
+
+        def token_rows() -> Iterator[tuple]:
+            token_id = first_token_id
+            issued_before = datetime.now(timezone.utc)
+            for user_id in range(first_user_id, first_user_id + users):
+                if rng.random() < token_rate:
+                    # Random bytes look like a SHA-256 digest to the index, tokens were issued over the last lifetime
+                    yield (token_id, user_id, rng.randbytes(32).hex(),
+                           issued_before + REFRESH_TOKEN_EXPIRE_TIME * (1 - rng.random()))
+                    token_id += 1
+
+        loaded["category"] = load_rows(connection, Category.__table__,
+                                       ["category_id", "category_name", "category_description"], category_rows())
+        loaded["categorymarks"] = load_rows(connection, CategoryMarks.__table__, ["id", "category_id", "marks"],
+                                            ((first_marks_id + index, category_id, QUIZ_MARKS)
+                                             for index, category_id in enumerate(category_ids)))
+        loaded["categorysummary"] = load_rows(connection, CategorySummary.__table__,
+                                              ["category_id", "question_count", "marks", "is_available"],
+                                              ((category_id, count, QUIZ_MARKS, count >= QUIZ_QUESTION_COUNT)
+                                               for category_id, count in zip(category_ids, question_counts)))
+        loaded["question"] = load_rows(connection, Question.__table__, ["question_id", "question", "category_id"],
+                                       question_rows())
+        loaded["choice"] = load_rows(connection, Choice.__table__,
+                                     ["choice_id", "choice", "choice_status", "question_id"], choice_rows())
+        loaded["user"] = load_rows(connection, User.__table__,
+                                   ["user_id", "user_name", "user_email", "user_password", "total_points"], user_rows())
+        loaded["categoryquizdetails"] = load_rows(connection, CategoryQuizDetails.__table__,
+                                                  ["id", "user_id", "category_id", "obtaining_marks", "percentage",
+                                                   "rank", "remaining_questions", "is_finished"], attempt_rows())
+        # Users are loaded with no points, then get the sum of their finished quizzes
+        finished_points = (select(CategoryQuizDetails.user_id,
+                                  func.sum(CategoryQuizDetails.obtaining_marks).label("points"))
+                           .where(CategoryQuizDetails.user_id >= first_user_id)
+                           .where(CategoryQuizDetails.is_finished == True)
+                           .group_by(CategoryQuizDetails.user_id).subquery())
+        connection.execute(update(User).where(User.user_id == finished_points.c.user_id)
+                           .values(total_points=finished_points.c.points))
+        loaded["token"] = load_rows(connection, Token.__table__, ["id", "user_id", "refresh_token_digest", "expires_at"],
+                                    token_rows())
+
+        reset_sequences(connection, [(User.__table__, "user_id"), (Category.__table__, "category_id"),
+                                     (Question.__table__, "question_id"), (Choice.__table__, "choice_id"),
+                                     (CategoryQuizDetails.__table__, "id"), (CategoryMarks.__table__, "id"),
+                                     (Token.__table__, "id")])
+
+    # Fresh statistics, so the planner sees the loaded tables as they are
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("ANALYZE")
+    return loaded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--categories", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=100_000,
+                        help="questions over all categories, at least enough for a quiz in every category")
+    parser.add_argument("--attempts-per-user", type=float, default=3.0,
+                        help="mean number of categories attempted by a user")
+    parser.add_argument("--completion-rate", type=float, default=0.6,
+                        help="fraction of quiz attempts that are finished")
+    parser.add_argument("--category-skew", type=float, default=1.0,
+                        help="Zipf exponent of the category popularity, 0 for uniform")
+    parser.add_argument("--token-rate", type=float, default=0.5,
+                        help="fraction of users holding a refresh token")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    loaded = generate_dataset(create_benchmark_engine(), arguments.users, arguments.categories,
+                              arguments.questions, arguments.attempts_per_user, arguments.completion_rate,
+                              arguments.category_skew, arguments.token_rate, arguments.seed)
+    print(f"Loaded {sum(loaded.values())} rows in {time.perf_counter() - start:.1f}s")
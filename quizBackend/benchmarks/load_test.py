@@ -0,0 +1,363 @@
+"""
+Drive the quiz API with virtual users following the client's quiz-taking flow.
+
+Every virtual user signs up, logs in, loads its user as the client does to learn
+its ID, lists its category details, opens the quiz details and the quiz of a
+random category, answers every question and loads its user again. Virtual users
+arrive at the given rate (Poisson arrivals) for the duration of each stage, so
+stages of growing rates show where latency and errors climb. Each stage reports
+the p50/p95/p99 latency and the error rate of every route, and the first stage
+whose flows slow down or fail past the limits marks the saturation point. Run from the
+quizBackend directory against a running server holding categories with enough questions,
+started with LOGIN_ADDRESS_PER_MINUTE=0 as every virtual user signs up from this address,
+or in process on the app, which seeds IN_PROCESS_CATEGORIES categories when its database
+is the in-memory one (DB_BACKEND=sqlite SQLITE_PATH=:memory:):
+
+    poetry run python -m benchmarks.load_test --base-url http://localhost:8000 --rates 5 10 20 40
+    poetry run python -m benchmarks.load_test --in-process --rates 2 --duration 10
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import secrets
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+import httpx
+
+# Every virtual user comes from this one address, which the per-address login limit of the app would refuse
+# when it runs in process; set before the settings are first imported
+os.environ.setdefault("LOGIN_ADDRESS_PER_MINUTE", "0")
+
+from benchmarks.utils import print_table, summarize  # noqa: E402
+
+# Categories seeded with a full question bank when the app runs in process on the empty in-memory database
+IN_PROCESS_CATEGORIES = 5
+
+# ================================================================================================================================
+def new_stage_stats() -> dict[str, Any]:
+    """
+    Create the counters of a load stage.
+
+    Returns:
+        dict[str, Any]: Latencies and errors per route, durations of the completed flows and the aborted flows.
+    """
+    return {"latency": defaultdict(list), "errors": defaultdict(int), "flow_ms": [], "aborted_flows": 0}
+
+
+# ================================================================================================================================
+async def call_route(client: httpx.AsyncClient, stats: dict[str, Any], method: str, route: str, **kwargs: Any) -> httpx.Response | None:
+    """
+    Send one request and record its latency, counting failed requests as errors.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the API.
+        stats (dict[str, Any]): Counters of the current stage.
+        method (str): HTTP method.
+        route (str): Path of the route, without query parameters.
+        **kwargs (Any): Request options, such as params, json and headers.
+
+    Returns:
+        httpx.Response | None: The response, None if the request failed or returned an error status.
+    """
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, route, **kwargs)
+    except httpx.HTTPError:
+        response = None
+    stats["latency"][route].append((time.perf_counter() - start) * 1000)
+    if response is None or response.is_error:
+        stats["errors"][route] += 1
+        return None
+    return response
+
+
+# ================================================================================================================================
+async def virtual_user(client: httpx.AsyncClient, stats: dict[str, Any], run_id: str, number: int, think_time: float):
+    """
+    Take a quiz as a new user, stopping at the first failed request.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the API.
+        stats (dict[str, Any]): Counters of the current stage.
+        run_id (str): Identifier of the load test run, keeping emails unique across runs.
+        number (int): Number of the virtual user in the run.
+        think_time (float): Pause between two requests in seconds.
+    """
+    rng = random.Random(f"{run_id}-{number}")
+    start = time.perf_counter()
+    credentials = {"user_email": f"load-{run_id}-{number}@load.local", "user_password": f"load-{run_id}-{number}"}
+
+    async def step(method: str, route: str, **kwargs: Any) -> httpx.Response | None:
+        if think_time:
+            await asyncio.sleep(rng.expovariate(1 / think_time))
+        return await call_route(client, stats, method, route, **kwargs)
+
+    if not await step("POST", "/api/signup", json={"user_name": f"Load user {number}", **credentials}):
+        stats["aborted_flows"] += 1
+        return
+    login = await step("POST", "/api/login", json=credentials)
+    if not login:
+        stats["aborted_flows"] += 1
+        return
+    # The client sends the access token of the login cookie as a bearer token
+    headers = {"Authorization": f"Bearer {login.cookies['access_token']}"}
+    user = await step("GET", "/api/getUser", headers=headers)
+    if not user:
+        stats["aborted_flows"] += 1
+        return
+    user_id = user.json()["user_id"]
+
+    categories = await step("GET", "/api/getAllCategoryDetails", params={"user_id": user_id})
+    available = [category["category_name"] for category in categories.json()["allCategoryDetails"]] if categories else []
+    if not available:
+        stats["aborted_flows"] += 1
+        return
+    category_name = rng.choice(available)
+
+    quiz_details = await step("GET", "/api/getCategoryQuizDetails",
+                              params={"user_id": user_id, "category_name": category_name})
+    # A category without enough questions answers with a plain message instead of quiz details
+    if not quiz_details or isinstance(quiz_details.json(), str):
+        stats["aborted_flows"] += 1
+        return
+    quiz = await step("GET", "/api/getQuiz", params={"user_id": user_id, "category_name": category_name})
+    if not quiz:
+        stats["aborted_flows"] += 1
+        return
+    quiz = quiz.json()
+
+    for index, (question, choices) in enumerate(zip(quiz["questions"], quiz["choices"])):
+        attempt = await step("POST", "/api/attemptQuiz", json={
+            "user_id": user_id,
+            "category_id": question["category_id"],
+            "question_id": question["question_id"],
+            "choice_id": rng.choice(choices)["choice_id"],
+            "isFinished": index == len(quiz["questions"]) - 1
+        })
+        if not attempt:
+            stats["aborted_flows"] += 1
+            return
+
+    if not await step("GET", "/api/getUser", headers=headers):
+        stats["aborted_flows"] += 1
+        return
+    stats["flow_ms"].append((time.perf_counter() - start) * 1000)
+
+
+# ================================================================================================================================
+async def run_stage(client: httpx.AsyncClient, run_id: str, first_number: int, rate: float, duration: float,
+                    think_time: float) -> tuple[dict[str, Any], int, float]:
+    """
+    Start virtual users at the given rate for the duration of the stage and wait for all of them.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the API.
+        run_id (str): Identifier of the load test run.
+        first_number (int): Number of the first virtual user of the stage.
+        rate (float): Virtual users started per second.
+        duration (float): Seconds during which virtual users are started.
+        think_time (float): Mean pause between two requests of a virtual user in seconds.
+
+    Returns:
+        tuple[dict[str, Any], int, float]: Counters of the stage, virtual users started and elapsed seconds.
+    """
+    stats = new_stage_stats()
+    arrivals = random.Random(f"{run_id}-{rate}")
+    tasks = []
+    start = time.perf_counter()
+    next_arrival = 0.0
+    while next_arrival < duration:
+        await asyncio.sleep(max(0.0, next_arrival - (time.perf_counter() - start)))
+        tasks.append(asyncio.create_task(
+            virtual_user(client, stats, run_id, first_number + len(tasks), think_time)))
+        next_arrival += arrivals.expovariate(rate)
+    await asyncio.gather(*tasks)
+    return stats, len(tasks), time.perf_counter() - start
+
+
+# ================================================================================================================================
+def stage_report(rate: float, stats: dict[str, Any], users: int, elapsed: float) -> dict[str, Any]:
+    """
+    Summarize the counters of a stage.
+
+    Args:
+        rate (float): Virtual users started per second.
+        stats (dict[str, Any]): Counters of the stage.
+        users (int): Virtual users started.
+        elapsed (float): Seconds from the first arrival to the end of the last flow.
+
+    Returns:
+        dict[str, Any]: Throughput, flow outcomes and durations, and the latency and error rate of every route.
+    """
+    routes = {}
+    for route, samples in stats["latency"].items():
+        routes[route] = {
+            **summarize(samples),
+            "requests": len(samples),
+            "errors": stats["errors"][route],
+            "error_rate": round(stats["errors"][route] / len(samples), 4)
+        }
+    requests = sum(route["requests"] for route in routes.values())
+    errors = sum(route["errors"] for route in routes.values())
+    return {
+        "arrival_rate": rate,
+        "virtual_users": users,
+        "completed_flows": len(stats["flow_ms"]),
+        "aborted_flows": stats["aborted_flows"],
+        "abort_rate": round(stats["aborted_flows"] / users, 4) if users else 0.0,
+        "flow": summarize(stats["flow_ms"]) if stats["flow_ms"] else None,
+        "requests": requests,
+        "requests_per_second": round(requests / elapsed, 1),
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "elapsed_s": round(elapsed, 1),
+        "routes": routes
+    }
+
+
+# ================================================================================================================================
+def saturated_stages(reports: list[dict[str, Any]], max_error_rate: float, max_slowdown: float) -> list[bool]:
+    """
+    Tell which stages are saturated.
+
+    A stage is saturated when requests fail or flows abort past the error limit, or when requests queue up,
+    which stretches every flow past the slowdown limit. Aborted flows count as failures even when no request
+    failed, a category without questions aborts every flow with successful responses only.
+
+    Args:
+        reports (list[dict[str, Any]]): Report of every stage.
+        max_error_rate (float): Error rate and abort rate above which a stage is saturated.
+        max_slowdown (float): Growth of the median flow duration over the first stage with a completed flow
+            above which a stage is saturated.
+
+    Returns:
+        list[bool]: Whether every stage is saturated.
+    """
+    baseline_flow = next((report["flow"]["p50_ms"] for report in reports if report["flow"]), None)
+    return [report["error_rate"] > max_error_rate or report["abort_rate"] > max_error_rate
+            or (report["flow"] is not None and report["flow"]["p50_ms"] > max_slowdown * baseline_flow)
+            for report in reports]
+
+
+# ================================================================================================================================
+@contextlib.asynccontextmanager
+async def api_client(base_url: str, in_process: bool, max_connections: int, timeout: float):
+    """
+    Open a client on a running server, or on the app itself with its lifespan running.
+
+    Args:
+        base_url (str): URL of the running server.
+        in_process (bool): Whether to call the app in this process instead of a server.
+        max_connections (int): Upper bound of open connections to the server.
+        timeout (float): Timeout of every request in seconds.
+
+    Yields:
+        httpx.AsyncClient: Client bound to the API.
+    """
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    if not in_process:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+            yield client
+        return
+
+    from quizbackend.db.db_connector import db_engine
+    from quizbackend.routes.adminRoute import app
+    from quizcommon.backend import is_memory_database
+    from benchmarks.suite import seed_dataset
+    async with app.router.lifespan_context(app):
+        # The in-memory database starts empty, and every flow would abort without a category to take
+        if is_memory_database():
+            await asyncio.to_thread(seed_dataset, db_engine, IN_PROCESS_CATEGORIES)
+        # Unhandled errors of the app answer 500 as a server would, instead of ending the run
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://quizbackend",
+                                     limits=limits, timeout=timeout) as client:
+            yield client
+
+
+# ================================================================================================================================
+async def run(base_url: str, in_process: bool, rates: list[float], duration: float, think_time: float,
+              max_connections: int, timeout: float) -> list[dict[str, Any]]:
+    """
+    Run one stage per arrival rate and report every stage.
+
+    Args:
+        base_url (str): URL of the running server.
+        in_process (bool): Whether to call the app in this process instead of a server.
+        rates (list[float]): Virtual users started per second in every stage.
+        duration (float): Seconds during which virtual users are started in every stage.
+        think_time (float): Mean pause between two requests of a virtual user in seconds.
+        max_connections (int): Upper bound of open connections to the server.
+        timeout (float): Timeout of every request in seconds.
+
+    Returns:
+        list[dict[str, Any]]: Report of every stage.
+    """
+    run_id = secrets.token_hex(4)
+    reports = []
+    async with api_client(base_url, in_process, max_connections, timeout) as client:
+        started_users = 0
+        for rate in rates:
+            stats, users, elapsed = await run_stage(client, run_id, started_users, rate, duration, think_time)
+            started_users += users
+            reports.append(stage_report(rate, stats, users, elapsed))
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true",
+                        help="call the app in this process instead of a running server")
+    parser.add_argument("--rates", type=float, nargs="+", default=[5, 10, 20, 40],
+                        help="virtual users started per second, one stage per rate")
+    parser.add_argument("--duration", type=float, default=30, help="seconds during which users arrive per stage")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="mean pause between two requests of a virtual user in seconds")
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="error rate and aborted flow rate above which a stage counts as saturated")
+    parser.add_argument("--max-slowdown", type=float, default=2.0,
+                        help="growth of the median flow duration over the first stage above which a stage "
+                             "counts as saturated")
+    parser.add_argument("--output", type=Path, help="JSON file of the stage reports")
+    arguments = parser.parse_args()
+
+    if arguments.in_process:
+        # The app prints debugging output on every request
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            reports = asyncio.run(run(arguments.base_url, True, arguments.rates, arguments.duration,
+                                      arguments.think_time, arguments.max_connections, arguments.timeout))
+    else:
+        reports = asyncio.run(run(arguments.base_url, False, arguments.rates, arguments.duration,
+                                  arguments.think_time, arguments.max_connections, arguments.timeout))
+
+    saturated_at = None
+    for report, saturated in zip(reports, saturated_stages(reports, arguments.max_error_rate, arguments.max_slowdown)):
+        if saturated and saturated_at is None:
+            saturated_at = report["arrival_rate"]
+        print(f"\nArrival rate {report['arrival_rate']} users/s: {report['virtual_users']} users, "
+              f"{report['completed_flows']} completed, {report['aborted_flows']} aborted, "
+              f"{report['requests_per_second']} requests/s, error rate {report['error_rate']:.2%}, "
+              f"flow p50 {report['flow']['p50_ms'] if report['flow'] else '-'} ms"
+              f"{' (saturated)' if saturated else ''}")
+        print_table(["route", "requests", "errors", "p50", "p95", "p99"],
+                    [[route, values["requests"], values["errors"], values["p50_ms"], values["p95_ms"], values["p99_ms"]]
+                     for route, values in report["routes"].items()])
+
+    if arguments.output:
+        arguments.output.write_text(json.dumps(reports, indent=2))
+    if not any(report["completed_flows"] for report in reports):
+        # No flow to measure, the server is down or the dataset lacks a category with enough questions
+        print("\nNo flow completed, check the server and its categories")
+        sys.exit(1)
+    if saturated_at is None:
+        print("\nNo stage saturated, raise the arrival rates to find the saturation point")
+    else:
+        print(f"\nSaturation reached at {saturated_at} users/s")
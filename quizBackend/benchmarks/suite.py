@@ -0,0 +1,375 @@
+"""
+Benchmark the controller hot paths of quizBackend at several data sizes.
+
+For every size the test database is seeded with that many users and categories,
+then every hot path is called through the asyncio engine, one session per call
+as in a request. Each path reports latency percentiles, the SQL statements of a
+call and the memory it allocates. Results are saved as JSON, and a run compared
+with a saved baseline fails with a non-zero exit code when a path regressed.
+Run from the quizBackend directory against a disposable test database:
+
+    poetry run python -m benchmarks.suite --sizes 10 100 1000
+    poetry run python -m benchmarks.suite --baseline benchmarks/results/suite-<timestamp>.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+from sqlalchemy import Engine, delete, insert, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import quizbackend.controllers.auth_controller as auth
+from quizbackend.db.query_counter import count_queries
+from quizbackend.controllers.quiz_controller import attempt_quiz, get_categories_details, get_quiz, getQuizDetails
+from quizbackend.controllers.user_controller import getUserDetails, logIn_func, signup_func
+from quizbackend.models.quiz_model import (
+    AnsweredQuestion, Category, CategoryMarks, CategoryQuizDetails, CategorySummary, Choice, Question)
+from quizbackend.models.user_model import Token, User
+from quizbackend.utils.answer_key import answer_keys, answer_keys_lock
+from quizbackend.utils.question_sampler import invalidate_category_pool
+from benchmarks.utils import (
+    async_time_call, benchmark_database_url, create_async_benchmark_engine, create_benchmark_engine, print_table,
+    summarize)
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+QUESTIONS_PER_CATEGORY = 12
+CHOICES_PER_QUESTION = 4
+SEED_PASSWORD = "bench-suite-password"
+# Questions left in the quiz answered by the attempt_quiz hot path, enough for every timed call
+ATTEMPT_REMAINING_QUESTIONS = 1_000_000
+
+# Hot paths hashing or verifying a password at full bcrypt cost take hundreds of milliseconds per call
+PASSWORD_PATHS = {"signup_func", "logIn_func"}
+
+# A path regresses when its p95 latency or allocations grow by more than the tolerance,
+# and its p95 by more than this many milliseconds, so sub-millisecond jitter is not flagged
+LATENCY_NOISE_FLOOR_MS = 1.0
+
+HotPath = Callable[[AsyncSession], Awaitable[Any]]
+
+
+# ================================================================================================================================
+def seed_dataset(engine: Engine, size: int) -> dict[str, Any]:
+    """
+    Create the given number of users and categories, with a full question bank in every category.
+
+    The quiz user has quiz details in every category, half of them finished, and an untouched quiz in the
+    first category. The login user has an endless quiz in the first category for the attempts.
+    Every user shares one password hash of the configured bcrypt cost.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+        size (int): Number of users and of categories to create.
+
+    Returns:
+        dict[str, Any]: IDs and names of the seeded rows the hot paths work on.
+    """
+    prefix = f"bench-suite-{size}"
+    password_hash = auth.passwordIntoHash(SEED_PASSWORD)
+    with Session(engine) as session:
+        session.execute(insert(User), [
+            {"user_name": f"{prefix}-user", "user_email": f"{prefix}-user@bench.local",
+             "user_password": password_hash},
+            {"user_name": f"{prefix}-login", "user_email": f"{prefix}-login@bench.local",
+             "user_password": password_hash},
+            *({"user_name": f"{prefix}-{number}", "user_email": f"{prefix}-{number}@bench.local",
+               "user_password": password_hash} for number in range(max(0, size - 2)))])
+        session.execute(insert(Category), [{"category_name": f"{prefix}-{number}",
+                                            "category_description": "Benchmark suite category"}
+                                           for number in range(size)])
+        user_id = session.exec(select(User.user_id).where(User.user_email == f"{prefix}-user@bench.local")).one()
+        login_user_id = session.exec(select(User.user_id).where(User.user_email == f"{prefix}-login@bench.local")).one()
+        categories = session.exec(select(Category.category_id, Category.category_name)
+                                  .where(Category.category_name.startswith(f"{prefix}-"))
+                                  .order_by(Category.category_id)).all()
+        category_ids = [category_id for category_id, _ in categories]
+
+        session.execute(insert(Question), [{"question": f"Question {number}", "category_id": category_id}
+                                           for category_id in category_ids
+                                           for number in range(QUESTIONS_PER_CATEGORY)])
+        question_ids = session.exec(select(Question.question_id).where(Question.category_id.in_(category_ids))
+                                    .order_by(Question.question_id)).all()
+        session.execute(insert(Choice), [{"choice": f"Choice {index}", "choice_status": index == 0,
+                                          "question_id": question_id}
+                                         for question_id in question_ids
+                                         for index in range(CHOICES_PER_QUESTION)])
+        session.execute(insert(CategoryMarks), [{"category_id": category_id, "marks": 50}
+                                                for category_id in category_ids])
+        session.execute(insert(CategoryQuizDetails), [
+            {"user_id": user_id, "category_id": category_id, "obtaining_marks": 0, "remaining_questions": 10,
+             "is_finished": False} if index == 0 else
+            {"user_id": user_id, "category_id": category_id, "obtaining_marks": 30, "remaining_questions": 0,
+             "is_finished": index % 2 == 0}
+            for index, category_id in enumerate(category_ids)])
+        session.execute(insert(CategoryQuizDetails), [
+            {"user_id": login_user_id, "category_id": category_ids[0], "obtaining_marks": 0,
+             "remaining_questions": ATTEMPT_REMAINING_QUESTIONS, "is_finished": False}])
+        attempt_details_id = session.exec(select(CategoryQuizDetails.id)
+                                          .where(CategoryQuizDetails.user_id == login_user_id)).one()
+        first_question_id = question_ids[0]
+        correct_choice_id = session.exec(select(Choice.choice_id).where(Choice.question_id == first_question_id)
+                                         .where(Choice.choice_status == True)).first()
+        session.commit()
+
+    return {
+        "prefix": prefix,
+        "user_id": user_id,
+        "user_email": f"{prefix}-user@bench.local",
+        "login_email": f"{prefix}-login@bench.local",
+        "login_user_id": login_user_id,
+        "attempt_details_id": attempt_details_id,
+        "category_id": categories[0][0],
+        "category_name": categories[0][1],
+        "question_ids": question_ids[:QUESTIONS_PER_CATEGORY],
+        "choice_id": correct_choice_id
+    }
+
+
+# ================================================================================================================================
+def drop_dataset(engine: Engine, prefix: str):
+    """
+    Delete the rows created by seed_dataset and by the signups of the benchmark.
+
+    Args:
+        engine (Engine): Engine bound to the test database.
+        prefix (str): Name prefix of the seeded rows.
+    """
+    with Session(engine) as session:
+        category_ids = session.exec(select(Category.category_id).where(
+            Category.category_name.startswith(f"{prefix}-"))).all()
+        user_ids = session.exec(select(User.user_id).where(User.user_email.startswith(f"{prefix}-"))).all()
+        question_ids = session.exec(select(Question.question_id).where(Question.category_id.in_(category_ids))).all()
+        session.execute(delete(AnsweredQuestion).where(AnsweredQuestion.question_id.in_(question_ids)))
+        session.execute(delete(Choice).where(Choice.question_id.in_(question_ids)))
+        session.execute(delete(Question).where(Question.category_id.in_(category_ids)))
+        session.execute(delete(CategoryQuizDetails).where(CategoryQuizDetails.category_id.in_(category_ids)))
+        session.execute(delete(CategoryMarks).where(CategoryMarks.category_id.in_(category_ids)))
+        session.execute(delete(CategorySummary).where(CategorySummary.category_id.in_(category_ids)))
+        session.execute(delete(Category).where(Category.category_id.in_(category_ids)))
+        session.execute(delete(Token).where(Token.user_id.in_(user_ids)))
+        session.execute(delete(User).where(User.user_id.in_(user_ids)))
+        session.commit()
+
+    # Row IDs can be reused once deleted, so cached pools and answer keys must not outlive the dataset
+    for category_id in category_ids:
+        invalidate_category_pool(category_id)
+    with answer_keys_lock:
+        answer_keys.clear()
+
+
+# ================================================================================================================================
+async def prepare_hot_paths(engine: AsyncEngine, dataset: dict[str, Any]) -> dict[str, HotPath]:
+    """
+    Build a call of every hot path on the seeded dataset.
+
+    Args:
+        engine (AsyncEngine): Asyncio engine bound to the test database.
+        dataset (dict[str, Any]): Seeded rows, as returned by seed_dataset.
+
+    Returns:
+        dict[str, HotPath]: Hot path name and a call running it on a session.
+    """
+    # The quiz user logs in once for the token paths, the login path works on its own user
+    # so the refresh token rotated by tokenService is never replaced mid-run
+    async with AsyncSession(engine) as session:
+        tokens = await logIn_func(dataset["user_email"], SEED_PASSWORD, session)
+    signups = itertools.count()
+    attempted_questions = itertools.cycle(dataset["question_ids"])
+
+    async def attempt(session: AsyncSession):
+        question_id = next(attempted_questions)
+        # A question is answered once per quiz, so the answers are cleared whenever the questions run out
+        if question_id == dataset["question_ids"][0]:
+            await session.execute(delete(AnsweredQuestion)
+                                  .where(AnsweredQuestion.quiz_details_id == dataset["attempt_details_id"]))
+            await session.commit()
+        return await attempt_quiz(session, dataset["login_user_id"], dataset["category_id"],
+                                  question_id, dataset["choice_id"], False)
+
+    async def refresh(session: AsyncSession):
+        # Every refresh rotates the token, the next call presents the new one
+        tokens["refresh_token"] = (await auth.tokenService(tokens["refresh_token"], session))["refresh_token"]
+
+    def signup(session: AsyncSession):
+        number = next(signups)
+        return signup_func(f"{dataset['prefix']}-signup-{number}",
+                           f"{dataset['prefix']}-signup-{number}@bench.local", SEED_PASSWORD, session)
+
+    return {
+        "get_quiz": lambda session: get_quiz(dataset["user_id"], dataset["category_name"], session),
+        "attempt_quiz": attempt,
+        "getQuizDetails": lambda session: getQuizDetails(dataset["user_id"], dataset["category_name"], session),
+        "get_categories_details": lambda session: get_categories_details(dataset["user_id"], session),
+        "signup_func": signup,
+        "logIn_func": lambda session: logIn_func(dataset["login_email"], SEED_PASSWORD, session),
+        "getUserDetails": lambda session: getUserDetails(tokens["access_token"], session),
+        "tokenService": refresh
+    }
+
+
+# ================================================================================================================================
+async def measure_hot_path(engine: AsyncEngine, hot_path: HotPath, repeat: int) -> dict[str, Any]:
+    """
+    Measure the statements, allocations and latency of a hot path.
+
+    A first call warms the caches, the statements and allocations are read from a single call,
+    and the latency from separate calls so tracing does not slow them down.
+
+    Args:
+        engine (AsyncEngine): Asyncio engine bound to the test database.
+        hot_path (HotPath): Call running the hot path on a session.
+        repeat (int): Number of calls timed.
+
+    Returns:
+        dict[str, Any]: Latency summary, statement count and allocations of the hot path.
+    """
+    async def call():
+        async with AsyncSession(engine) as session:
+            await hot_path(session)
+
+    await call()
+    with count_queries(engine.sync_engine) as statements:
+        await call()
+
+    tracemalloc.start()
+    try:
+        allocated_before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        await call()
+        allocated_after, allocated_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        **summarize(await async_time_call(call, repeat)),
+        "queries": len(statements),
+        "alloc_peak_kib": round((allocated_peak - allocated_before) / 1024, 1),
+        "alloc_retained_kib": round((allocated_after - allocated_before) / 1024, 1)
+    }
+
+
+# ================================================================================================================================
+async def run_suite(sizes: list[int], repeat: int, password_repeat: int, hot_path_names: list[str]) -> list[dict[str, Any]]:
+    """
+    Seed every data size in turn and measure the selected hot paths on it.
+
+    Args:
+        sizes (list[int]): Numbers of users and categories to benchmark.
+        repeat (int): Number of calls timed per hot path.
+        password_repeat (int): Number of calls timed for the hot paths running bcrypt.
+        hot_path_names (list[str]): Hot paths to measure, in order.
+
+    Returns:
+        list[dict[str, Any]]: Measurements of every hot path at every size.
+    """
+    engine = create_benchmark_engine()
+    async_engine = create_async_benchmark_engine()
+    results = []
+    try:
+        for size in sizes:
+            dataset = seed_dataset(engine, size)
+            try:
+                hot_paths = await prepare_hot_paths(async_engine, dataset)
+                for name in hot_path_names:
+                    calls = password_repeat if name in PASSWORD_PATHS else repeat
+                    measurement = await measure_hot_path(async_engine, hot_paths[name], calls)
+                    results.append({"hot_path": name, "size": size, **measurement})
+            finally:
+                drop_dataset(engine, dataset["prefix"])
+    finally:
+        await async_engine.dispose()
+    return results
+
+
+# ================================================================================================================================
+def find_regressions(baseline: list[dict[str, Any]], results: list[dict[str, Any]], tolerance: float) -> dict[tuple[str, int], list[str]]:
+    """
+    Compare measurements with a baseline run and describe every regression.
+
+    Args:
+        baseline (list[dict[str, Any]]): Measurements of the baseline run.
+        results (list[dict[str, Any]]): Measurements of the current run.
+        tolerance (float): Allowed relative growth of latency and allocations, 0.2 for 20%.
+
+    Returns:
+        dict[tuple[str, int], list[str]]: Regressions of every hot path and size measured by both runs.
+    """
+    baseline_by_key = {(result["hot_path"], result["size"]): result for result in baseline}
+    regressions = {}
+    for result in results:
+        key = (result["hot_path"], result["size"])
+        previous = baseline_by_key.get(key)
+        if previous is None:
+            continue
+        found = []
+        if result["queries"] > previous["queries"]:
+            found.append(f"queries {previous['queries']} -> {result['queries']}")
+        if (result["p95_ms"] > previous["p95_ms"] * (1 + tolerance)
+                and result["p95_ms"] - previous["p95_ms"] > LATENCY_NOISE_FLOOR_MS):
+            found.append(f"p95 {previous['p95_ms']} -> {result['p95_ms']} ms")
+        if result["alloc_peak_kib"] > previous["alloc_peak_kib"] * (1 + tolerance):
+            found.append(f"allocations {previous['alloc_peak_kib']} -> {result['alloc_peak_kib']} KiB")
+        if found:
+            regressions[key] = found
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--password-repeat", type=int, default=5,
+                        help="calls timed for signup_func and logIn_func, which run bcrypt at full cost")
+    parser.add_argument("--paths", nargs="+", default=["get_quiz", "attempt_quiz", "getQuizDetails",
+                                                       "get_categories_details", "signup_func", "logIn_func",
+                                                       "getUserDetails", "tokenService"])
+    parser.add_argument("--output", type=Path,
+                        help="JSON file of the results, defaults to benchmarks/results/suite-<timestamp>.json")
+    parser.add_argument("--baseline", type=Path, help="JSON results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative growth of p95 latency and allocations before a regression is flagged")
+    arguments = parser.parse_args()
+
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    # The controllers print debugging output on every call
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        results = asyncio.run(run_suite(arguments.sizes, arguments.repeat,
+                                        arguments.password_repeat, arguments.paths))
+
+    output = arguments.output or RESULTS_DIR / f"suite-{started_at:%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "started_at": started_at.isoformat(),
+        "duration_s": round(time.perf_counter() - start, 1),
+        "database": make_url(benchmark_database_url()).get_backend_name(),
+        "repeat": arguments.repeat,
+        "password_repeat": arguments.password_repeat,
+        "results": results
+    }, indent=2))
+
+    regressions = {}
+    if arguments.baseline:
+        baseline = json.loads(arguments.baseline.read_text())["results"]
+        regressions = find_regressions(baseline, results, arguments.tolerance)
+
+    print_table(["hot path", "size", "p50", "p95", "p99", "queries", "peak KiB", "retained KiB", "regression"],
+                [[result["hot_path"], result["size"], result["p50_ms"], result["p95_ms"], result["p99_ms"],
+                  result["queries"], result["alloc_peak_kib"], result["alloc_retained_kib"],
+                  "; ".join(regressions.get((result["hot_path"], result["size"]), [])) or "-"]
+                 for result in results])
+    print(f"\nResults saved to {output}")
+    if regressions:
+        print(f"{len(regressions)} hot path measurements regressed against {arguments.baseline}")
+        sys.exit(1)
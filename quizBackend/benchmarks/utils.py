@@ -0,0 +1,159 @@
+import statistics
+import time
+from typing import Any, Awaitable, Callable
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import create_engine
+
+from quizbackend.db.migrate import migrate
+from quizbackend.settings import DB_URL, TEST_DB_URL
+from quizcommon.backend import configure_sqlite, database_url, driver_url, is_memory_database
+from quizcommon.pool import MeasuredAsyncQueuePool, MeasuredQueuePool, engine_options
+
+
+# ================================================================================================================================
+def benchmark_database_url() -> str:
+    """
+    Get the connection string of the database the benchmarks run against.
+
+    Raises:
+        RuntimeError: If neither a test database nor an in-memory database is configured.
+
+    Returns:
+        str: The connection string, with the sync driver set.
+    """
+    # Benchmarks seed and delete rows, so they never run against the main database,
+    # unless it lives in memory and disappears with the benchmark process
+    if TEST_DB_URL:
+        return driver_url(str(TEST_DB_URL))
+    if is_memory_database():
+        return database_url(DB_URL)
+    raise RuntimeError("TEST_DB_CONNECTION_STR must point at a disposable database to run benchmarks, "
+                       "or DB_BACKEND=sqlite with SQLITE_PATH=:memory: must be set")
+
+
+# ================================================================================================================================
+def create_benchmark_engine() -> Engine:
+    """
+    Create an engine on the benchmark database and apply pending migrations to it.
+
+    Returns:
+        Engine: Engine bound to the benchmark database.
+    """
+    connection_str = benchmark_database_url()
+    engine = create_engine(connection_str, **engine_options(connection_str, MeasuredQueuePool))
+    configure_sqlite(engine)
+    migrate(engine)
+    return engine
+
+
+# ================================================================================================================================
+def create_async_benchmark_engine(**engine_overrides: Any) -> AsyncEngine:
+    """
+    Create an asyncio engine on the benchmark database, after applying pending migrations to it.
+
+    Args:
+        **engine_overrides (Any): create_async_engine options replacing the pool settings, such as the pool size.
+
+    Returns:
+        AsyncEngine: Asyncio engine bound to the benchmark database.
+    """
+    # The migrating engine stays open, an in-memory database disappears with its last connection
+    create_benchmark_engine()
+    connection_str = driver_url(benchmark_database_url(), asynchronous=True)
+    options = engine_options(connection_str, MeasuredAsyncQueuePool)
+    options.update(engine_overrides)
+    engine = create_async_engine(connection_str, **options)
+    configure_sqlite(engine.sync_engine)
+    return engine
+
+
+# ================================================================================================================================
+def time_call(func: Callable[[], Any], repeat: int) -> list[float]:
+    """
+    Call a function several times and record the latency of every call.
+
+    Args:
+        func (Callable[[], Any]): Function to be measured.
+        repeat (int): Number of calls.
+
+    Returns:
+        list[float]: Latency of every call in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+# ================================================================================================================================
+async def async_time_call(func: Callable[[], Awaitable[Any]], repeat: int) -> list[float]:
+    """
+    Await a coroutine function several times and record the latency of every call.
+
+    Args:
+        func (Callable[[], Awaitable[Any]]): Coroutine function to be measured.
+        repeat (int): Number of calls.
+
+    Returns:
+        list[float]: Latency of every call in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+# ================================================================================================================================
+def percentile(ordered: list[float], fraction: float) -> float:
+    """
+    Read a percentile from sorted samples with the nearest rank method.
+
+    Args:
+        ordered (list[float]): Samples in ascending order.
+        fraction (float): Percentile as a fraction, 0.95 for the 95th percentile.
+
+    Returns:
+        float: The sample at the percentile.
+    """
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+# ================================================================================================================================
+def summarize(samples: list[float]) -> dict[str, float]:
+    """
+    Summarize latency samples.
+
+    Args:
+        samples (list[float]): Latency samples in milliseconds.
+
+    Returns:
+        dict[str, float]: Median, 95th and 99th percentile and mean latency in milliseconds.
+    """
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3)
+    }
+
+
+# ================================================================================================================================
+def print_table(headers: list[str], rows: list[list[Any]]):
+    """
+    Print benchmark results as an aligned plain text table.
+
+    Args:
+        headers (list[str]): Column headers.
+        rows (list[list[Any]]): Table rows.
+    """
+    widths = [max(len(str(cell)) for cell in column)
+              for column in zip(headers, *rows)]
+    for line in [headers, *rows]:
+        print("  ".join(str(cell).rjust(width)
+              for cell, width in zip(line, widths)))
@@ -4,13 +4,16 @@ from jose import jwt, JWTError
 from fastapi import HTTPException, Depends
 from typing import Annotated
 
-from quizbackend.controllers.auth_controller import verifyPassword
+from quizbackend.controllers.auth_controller import verifyAndUpdatePassword
 from quizbackend.controllers.user_controller import auth_schema
+from quizbackend.controllers.summary_controller import change_question_count, create_category_summary, set_category_marks
 from quizbackend.models.admin_model import Admin, AdminBaseModel, AdminToken, QuestionModel, CategoryModel
 from quizbackend.models.quiz_model import Category, CategoryMarks, Question, Choice
 from quizbackend.settings import ADMIN_TOKEN_EXPIRE_TIME, ALGORITHM, ADMIN_SECRET_KEY
 from quizbackend.utils.apierrors import ConflictsException, NotFoundException
 from quizbackend.db.db_connector import get_session
+from quizbackend.utils.question_sampler import add_question_to_pool
+from quizcommon.admin_revocations import is_admin_token_revoked, remember_revocation
 
 
 # ================================================================================================================================
@@ -35,24 +38,27 @@ def admin_login_func(adminForm: AdminBaseModel, session: Session):
             Admin.admin_email == adminForm.admin_email)).first()
         if admin_exist:
             # Verify admin password
-            password_verified = verifyPassword(
+            password_verified, new_hash = verifyAndUpdatePassword(
                 adminForm.admin_password, admin_exist.admin_password)
+            # Store the hash at the configured cost, saved with the admin token below
+            if password_verified and new_hash:
+                admin_exist.admin_password = new_hash
         else:
             raise NotFoundException("admin")
 
         if admin_exist and password_verified:
+            # Record the token first, its ID is the jti claim it is revoked by
+            db_admin_token = add_admin_token_in_db(ADMIN_TOKEN_EXPIRE_TIME, session)
             # Generate token if admin is authenticated
-            data = {"admin_email": admin_exist.admin_email}
+            data = {"admin_email": admin_exist.admin_email, "jti": str(db_admin_token.admin_tokenId)}
             admin_token = generate_admin_token(
                 data=data, expires_delta=ADMIN_TOKEN_EXPIRE_TIME)
-            if admin_token:
-                db_admin_token = add_admin_token_in_db(admin_token, session)
-            else:
+            if not admin_token:
                 raise JWTError("Token has not been generated")
 
             # Return admin token and its details
             return {
-                "admin_token": db_admin_token.admin_token,
+                "admin_token": admin_token,
                 "admin_token_id": db_admin_token.admin_tokenId,
                 "expiry_time": ADMIN_TOKEN_EXPIRE_TIME
             }
@@ -69,22 +75,27 @@ def admin_verify_func(token: Annotated[str, Depends(auth_schema)], session:  Ann
     """
     Function to verify admin token.
 
+    The signature and expiry of the token are checked locally, and its ID against the in-memory set of
+    revoked tokens, so a request does not read the token table however many admin logins there were.
+
     Args:
         token (Annotated[str, Depends(auth_schema)]): Admin token.
-        session (Annotated[Session, Depends(get_session)]): SQLModel session.
+        session (Annotated[Session, Depends(get_session)]): SQLModel session, used when the revoked tokens are read again.
 
     Raises:
-        NotFoundException: Raised when admin token is not found in the database.
+        NotFoundException: Raised when admin token is invalid, expired or revoked.
 
     Returns:
         str: Verification message.
     """
-    # Get the first Admin token from database based on condition and then verify admin 
-    db_admin_token = session.exec(select(AdminToken).where(
-        AdminToken.admin_token == token)).first()
-    if db_admin_token:
-        return "Admin has verified."
-    raise NotFoundException("Token")
+    try:
+        claims = jwt.decode(token, ADMIN_SECRET_KEY, algorithms=[ALGORITHM])
+        token_id = int(claims["jti"])
+    except (JWTError, KeyError, ValueError):
+        raise NotFoundException("Token")
+    if is_admin_token_revoked(token_id, session, AdminToken):
+        raise NotFoundException("Token")
+    return "Admin has verified."
 
 
 # ================================================================================================================================
@@ -101,7 +112,6 @@ def generate_admin_token(data: dict, expires_delta: timedelta) -> str:
     """
     # Make a copy of the admin data
     to_encode = data.copy()
-    print("admin", data)
     
     # Calculate the expiry time
     expire = datetime.now(timezone.utc) + expires_delta
@@ -115,18 +125,18 @@ def generate_admin_token(data: dict, expires_delta: timedelta) -> str:
 
 
 # ================================================================================================================================
-def add_admin_token_in_db(token: str, session: Session):
+def add_admin_token_in_db(expires_delta: timedelta, session: Session):
     """
-    Add an admin token to the database.
+    Record an admin token about to be issued.
 
     Args:
-        token (str): Admin token to be added.
+        expires_delta (timedelta): Expiry time for the token.
         session (Session): Database session.
 
     Returns:
-        AdminToken: Added admin token.
+        AdminToken: Added admin token, whose ID is the jti claim of the token.
     """
-    admin_token = AdminToken(admin_token=token)
+    admin_token = AdminToken(expires_at=datetime.now(timezone.utc) + expires_delta)
     session.add(admin_token)
     session.commit()
     session.refresh(admin_token)
@@ -134,12 +144,14 @@ def add_admin_token_in_db(token: str, session: Session):
 
 
 # ================================================================================================================================
-def delete_admin_token_from_db(token_id: int, session: Session):
+def revoke_admin_token(token_id: int, session: Session):
     """
-    Delete an admin token from the database.
+    Revoke an admin token.
+
+    The row is kept until the token expires, every worker refuses the token once it reads the revocation.
 
     Args:
-        token_id (int): ID of the token to be deleted.
+        token_id (int): ID of the token to be revoked.
         session (Session): Database session.
 
     Returns:
@@ -152,9 +164,11 @@ def delete_admin_token_from_db(token_id: int, session: Session):
     db_admin_token = session.get(AdminToken, token_id)
     if db_admin_token is None:
         raise NotFoundException("Token")
-    # Delete the Admin token from database  
-    session.delete(db_admin_token)
-    session.commit()
+    # Mark the Admin token as revoked
+    if db_admin_token.revoked_at is None:
+        db_admin_token.revoked_at = datetime.now(timezone.utc)
+        session.commit()
+    remember_revocation(token_id)
     return "Token has been deleted"
 
 
@@ -196,6 +210,9 @@ def add_category(user_category: CategoryModel, token: Annotated[str, Depends(adm
     category_marks_table = CategoryMarks(
         category_id=category.category_id, marks=user_category.category_marks)
     session.add(category_marks_table)
+    # Start the category summary that availability checks read from
+    create_category_summary(category.category_id,
+                            user_category.category_marks, session)
     session.commit()
     # Get updated list of all categories
     all_categories = session.exec(select(Category)).all()
@@ -218,6 +235,8 @@ def add_marks(category_id: int, marks: int, session: Session):
     # Create a new entry in the CategoryMarks table
     category_marks = CategoryMarks(category_id=category_id, marks=marks)
     session.add(category_marks)
+    # Keep the marks in the category summary up to date
+    set_category_marks(category_id, marks, session)
     session.commit()
     return "Marks has been added successfully"
 
@@ -253,7 +272,12 @@ def add_quiz(token: Annotated[str, Depends(admin_verify_func)], question: Questi
     # Add the question to the database
     add_question = Question(question=question.question, category_id=category.category_id, choices=[choice01, choice02, choice03, choice04])
     session.add(add_question)
+    # Count the question in the category summary within the same transaction
+    change_question_count(category.category_id, 1, session)
     session.commit()
     session.refresh(add_question)
+
+    # Keep the cached sampling pool of the category in step with the question bank
+    add_question_to_pool(category.category_id, add_question.question_id)
     
     return "Question added successfully"
\ No newline at end of file
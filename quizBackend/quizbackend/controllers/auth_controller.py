@@ -1,20 +1,27 @@
+import hashlib
+import secrets
 from typing import Annotated
 from fastapi import Depends, HTTPException
 from datetime import datetime, timedelta, timezone
-from jose import jwt
+from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlmodel import select, Session
+from sqlmodel import select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from quizbackend.controllers.user_controller import auth_schema
-from quizbackend.settings import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_TIME
+from quizbackend.settings import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_TIME, REFRESH_TOKEN_EXPIRE_TIME, BCRYPT_ROUNDS
 from quizbackend.utils.apierrors import NotFoundException
-from quizbackend.db.db_connector import get_session
-from quizbackend.models.user_model import Token
-from quizbackend.controllers.user_controller import getUserDetails
+from quizbackend.utils.jwks_cache import USER_TOKEN_ALGORITHM, get_user_public_key
+from quizcommon.password_pool import run_password_job, run_password_job_sync
+from quizbackend.db.db_connector import get_async_session
+from quizbackend.models.user_model import Token, User
 
 
-# Password context for hashing and verification
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password context for hashing and verification, hashes of another cost are flagged for a rehash
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# Random bytes of a refresh token
+REFRESH_TOKEN_BYTES = 32
 
 # ===============================================================================================================================
 def generateAccessToken(data: dict, expires_delta: timedelta) -> str:
@@ -29,8 +36,6 @@ def generateAccessToken(data: dict, expires_delta: timedelta) -> str:
         str: Generated access token.
     """
     to_encode = data.copy()
-    # Print user data
-    print("user", data)
     # Calculate expiry time
     expire = datetime.now(timezone.utc) + expires_delta
     to_encode.update({
@@ -41,108 +46,289 @@ def generateAccessToken(data: dict, expires_delta: timedelta) -> str:
     return access_token
     
 # ===============================================================================================================================
-def generateRefreshToken(data: dict, expires_delta: timedelta) -> str:
+async def decodeAccessToken(token: str) -> dict:
     """
-    Generate a refresh token.
+    Verify an access token and decode its claims.
+
+    Tokens signed by user-sphere are verified with its public key named by their kid header, cached
+    from its JWKS, so verifying them needs neither a call to user-sphere nor a database query.
+    Tokens signed by this service are verified with SECRET_KEY.
 
     Args:
-        data (dict): User data to be encoded.
-        expires_delta (timedelta): Expiry time for the token.
+        token (str): Access token.
+
+    Raises:
+        HTTPException: If the token is malformed, expired, or its signature or key ID is unknown.
+
+    Returns:
+        dict: Claims of the token.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+        if header.get("alg") == USER_TOKEN_ALGORITHM:
+            public_key = await get_user_public_key(header.get("kid"))
+            if public_key is None:
+                raise JWTError("Unknown key ID")
+            return jwt.decode(token, public_key, algorithms=[USER_TOKEN_ALGORITHM])
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token.")
+
+
+# ===============================================================================================================================
+def generateRefreshToken() -> str:
+    """
+    Generate a refresh token.
+
+    Refresh tokens are random strings rather than JWTs: only their digest is stored,
+    and the token table says which user they belong to and until when.
 
     Returns:
         str: Generated refresh token.
     """
-    to_encode = data.copy()
-    # Print user data
-    print("user", data)
-    # Calculate expiry time
-    expire = datetime.now(timezone.utc) + expires_delta
-    to_encode.update({
-        "exp": expire
-    })
-    # Encode token with user data and secret key
-    refresh_token = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return refresh_token
+    return secrets.token_urlsafe(REFRESH_TOKEN_BYTES)
+
+
+# ===============================================================================================================================
+def digestRefreshToken(refresh_token: str) -> str:
+    """
+    Compute the digest a refresh token is stored and looked up by.
+
+    Refresh tokens carry enough entropy that an unsalted SHA-256 cannot be reversed,
+    and the fixed-size digest keeps the unique index small.
+
+    Args:
+        refresh_token (str): The refresh token.
+
+    Returns:
+        str: SHA-256 hex digest of the token.
+    """
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+# ===============================================================================================================================
+async def storeRefreshToken(user_id: int, refresh_token: str, session: AsyncSession):
+    """
+    Store the digest of a new refresh token of the user, replacing the previous one, and commit.
+
+    Args:
+        user_id (int): The ID of the user.
+        refresh_token (str): The new refresh token.
+        session (AsyncSession): Database session.
+    """
+    expires_at = datetime.now(timezone.utc) + REFRESH_TOKEN_EXPIRE_TIME
+
+    # Check if a refresh token already exists for the user
+    selected_token = (await session.exec(select(Token).where(Token.user_id == user_id))).first()
+
+    # If no refresh token exists, create a new token entry in the database
+    if selected_token is None:
+        session.add(Token(user_id=user_id, refresh_token_digest=digestRefreshToken(refresh_token), expires_at=expires_at))
+    else:
+        # Replace the existing refresh token
+        selected_token.refresh_token_digest = digestRefreshToken(refresh_token)
+        selected_token.expires_at = expires_at
+    await session.commit()
+
+
+# ===============================================================================================================================
+def normalizeEmail(email: str) -> str:
+    """
+    Normalize an email address, so each address is stored and looked up in one form.
+
+    Args:
+        email (str): The email address as typed by the user.
+
+    Returns:
+        str: The email address without surrounding whitespace, in lower case.
+    """
+    return email.strip().lower()
 
 
 # ===============================================================================================================================
 def passwordIntoHash(password: str) -> str:
     """
-    Hashes the provided password using bcrypt.
+    Hashes the provided password using bcrypt on the password worker pool, for sync callers.
+
+    Args:
+        password (str): The password to be hashed.
+
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
+    Returns:
+        str: The hashed password.
+    """
+    hash_password = run_password_job_sync(pwd_context.hash, password)
+    return hash_password
+
+
+# ===============================================================================================================================
+async def passwordIntoHashAsync(password: str) -> str:
+    """
+    Hashes the provided password using bcrypt on the password worker pool, leaving the event loop free.
 
     Args:
         password (str): The password to be hashed.
 
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
     Returns:
         str: The hashed password.
     """
-    hash_password = pwd_context.hash(password)
+    hash_password = await run_password_job(pwd_context.hash, password)
     return hash_password
 
 
 # ===============================================================================================================================
 def verifyPassword(plainText: str, hashedPassword: str) -> bool:
     """
-    Verifies if the provided plaintext password matches the hashed password.
+    Verifies if the provided plaintext password matches the hashed password on the password worker pool, for sync callers.
 
     Args:
         plainText (str): The plaintext password.
         hashedPassword (str): The hashed password to compare against.
 
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
     Returns:
         bool: True if the passwords match, False otherwise.
     """
-    # Print the plaintext and hashed passwords for debugging
-    print(plainText, hashedPassword)
-
     # Verify if the plaintext password matches the hashed password
-    isPasswordCorrect = pwd_context.verify(plainText, hash=hashedPassword)
+    isPasswordCorrect = run_password_job_sync(pwd_context.verify, plainText, hashedPassword)
+
+    return isPasswordCorrect
+
+
+# ===============================================================================================================================
+async def verifyPasswordAsync(plainText: str, hashedPassword: str) -> bool:
+    """
+    Verifies if the provided plaintext password matches the hashed password on the password worker pool,
+    leaving the event loop free.
+
+    Args:
+        plainText (str): The plaintext password.
+        hashedPassword (str): The hashed password to compare against.
 
-    # Print the result of password verification for debugging
-    print(isPasswordCorrect)
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
+    Returns:
+        bool: True if the passwords match, False otherwise.
+    """
+    # Verify if the plaintext password matches the hashed password
+    isPasswordCorrect = await run_password_job(pwd_context.verify, plainText, hashedPassword)
 
     return isPasswordCorrect
 
 
 # ===============================================================================================================================
-def tokenService(token: Annotated[str, Depends(auth_schema)], session: Annotated[Session, Depends(get_session)]):
+def verifyAndUpdatePassword(plainText: str, hashedPassword: str) -> tuple[bool, str | None]:
+    """
+    Verifies the provided plaintext password on the password worker pool, and rehashes it when the stored
+    hash was made with another cost than BCRYPT_ROUNDS.
+
+    Args:
+        plainText (str): The plaintext password.
+        hashedPassword (str): The hashed password to compare against.
+
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
+    Returns:
+        tuple[bool, str | None]: Whether the passwords match, and the hash to store instead of hashedPassword, if any.
+    """
+    # Verify the password and rehash it in the same job, so an outdated hash costs one trip to the pool
+    isPasswordCorrect, newHash = run_password_job_sync(pwd_context.verify_and_update, plainText, hashedPassword)
+
+    return isPasswordCorrect, newHash
+
+
+# ===============================================================================================================================
+async def verifyAndUpdatePasswordAsync(plainText: str, hashedPassword: str) -> tuple[bool, str | None]:
+    """
+    Verifies the provided plaintext password on the password worker pool, leaving the event loop free,
+    and rehashes it when the stored hash was made with another cost than BCRYPT_ROUNDS.
+
+    Args:
+        plainText (str): The plaintext password.
+        hashedPassword (str): The hashed password to compare against.
+
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
+    Returns:
+        tuple[bool, str | None]: Whether the passwords match, and the hash to store instead of hashedPassword, if any.
+    """
+    # Verify the password and rehash it in the same job, so an outdated hash costs one trip to the pool
+    isPasswordCorrect, newHash = await run_password_job(pwd_context.verify_and_update, plainText, hashedPassword)
+
+    return isPasswordCorrect, newHash
+
+
+# ===============================================================================================================================
+async def tokenService(token: Annotated[str, Depends(auth_schema)], session: Annotated[AsyncSession, Depends(get_async_session)]):
     """
-    Service function to generate an access token from a refresh token.
+    Service function to exchange a refresh token for a new access token and a new refresh token.
+
+    The token is resolved to its user in one join on the unique digest index, then rotated by an UPDATE
+    that only matches the digest just read, so a token is used once and concurrent refreshes with it
+    cannot both succeed.
 
     Args:
         token (str): Refresh token.
-        session (Session): Database session.
+        session (AsyncSession): Database session.
 
     Returns:
-        str: Generated access token.
+        dict: New access and refresh tokens.
 
     Raises:
-        NotFoundException: If the token is not found in the database.
+        NotFoundException: If the token is unknown, already rotated or expired.
         HTTPException: If the access token cannot be generated.
     """
-    print(token)
-    # Retrieve the refresh token from the database
-    db_token = session.exec(select(Token).where(Token.refresh_token == token)).one()
-    
+    now = datetime.now(timezone.utc)
+    token_digest = digestRefreshToken(token)
+
+    # Retrieve the refresh token and its user from the database
+    db_user = (await session.exec(select(Token.id, User.user_id, User.user_name, User.user_email)
+                                  .join(User, User.user_id == Token.user_id)
+                                  .where(Token.refresh_token_digest == token_digest)
+                                  .where(Token.expires_at > now))).first()
+
     # Check if the token exists
-    if not db_token:
+    if db_user is None:
         raise NotFoundException("Token")
 
-    # Get user details based on the refresh token
-    db_user = getUserDetails(token=db_token.refresh_token, session=session)
-    
+    # Replace the refresh token, unless a concurrent refresh already did
+    refresh_token = generateRefreshToken()
+    rotated = await session.execute(update(Token)
+                                    .where(Token.id == db_user.id)
+                                    .where(Token.refresh_token_digest == token_digest)
+                                    .values(refresh_token_digest=digestRefreshToken(refresh_token),
+                                            expires_at=now + REFRESH_TOKEN_EXPIRE_TIME)
+                                    .execution_options(synchronize_session=False))
+    if rotated.rowcount != 1:
+        raise NotFoundException("Token")
+    await session.commit()
+
     # Prepare user data for token generation
     user_data = {
+        "user_id": db_user.user_id,
         "user_name": db_user.user_name,
         "user_email": db_user.user_email
     }
-    
+
     # Generate an access token
     access_token = generateAccessToken(user_data, expires_delta=ACCESS_TOKEN_EXPIRE_TIME)
-    
+
     # Check if the access token was successfully generated
     if not access_token:
         raise HTTPException(status_code=401, detail="Invalid Token ")
 
-    return access_token
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token
+    }
 
@@ -1,35 +1,49 @@
-from sqlmodel import Session, select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlmodel import select, func, case, and_, delete, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from quizbackend.models.user_model import User
-from quizbackend.models.quiz_model import CategoryMarks, CategoryQuizDetails, Question, Category
-from quizbackend.utils.apierrors import NotFoundException
+from quizbackend.models.quiz_model import AnsweredQuestion, CategoryMarks, CategoryQuizDetails, Question, Category
+from quizbackend.models.pydantic_model import QuizAnswerModel
+from quizbackend.controllers.summary_controller import QUIZ_QUESTION_COUNT, get_category_summary
+from quizbackend.utils.apierrors import ConflictsException, InvalidInputException, NotFoundException
+from quizbackend.utils.question_sampler import invalidate_category_pool, sample_question_ids
+from quizbackend.utils.answer_key import get_answer_keys
+from quizcommon.principal_cache import forget_user_principals
+
+# Marks awarded for every correctly answered question
+MARKS_PER_QUESTION = 5
+# Rank of a finished quiz, by the marks each rank stays below; marks above every bound rank TOP_RANK
+RANK_MARK_BOUNDS = [(20, "Poor"), (30, "Better"), (40, "Good")]
+TOP_RANK = "Excellent"
 
 
 # ================================================================================================================================
-def get_categories(session: Session):
+async def get_categories(session: AsyncSession):
     """
     Retrieve all categories from the database.
 
     Args:
-        session (Session): Database session.
+        session (AsyncSession): Database session.
 
     Returns:
         List[Category]: List of all categories.
     """
     # Execute a query to fetch all quiz categories
-    all_categories = session.exec(select(Category)).all()
+    all_categories = (await session.exec(select(Category))).all()
     return all_categories
 
 
 # ================================================================================================================================
-def get_quiz(user_id: int, category_name: str, session: Session):
+async def get_quiz(user_id: int, category_name: str, session: AsyncSession):
     """
     Retrieve a quiz for a specific user and category from the database.
 
     Args:
         user_id (int): The ID of the user for whom the quiz is being retrieved.
         category_name (str): The name of the category for the quiz.
-        session (Session): Database session.
+        session (AsyncSession): Database session.
 
     Returns:
         dict: A dictionary containing details of the quiz, including remaining questions, questions, and choices.
@@ -37,22 +51,35 @@ def get_quiz(user_id: int, category_name: str, session: Session):
         NotFoundException: If the category or quiz details are not found in the database.
     """
     # Retrieve category details
-    categoryDetails = session.exec((select(CategoryQuizDetails).join(Category)
-                                    .where(Category.category_name == category_name)
-                                    .where(CategoryQuizDetails.user_id == user_id))).one()
+    categoryDetails = (await session.exec((select(CategoryQuizDetails).join(Category)
+                                           .where(Category.category_name == category_name)
+                                           .where(CategoryQuizDetails.user_id == user_id)))).one()
     print(categoryDetails)
     # Raise NotFoundException if category details are not found
     if not categoryDetails:
         raise NotFoundException("Category")
-    # Select random questions from the category
-    random_selecting_lang = select(Question).where(Question.category_id ==
-                                                   categoryDetails.category_id).order_by(func.random()).limit(categoryDetails.remaining_questions)
-    questions = session.exec(random_selecting_lang).all()
-    choices = []
-    # Retrieve choices for each question
-    for question in questions:
-        choice = question.choices
-        choices.append(choice)
+    # A resumed quiz never serves the questions already answered, attempt_quiz would refuse them.
+    # Every answer takes a remaining question, so a quiz with all its questions left has none
+    answered_ids = []
+    if categoryDetails.remaining_questions < QUIZ_QUESTION_COUNT:
+        answered_ids = (await session.exec(select(AnsweredQuestion.question_id).where(
+            AnsweredQuestion.quiz_details_id == categoryDetails.id))).all()
+    # Draw random question ids from the cached category pool and fetch them by primary key
+    question_ids = await session.run_sync(lambda sync_session: sample_question_ids(
+        categoryDetails.category_id, categoryDetails.remaining_questions, sync_session, answered_ids))
+    # Load the choices of every question in one batched query instead of one lazy load per question
+    questions = (await session.exec(select(Question).where(Question.question_id.in_(question_ids))
+                                    .options(selectinload(Question.choices)))).all()
+    # The IN lookup returns rows in index order, put them back in the sampled order
+    positions = {question_id: position for position, question_id in enumerate(question_ids)}
+    questions = sorted(questions, key=lambda question: positions[question.question_id])
+    # Reload the pool on the next draw if some sampled questions no longer exist
+    if len(questions) < len(question_ids):
+        invalidate_category_pool(categoryDetails.category_id)
+    # Choices are already loaded, so this loop does not touch the database.
+    # Answer keys stay on the server, grading happens in attempt_quiz and submit_quiz
+    choices = [[choice.model_dump(exclude={"choice_status"}) for choice in question.choices]
+               for question in questions]
 
     return {
         "remaining_questions": categoryDetails.remaining_questions,
@@ -63,40 +90,33 @@ def get_quiz(user_id: int, category_name: str, session: Session):
 
 
 # ================================================================================================================================
-def isAvailableQuiz(category_name: str, session: Session):
+async def isAvailableQuiz(category_name: str, session: AsyncSession):
     """
     Check if a quiz is available for a specific category.
 
     Args:
         category_name (str): The name of the category for which quiz availability is checked.
-        session (Session): Database session.
+        session (AsyncSession): Database session.
 
     Returns:
         bool: True if a quiz is available, False otherwise.
-    Raises:
-        NotFoundException: If the quiz is not found for the given category.
     """
-    # Retrieve quiz for the category
-    quiz = session.exec(select(Question).join(Category).where(
-        Category.category_name == category_name)).all()
-    # Raise NotFoundException if quiz is not found
-    if quiz is None:
-        raise NotFoundException("Quiz")
-    # Check if number of questions is greater than 9
-    if len(quiz) > 9:
-        return True
-    return False
+    # Read the availability flag kept in the category summary instead of loading every question
+    summary = await session.run_sync(lambda sync_session: get_category_summary(category_name, sync_session))
+    if summary is None:
+        return False
+    return summary.is_available
 
 
 # ================================================================================================================================
-def getQuizDetails(user_id: int, category_name: str, session: Session):
+async def getQuizDetails(user_id: int, category_name: str, session: AsyncSession):
     """
     Get quiz details for a user and a specific category.
 
     Args:
         user_id (int): The ID of the user.
         category_name (str): The name of the category.
-        session (Session): Database session.
+        session (AsyncSession): Database session.
 
     Returns:
         Union[str, dict]: Quiz details if available, otherwise a message indicating quiz unavailability.
@@ -104,21 +124,21 @@ def getQuizDetails(user_id: int, category_name: str, session: Session):
         NotFoundException: If the category is not found.
     """
     # Check if quiz is available for the category
-    is_available = isAvailableQuiz(category_name, session)
+    is_available = await isAvailableQuiz(category_name, session)
     if not is_available:
         return f"Quiz is not available for {category_name}"
 
     # Retrieve category details
-    category = session.exec(select(Category).where(
-        Category.category_name == category_name)).one()
+    category = (await session.exec(select(Category).where(
+        Category.category_name == category_name))).one()
     if not category:
         raise NotFoundException("Category")
 
     # Retrieve category quiz details for the user
-    category_details = session.exec((select(CategoryQuizDetails, CategoryMarks)
-                                     .where(CategoryMarks.category_id == category.category_id)
-                                     .where(CategoryQuizDetails.category_id == category.category_id)
-                                     .where(CategoryQuizDetails.user_id == user_id)))
+    category_details = await session.exec((select(CategoryQuizDetails, CategoryMarks)
+                                           .where(CategoryMarks.category_id == category.category_id)
+                                           .where(CategoryQuizDetails.category_id == category.category_id)
+                                           .where(CategoryQuizDetails.user_id == user_id)))
 
     # Process category details
     for categoryDetails, categoryMarks in category_details:
@@ -142,7 +162,7 @@ def getQuizDetails(user_id: int, category_name: str, session: Session):
     category_details_table = CategoryQuizDetails(
         user_id=user_id, category_id=category.category_id, obtaining_marks=0)
     session.add(category_details_table)
-    session.commit()
+    await session.commit()
     return {
         "isAttempt": False,
         "quizDetails": f"You have never attempted {category.category_name} questions"
@@ -151,138 +171,299 @@ def getQuizDetails(user_id: int, category_name: str, session: Session):
 
 
 # ================================================================================================================================
-def attempt_quiz(session: Session, user_id: int, category_id: int, quiz_numbers: int, isFinished: bool):
+def rank_for_marks(obtaining_marks):
     """
-    Attempt a quiz for a specific user and category.
+    Build the SQL expression that ranks a user by the marks obtained in a quiz.
 
     Args:
-        session (Session): Database session.
+        obtaining_marks: SQL expression holding the obtained marks.
+
+    Returns:
+        Case: Rank expression evaluated by the database.
+    """
+    return case(*[(obtaining_marks < bound, rank) for bound, rank in RANK_MARK_BOUNDS], else_=TOP_RANK)
+
+
+# ================================================================================================================================
+async def record_quiz_progress(session: AsyncSession, user_id: int, category_id: int, gained_marks: int, answered_questions: int, isFinished: bool):
+    """
+    Apply quiz progress with in-database increments, without committing.
+
+    The quiz details row is updated in one UPDATE ... RETURNING statement, and the user's total points in a
+    second statement of the same transaction, so concurrent submissions cannot overwrite each other.
+
+    Args:
+        session (AsyncSession): Database session.
         user_id (int): The ID of the user.
         category_id (int): The ID of the category.
-        quiz_numbers (int): Number of quiz questions attempted.
+        gained_marks (int): Marks obtained by the submitted answers.
+        answered_questions (int): Number of submitted answers.
         isFinished (bool): Indicates if the quiz is finished.
 
     Returns:
-        str: A message indicating the result of the quiz attempt.
+        int | None: Obtained marks after the update, None if there is no unfinished quiz with that many questions left.
     """
-    # Select category details for the user
-    select_category = (select(CategoryQuizDetails, CategoryMarks)
-                       .where(CategoryMarks.category_id == category_id)
-                       .where(CategoryQuizDetails.category_id == category_id)
-                       .where(CategoryQuizDetails.user_id == user_id))
-    category_details = session.exec(select_category)
+    obtaining_marks = CategoryQuizDetails.obtaining_marks + gained_marks
+    category_marks = (select(CategoryMarks.marks)
+                      .where(CategoryMarks.category_id == category_id)
+                      .limit(1).scalar_subquery())
+    progress_values = {
+        "obtaining_marks": obtaining_marks,
+        "remaining_questions": CategoryQuizDetails.remaining_questions - answered_questions,
+        "percentage": obtaining_marks * 100 // func.nullif(category_marks, 0)
+    }
+    if isFinished:
+        # Determine user's rank based on obtained marks in the same statement
+        progress_values.update({
+            "is_finished": True,
+            "rank": rank_for_marks(obtaining_marks)
+        })
+
+    # The is_finished filter makes a second finishing submission a no-op instead of adding points twice,
+    # and the remaining_questions one keeps concurrent answers from going past the end of the quiz
+    progress = (await session.execute(update(CategoryQuizDetails)
+                                      .where(CategoryQuizDetails.user_id == user_id)
+                                      .where(CategoryQuizDetails.category_id == category_id)
+                                      .where(CategoryQuizDetails.is_finished == False)
+                                      .where(CategoryQuizDetails.remaining_questions >= answered_questions)
+                                      .values(**progress_values)
+                                      .returning(CategoryQuizDetails.obtaining_marks))).first()
+    if progress is None:
+        return None
+
+    if isFinished:
+        # Update user's total points
+        await session.execute(update(User)
+                              .where(User.user_id == user_id)
+                              .values(total_points=User.total_points + progress.obtaining_marks))
+    return progress.obtaining_marks
+
+
+# ================================================================================================================================
+async def attempt_quiz(session: AsyncSession, user_id: int, category_id: int, question_id: int, choice_id: int, isFinished: bool):
+    """
+    Attempt a quiz question for a specific user and category.
+
+    Args:
+        session (AsyncSession): Database session.
+        user_id (int): The ID of the user.
+        category_id (int): The ID of the category.
+        question_id (int): The ID of the answered question.
+        choice_id (int): The ID of the chosen choice.
+        isFinished (bool): Indicates if the quiz is finished.
+
+    Raises:
+        InvalidInputException: If the question is not in the category.
+        ConflictsException: If the question has already been answered in this quiz.
+
+    Returns:
+        dict: A message indicating the result of the quiz attempt and whether the answer was correct.
+    """
+    # Grade the answer on the server instead of trusting marks sent by the client
+    is_correct = await grade_answers(category_id, [QuizAnswerModel(
+        question_id=question_id, choice_id=choice_id)], session) == 1
+    gained_marks = MARKS_PER_QUESTION if is_correct else 0
+
+    quiz_details = (await session.exec(select(CategoryQuizDetails.id, CategoryQuizDetails.is_finished)
+                                       .where(CategoryQuizDetails.category_id == category_id)
+                                       .where(CategoryQuizDetails.user_id == user_id))).first()
+    if quiz_details and not quiz_details.is_finished:
+        # Record the answer first, its primary key refuses a second answer to the question, even a concurrent one
+        session.add(AnsweredQuestion(quiz_details_id=quiz_details.id, question_id=question_id))
+        try:
+            await session.flush()
+        except IntegrityError:
+            await session.rollback()
+            raise ConflictsException(f"answer to question {question_id}")
+        obtaining_marks = await record_quiz_progress(
+            session, user_id, category_id, gained_marks, 1, isFinished)
+        if obtaining_marks is not None:
+            await session.commit()
+            if isFinished:
+                # Cached principals still hold the total points before the quiz
+                forget_user_principals(user_id)
+                return {"message": f"You have attempted {category_id} category quiz", "is_correct": is_correct}
+            return {"message": f"Your Quiz details for {category_id} category has been updated successfully", "is_correct": is_correct}
+        # The quiz was finished meanwhile, the recorded answer is dropped with the transaction
+        await session.rollback()
+
+    if quiz_details:
+        return {"message": f"You can't attempt {category_id} category quiz, because you have already attempted", "is_correct": is_correct}
+
+    # Add quiz details for the user if not present
+    quiz_details_table = CategoryQuizDetails(
+        category_id=category_id, user_id=user_id)
+    session.add(quiz_details_table)
+    await session.commit()
+    return {"message": f"Your Quiz details for {category_id} category has been added to the database", "is_correct": is_correct}
 
-    # Process category details
-    for categoryDetails, categoryMarks in category_details:
-        if categoryDetails:
-            if not categoryDetails.is_finished:
-                # Update quiz details for the user
-                categoryDetails.obtaining_marks += quiz_numbers
-                categoryDetails.remaining_questions -= 1
-                categoryDetails.percentage = int(
-                    (categoryDetails.obtaining_marks/categoryMarks.marks) * 100)
-                # Check if the quiz is finished
-                if isFinished:
-                    categoryDetails.is_finished = True
-                    # Determine user's rank based on obtained marks
-                    if categoryDetails.obtaining_marks < 20:
-                        categoryDetails.rank = "Poor"
-                    elif categoryDetails.obtaining_marks < 30:
-                        categoryDetails.rank = "Better"
-                    elif categoryDetails.obtaining_marks < 40:
-                        categoryDetails.rank = "Good"
-                    else:
-                        categoryDetails.rank = "Excellent"
-                    session.commit()
-                    session.refresh(categoryDetails)
-                    # Update user's total points
-                    user = session.exec(select(User).where(
-                        User.user_id == user_id)).one()
-                    user.total_points += categoryDetails.obtaining_marks
-                    session.commit()
-                    return f"You have attempted {category_id} category quiz"
-                session.commit()
-                return f"Your Quiz details for {category_id} category has been updated successfully"
-            return f"You can't attempt {category_id} category quiz, because you have already attempted"
-    else:
-        # Add quiz details for the user if not present
-        quiz_details_table = CategoryQuizDetails(category_id=category_id,
-                                                 user_id=user_id, total_numbers=quiz_numbers)
-        session.add(quiz_details_table)
-        session.commit()
-    return f"Your Quiz details for {category_id} category has been added to the database"
+
+# ================================================================================================================================
+async def grade_answers(category_id: int, answers: list[QuizAnswerModel], session: AsyncSession) -> int:
+    """
+    Count the correctly answered questions of a category.
+
+    Answer keys come from the in-memory cache, and all cache misses are loaded in one query,
+    whatever the number of answers.
+
+    Args:
+        category_id (int): The ID of the category.
+        answers (list[QuizAnswerModel]): Submitted question and choice ID pairs, one per question.
+        session (AsyncSession): Database session.
+
+    Raises:
+        InvalidInputException: If an answer is to a question that is not in the category.
+
+    Returns:
+        int: Number of correct answers.
+    """
+    answer_keys = await session.run_sync(lambda sync_session: get_answer_keys(
+        {answer.question_id for answer in answers}, sync_session))
+    correct_answers = 0
+    for answer in answers:
+        answer_key = answer_keys.get(answer.question_id)
+        # Answers to questions of another category are refused, they would use up the quiz without counting
+        if not answer_key or answer_key[0] != category_id:
+            raise InvalidInputException("question")
+        if answer.choice_id in answer_key[1]:
+            correct_answers += 1
+    return correct_answers
+
+
+# ================================================================================================================================
+async def submit_quiz(session: AsyncSession, user_id: int, category_id: int, answers: list[QuizAnswerModel]):
+    """
+    Grade every answer of a quiz at once and record the final result.
+
+    Questions already answered through attempt_quiz keep their recorded grade, so only the others are graded.
+    The answers, quiz details, rank and user's total points are written in a single transaction.
+
+    Args:
+        session (AsyncSession): Database session.
+        user_id (int): The ID of the user.
+        category_id (int): The ID of the category.
+        answers (list[QuizAnswerModel]): Submitted question and choice ID pairs.
+
+    Raises:
+        InvalidInputException: If more questions are answered than the quiz has left, or a question is not in the category.
+
+    Returns:
+        dict: Result message, number of correct answers and obtained marks.
+    """
+    quiz_details = (await session.exec(select(CategoryQuizDetails)
+                                       .where(CategoryQuizDetails.category_id == category_id)
+                                       .where(CategoryQuizDetails.user_id == user_id))).first()
+    if quiz_details is None:
+        # Add quiz details for the user if not present, then record the result on them
+        quiz_details = CategoryQuizDetails(category_id=category_id, user_id=user_id)
+        session.add(quiz_details)
+        await session.flush()
+    elif quiz_details.is_finished:
+        return {
+            "message": f"You can't attempt {category_id} category quiz, because you have already attempted",
+            "correct_answers": 0,
+            "obtaining_marks": None
+        }
+
+    # Keep one answer per question, leaving out the questions answered before, so no answer is counted twice
+    answered_ids = set((await session.exec(select(AnsweredQuestion.question_id)
+                                           .where(AnsweredQuestion.quiz_details_id == quiz_details.id))).all())
+    new_answers = list({answer.question_id: answer for answer in answers
+                        if answer.question_id not in answered_ids}.values())
+    if len(new_answers) > quiz_details.remaining_questions:
+        raise InvalidInputException("number of answers")
+
+    correct_answers = await grade_answers(category_id, new_answers, session)
+    gained_marks = correct_answers * MARKS_PER_QUESTION
+    session.add_all([AnsweredQuestion(quiz_details_id=quiz_details.id, question_id=answer.question_id)
+                     for answer in new_answers])
+    try:
+        await session.flush()
+        obtaining_marks = await record_quiz_progress(
+            session, user_id, category_id, gained_marks, len(new_answers), True)
+    except IntegrityError:
+        # A concurrent attempt answered one of the questions first
+        obtaining_marks = None
+    if obtaining_marks is None:
+        await session.rollback()
+        return {
+            "message": f"You can't attempt {category_id} category quiz, because you have already attempted",
+            "correct_answers": 0,
+            "obtaining_marks": None
+        }
+
+    await session.commit()
+    # Cached principals still hold the total points before the quiz
+    forget_user_principals(user_id)
+    return {
+        "message": f"You have attempted {category_id} category quiz",
+        "correct_answers": correct_answers,
+        "obtaining_marks": obtaining_marks
+    }
 
 
 # ================================================================================================================================
-def delete_quiz(user_id: int, category_id: int, session: Session):
+async def delete_quiz(user_id: int, category_id: int, session: AsyncSession):
     """
     Delete a quiz for a specific user and category.
 
     Args:
         user_id (int): The ID of the user.
         category_id (int): The ID of the category.
-        session (Session): Database session.
+        session (AsyncSession): Database session.
 
     Returns:
         str: A message indicating the result of the quiz deletion.
     """
     # Fetch quiz details for the user and category
-    quiz_details = session.exec(select(User, CategoryQuizDetails)
-                                .where(User.user_id == user_id)
-                                .where(CategoryQuizDetails.category_id == category_id)
-                                .where(CategoryQuizDetails.user_id == user_id))
+    quiz_details = await session.exec(select(User, CategoryQuizDetails)
+                                      .where(User.user_id == user_id)
+                                      .where(CategoryQuizDetails.category_id == category_id)
+                                      .where(CategoryQuizDetails.user_id == user_id))
     # Process quiz details
     for user, category in quiz_details:
         if user and category:
-            # Update user's total points and delete quiz details
+            # Update user's total points and delete quiz details, with the questions answered in them
             user.total_points -= category.obtaining_marks
-            session.delete(category)
-            session.commit()
+            await session.execute(delete(AnsweredQuestion).where(AnsweredQuestion.quiz_details_id == category.id))
+            await session.delete(category)
+            await session.commit()
+            forget_user_principals(user_id)
             return f"Quiz has been deleted."
         else:
             raise NotFoundException("User and Category")
 
 
 # ================================================================================================================================
-def get_categories_details(user_id: int, session: Session):
+async def get_categories_details(user_id: int, session: AsyncSession):
     """
     Get details of categories attempted by a user.
 
     Args:
         user_id (int): The ID of the user.
-        session (Session): Database session.
+        session (AsyncSession): Database session.
 
     Returns:
         dict: Details of categories attempted by the user and total marks across all categories.
     """
+    # One LEFT JOIN per table and an aggregate per category instead of one query per category
+    finished = func.max(case((CategoryQuizDetails.is_finished, 1), else_=0))
+    categories = await session.exec(select(Category.category_name, finished, func.max(CategoryMarks.marks))
+                                    .outerjoin(CategoryQuizDetails, and_(CategoryQuizDetails.category_id == Category.category_id,
+                                                                         CategoryQuizDetails.user_id == user_id))
+                                    .outerjoin(CategoryMarks, CategoryMarks.category_id == Category.category_id)
+                                    .group_by(Category.category_id, Category.category_name)
+                                    .order_by(Category.category_id))
+
     details = []
     all_category_marks = 0
-    categories = session.exec(select(Category))
-    for category in categories:
-        # Query database to check if user attempted the category
-        category_details = session.exec(select(CategoryQuizDetails)
-                                        .where(CategoryQuizDetails.user_id == user_id)
-                                        .where(CategoryQuizDetails.category_id == category.category_id)).first()
-
-        if category_details:
-            if category_details.is_finished:
-                # If the category is attempted and finished, retrieve its marks
-                category_marks = session.exec(select(CategoryMarks).where(
-                    CategoryMarks.category_id == category.category_id)).one()
-                details.append({
-                    "category_name": category.category_name,
-                    "isAttempt": True})
-                all_category_marks += category_marks.marks
-            else:
-                # If attempted but not finished
-                details.append({
-                    "category_name": category.category_name,
-                    "isAttempt": False})
-        else:
-            # If category not attempted
-            details.append({
-                "category_name": category.category_name,
-                "isAttempt": False})
+    for category_name, is_finished, category_marks in categories:
+        # Only finished categories count towards the total marks
+        details.append({
+            "category_name": category_name,
+            "isAttempt": bool(is_finished)})
+        if is_finished:
+            all_category_marks += category_marks or 0
     return {
         "allCategoryDetails": details,
         "allCategoryMarks": all_category_marks
@@ -0,0 +1,144 @@
+from sqlmodel import Session, select, func, update
+
+from quizbackend.models.quiz_model import Category, CategoryMarks, CategorySummary, Question
+
+# Number of questions a category needs before its quiz becomes available
+QUIZ_QUESTION_COUNT = 10
+
+
+# ================================================================================================================================
+def create_category_summary(category_id: int, marks: int | None, session: Session) -> CategorySummary:
+    """
+    Add the summary row of a newly created category to the session.
+
+    Args:
+        category_id (int): The ID of the category.
+        marks (int | None): Total marks of the category, the model default is kept when missing.
+        session (Session): Database session.
+
+    Returns:
+        CategorySummary: The summary row, committed together with the caller's changes.
+    """
+    summary = CategorySummary(category_id=category_id)
+    if marks is not None:
+        summary.marks = marks
+    session.add(summary)
+    return summary
+
+
+# ================================================================================================================================
+def count_category_questions(category_id: int, session: Session) -> tuple[int, int | None]:
+    """
+    Count the questions of a category and read its total marks.
+
+    Args:
+        category_id (int): The ID of the category.
+        session (Session): Database session.
+
+    Returns:
+        tuple[int, int | None]: Number of questions, and total marks or None when the category has none.
+    """
+    question_count = session.exec(select(func.count()).select_from(Question).where(
+        Question.category_id == category_id)).one()
+    marks = session.exec(select(CategoryMarks.marks).where(
+        CategoryMarks.category_id == category_id)).first()
+    return question_count, marks
+
+
+# ================================================================================================================================
+def rebuild_category_summary(category_id: int, session: Session) -> CategorySummary:
+    """
+    Compute the summary of a category from its questions and marks and store it.
+
+    Used once for categories created before summaries existed; afterwards the row is kept up to date incrementally.
+
+    Args:
+        category_id (int): The ID of the category.
+        session (Session): Database session.
+
+    Returns:
+        CategorySummary: The rebuilt summary row.
+    """
+    question_count, marks = count_category_questions(category_id, session)
+
+    summary = session.get(CategorySummary, category_id)
+    if summary is None:
+        summary = create_category_summary(category_id, marks, session)
+    elif marks is not None:
+        summary.marks = marks
+    summary.question_count = question_count
+    summary.is_available = question_count >= QUIZ_QUESTION_COUNT
+    session.add(summary)
+    return summary
+
+
+# ================================================================================================================================
+def change_question_count(category_id: int, delta: int, session: Session):
+    """
+    Shift the question count of a category, for added (positive delta) or deleted (negative delta) questions.
+
+    The counter is updated in SQL so concurrent admin writes do not overwrite each other.
+
+    Args:
+        category_id (int): The ID of the category.
+        delta (int): Number of questions added, negative for deletions.
+        session (Session): Database session.
+    """
+    new_count = CategorySummary.question_count + delta
+    result = session.execute(update(CategorySummary)
+                             .where(CategorySummary.category_id == category_id)
+                             .values(question_count=new_count,
+                                     is_available=new_count >= QUIZ_QUESTION_COUNT))
+    # Categories created before summaries existed get their row on first change
+    if result.rowcount == 0:
+        rebuild_category_summary(category_id, session)
+
+
+# ================================================================================================================================
+def set_category_marks(category_id: int, marks: int, session: Session):
+    """
+    Store new total marks in the summary of a category.
+
+    Args:
+        category_id (int): The ID of the category.
+        marks (int): Total marks of the category.
+        session (Session): Database session.
+    """
+    result = session.execute(update(CategorySummary)
+                             .where(CategorySummary.category_id == category_id)
+                             .values(marks=marks))
+    if result.rowcount == 0:
+        rebuild_category_summary(category_id, session)
+
+
+# ================================================================================================================================
+def get_category_summary(category_name: str, session: Session) -> CategorySummary | None:
+    """
+    Get the summary of a category by name, without writing to the database.
+
+    A category without a summary row gets one computed from its questions, which is not stored: concurrent
+    first reads would race to insert it. The row is stored by the next admin change to the category.
+
+    Args:
+        category_name (str): The name of the category.
+        session (Session): Database session.
+
+    Returns:
+        CategorySummary | None: Summary of the category, None if the category does not exist.
+    """
+    # A single row joined through the category primary key, whatever the size of the category,
+    # outer joined so a missing summary needs no second category lookup
+    category = session.exec(select(Category.category_id, CategorySummary).outerjoin(CategorySummary).where(
+        Category.category_name == category_name)).first()
+    if category is None:
+        return None
+    category_id, summary = category
+    if summary:
+        return summary
+
+    question_count, marks = count_category_questions(category_id, session)
+    summary = CategorySummary(category_id=category_id, question_count=question_count,
+                              is_available=question_count >= QUIZ_QUESTION_COUNT)
+    if marks is not None:
+        summary.marks = marks
+    return summary
@@ -1,13 +1,16 @@
 from typing import Annotated
-from fastapi import Body, Depends, HTTPException, Response
-from sqlmodel import Session, select
+from fastapi import Body, Depends, Response
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 
-from quizbackend.db.db_connector import get_session, DB_SESSION
+from quizbackend.db.db_connector import get_async_session, ASYNC_DB_SESSION
 from quizbackend.models.user_model import UpdateUserModel, User, Token
 from quizbackend.utils.apierrors import InvalidInputException, NotFoundException, ConflictsException
-from quizbackend.settings import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_TIME, REFRESH_TOKEN_EXPIRE_TIME
+from quizbackend.settings import ACCESS_TOKEN_EXPIRE_TIME, REFRESH_TOKEN_EXPIRE_TIME
+from quizcommon.principal_cache import (
+    forget_user_principals, get_principal, get_principal_generation, remember_principal)
 import quizbackend.controllers.auth_controller as auth
 
 # define a Bearer token schema on "/token"  url
@@ -15,55 +18,58 @@ auth_schema = OAuth2PasswordBearer(tokenUrl="/token")
 
 
 # =================================================================================================================================
-def signup_func(user_name: str, user_email: str, user_password: str, session: Session):
+async def signup_func(user_name: str, user_email: str, user_password: str, session: AsyncSession):
     """
     Register a new user.
 
+    The email is normalized and checked with one indexed lookup; the unique index on the email
+    decides between concurrent signups of the same address.
+
     Args:
         user_name (str): The name of the user.
         user_email (str): The email of the user.
         user_password (str): The password of the user.
-        session (Session): Database session.
+        session (AsyncSession): Database session.
 
     Raises:
-        ConflictsException: Raised if the email or password already exists.
+        ConflictsException: Raised if the email already exists.
 
     Returns:
         dict: Data of the logged-in user.
     """
-    users = session.exec(select(User))
-
-    for user in users:
-        password_exist = auth.verifyPassword(user_password, user.user_password)
-        if user.user_email == user_email and password_exist:
-            raise ConflictsException("email and password")
-        elif user.user_email == user_email:
-            raise ConflictsException("email")
-        elif password_exist:
-            raise ConflictsException("password")
+    user_email = auth.normalizeEmail(user_email)
+    # Check the email before hashing, so a taken address costs no bcrypt round
+    email_exist = (await session.exec(select(User.user_id).where(
+        User.user_email == user_email))).first()
+    if email_exist is not None:
+        raise ConflictsException("email")
 
     # Hash the password before storing it
-    hash_password = auth.passwordIntoHash(user_password)
+    hash_password = await auth.passwordIntoHashAsync(user_password)
     user = User(user_name=user_name,
                 user_email=user_email, user_password=hash_password)
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # Another signup took the email between the check and the insert
+        await session.rollback()
+        raise ConflictsException("email")
+    await session.refresh(user)
     # Login the newly registered user and return the data
-    data = logIn_func(user.user_email, user_password, session)
-    print("data from login", data)
+    data = await logIn_func(user.user_email, user_password, session)
     return data
 
 
 # =================================================================================================================================
-def logIn_func(user_email: str, user_password: str, session: Session):
+async def logIn_func(user_email: str, user_password: str, session: AsyncSession):
     """
     Log in a user.
 
     Args:
         user_email (str): The email of the user.
         user_password (str): The password of the user.
-        session (Session): Database session.
+        session (AsyncSession): Database session.
 
     Raises:
         InvalidInputException: Raised if the email or password is invalid.
@@ -72,24 +78,29 @@ def logIn_func(user_email: str, user_password: str, session: Session):
     Returns:
         dict: Access and refresh tokens for the user.
     """
-    # Retrieve the user from the database based on the provided email
-    user_exist = session.exec(select(User).where(
-        User.user_email == user_email)).first()
+    # Retrieve the user from the database based on the provided email, stored normalized
+    user_exist = (await session.exec(select(User).where(
+        User.user_email == auth.normalizeEmail(user_email)))).first()
 
     # Check if the user exists
     if not user_exist:
         raise InvalidInputException("Email")
 
     # Verify the provided password against the hashed password stored in the database
-    pass_verification_status = auth.verifyPassword(
+    pass_verification_status, new_hash = await auth.verifyAndUpdatePasswordAsync(
         user_password, user_exist.user_password)
 
     # If password verification fails, raise an exception
     if not pass_verification_status:
         raise InvalidInputException("Password")
 
+    # Store the hash at the configured cost, saved with the token below
+    if new_hash:
+        user_exist.user_password = new_hash
+
     # Prepare user data for token generation
     user_data = {
+        "user_id": user_exist.user_id,
         "user_name": user_exist.user_name,
         "user_email": user_exist.user_email
     }
@@ -97,26 +108,18 @@ def logIn_func(user_email: str, user_password: str, session: Session):
     # Generate access and refresh tokens
     access_token = auth.generateAccessToken(
         data=user_data, expires_delta=ACCESS_TOKEN_EXPIRE_TIME)
-    refresh_token = auth.generateRefreshToken(
-        data=user_data, expires_delta=REFRESH_TOKEN_EXPIRE_TIME)
+    refresh_token = auth.generateRefreshToken()
 
     # If tokens are not generated, raise an exception
     if not (access_token or refresh_token):
         raise NotFoundException("Token")
 
-    # Check if a refresh token already exists for the user
-    selected_token = session.exec(select(Token).where(
-        Token.user_id == user_exist.user_id)).first()
+    # Replace the user's refresh token, saving the rehashed password with it
+    await auth.storeRefreshToken(user_exist.user_id, refresh_token, session)
 
-    # If no refresh token exists, create a new token entry in the database
-    if selected_token is None:
-        token = Token(user_id=user_exist.user_id, refresh_token=refresh_token)
-        session.add(token)
-        session.commit()
-    else:
-        # Update the existing refresh token
-        selected_token.refresh_token = refresh_token
-        session.commit()
+    # Cached principals of older tokens still hold the previous hash
+    if new_hash:
+        forget_user_principals(user_exist.user_id)
 
     # Return the access and refresh tokens
     return {
@@ -126,13 +129,13 @@ def logIn_func(user_email: str, user_password: str, session: Session):
 
 
 # =================================================================================================================================
-def logout_func(user_id: int, session: DB_SESSION):
+async def logout_func(user_id: int, session: ASYNC_DB_SESSION):
     """
     Log out a user by deleting their token from the database.
 
     Args:
         user_id (int): The ID of the user.
-        session (Annotated[Session, Depends(get_session)]): Database session.
+        session (Annotated[AsyncSession, Depends(get_async_session)]): Database session.
 
     Raises:
         NotFoundException: Raised if the user or token is not found.
@@ -145,29 +148,29 @@ def logout_func(user_id: int, session: DB_SESSION):
         raise NotFoundException("User")
 
     # Retrieve the token associated with the user
-    token_table = session.exec(
-        select(Token).where(Token.user_id == user_id)).one_or_none()
+    token_table = (await session.exec(
+        select(Token).where(Token.user_id == user_id))).one_or_none()
 
     # If no token is found, raise an exception
     if not token_table:
         raise NotFoundException("Token")
 
     # Delete the token from the database
-    session.delete(token_table)
-    session.commit()
+    await session.delete(token_table)
+    await session.commit()
 
     # Return a confirmation message
     return "Token has been deleted successfully"
 
 
 # =================================================================================================================================
-def deleteUser_func(userId: int, session: Session):
+async def deleteUser_func(userId: int, session: AsyncSession):
     """
     Delete a user from the database.
 
     Args:
         userId (int): The ID of the user to be deleted.
-        session (Session): Database session.
+        session (AsyncSession): Database session.
 
     Raises:
         NotFoundException: Raised if the user is not found.
@@ -176,98 +179,115 @@ def deleteUser_func(userId: int, session: Session):
         str: Confirmation message indicating successful deletion of the user.
     """
     # Retrieve the user from the database
-    user = session.get(User, userId)
+    user = await session.get(User, userId)
 
     # If user is not found, raise an exception
     if not user:
         raise NotFoundException("User")
 
-    # Delete the user from the database
-    session.delete(user)
-    session.commit()
+    # Delete the user from the database, with its refresh token which could no longer be used
+    await session.execute(delete(Token).where(Token.user_id == userId))
+    await session.delete(user)
+    await session.commit()
+    forget_user_principals(userId)
 
     # Return a confirmation message
     return "User has been deleted successfully"
 
 
 # =================================================================================================================================
-def getUserDetails(token: Annotated[str, Depends(auth_schema)], session: Session = Depends(get_session)):
+async def getUserDetails(token: Annotated[str, Depends(auth_schema)], session: AsyncSession = Depends(get_async_session)):
     """
     Get user details based on the provided token.
 
     Args:
         token (str): Authentication token obtained from the client.
-        session (Session, optional): Database session. Defaults to Depends(get_session).
+        session (AsyncSession, optional): Database session. Defaults to Depends(get_async_session).
 
     Raises:
         NotFoundException: Raised if the token or user is not found.
         HTTPException: Raised if the token is invalid.
 
     Returns:
-        User: User details fetched from the database.
+        User: User details, from the principal cache when the token was seen recently.
     """
     # Check if token is provided
     if not token:
         raise NotFoundException("Token")
 
-    try:
-        # Decode the token to extract user information
-        decoded_token = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token.")
-
-    # Extract user email from the decoded token
-    user_email = decoded_token["user_email"]
+    # A cached token was verified and its user read before, neither is needed again
+    principal = get_principal(token)
+    if principal:
+        return User(**principal["user"])
+    generation = get_principal_generation()
 
-    # If user email is not found, raise an exception
-    if not user_email:
-        raise NotFoundException("User")
+    # Verify the token to extract user information
+    decoded_token = await auth.decodeAccessToken(token)
 
-    # Query the database to fetch user details based on the email
-    db_user = session.exec(select(User).where(
-        User.user_email == user_email)).first()
+    if "user_id" in decoded_token:
+        # Query the database to fetch user details based on the ID
+        db_user = await session.get(User, decoded_token["user_id"])
+    else:
+        # Tokens issued before the user ID claim only name the email
+        user_email = decoded_token["user_email"]
+        if not user_email:
+            raise NotFoundException("User")
+        db_user = (await session.exec(select(User).where(
+            User.user_email == user_email))).first()
 
     # If user is not found in the database, raise an exception
     if not db_user:
         raise NotFoundException("User")
 
+    remember_principal(token, decoded_token, db_user, generation)
     return db_user
 
 
-def verifyUser(token: Annotated[str, Depends(auth_schema)], session: DB_SESSION):
+async def verifyUser(token: Annotated[str, Depends(auth_schema)], session: ASYNC_DB_SESSION):
     # Check if token is provided
     if not token:
         raise NotFoundException("Token")
-    try:
-        # Decode the token to extract user information
-        decoded_token = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token.")
+    if get_principal(token):
+        return True
+    # Verify the token to extract user information
+    decoded_token = await auth.decodeAccessToken(token)
+    # A token carrying its user ID is signed proof of the user, no lookup is needed until it expires
+    if "user_id" in decoded_token:
+        return True
 
+    generation = get_principal_generation()
     user_email = decoded_token["user_email"]
-    db_user = session.exec(select(User).where(
-        User.user_email == user_email)).one_or_none()
+    db_user = (await session.exec(select(User).where(
+        User.user_email == user_email))).one_or_none()
 
     if db_user:
+        remember_principal(token, decoded_token, db_user, generation)
         return True
     return False
 
 
-def updateUserDetails(response: Response, user_Details: UpdateUserModel, verify_user: Annotated[bool, Depends(verifyUser)], session: DB_SESSION):
+async def updateUserDetails(response: Response, user_Details: UpdateUserModel, verify_user: Annotated[bool, Depends(verifyUser)], session: ASYNC_DB_SESSION):
     print(verify_user)
     # return user_Details
     print(user_Details)
     if not verify_user:
         raise NotFoundException("User")
-    user = session.get(User, user_Details.user_id)
+    user = await session.get(User, user_Details.user_id)
     if user:
-        user.user_email = user_Details.user_email
+        user.user_email = auth.normalizeEmail(user_Details.user_email)
         user.user_name = user_Details.user_name
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        try:
+            await session.commit()
+        except IntegrityError:
+            # The new email belongs to another user
+            await session.rollback()
+            raise ConflictsException("email")
+        forget_user_principals(user.user_id)
+        await session.refresh(user)
         # Prepare user data for token generation
         user_data = {
+            "user_id": user.user_id,
             "user_name": user.user_name,
             "user_email": user.user_email
         }
@@ -275,22 +295,14 @@ def updateUserDetails(response: Response, user_Details: UpdateUserModel, verify_
         # Generate access and refresh tokens
         access_token = auth.generateAccessToken(
             data=user_data, expires_delta=ACCESS_TOKEN_EXPIRE_TIME)
-        refresh_token = auth.generateRefreshToken(
-            data=user_data, expires_delta=REFRESH_TOKEN_EXPIRE_TIME)
+        refresh_token = auth.generateRefreshToken()
 
         # If tokens are not generated, raise an exception
         if not (access_token or refresh_token):
             raise NotFoundException("Token")
 
-        # Check if a refresh token already exists for the user
-        selected_token = session.exec(select(Token).where(
-            Token.user_id == user.user_id)).one_or_none()
-
-        # If no refresh token exists, create a new token entry in the database
-        if selected_token:
-            # Update the existing refresh token
-            selected_token.refresh_token = refresh_token
-            session.commit()
+        # Replace the user's refresh token
+        await auth.storeRefreshToken(user.user_id, refresh_token, session)
 
         # Calculate expiration time for access and refresh tokens
         access_expire = int(ACCESS_TOKEN_EXPIRE_TIME.total_seconds())
@@ -1,27 +1,36 @@
 from typing import Annotated
-from sqlmodel import SQLModel, create_engine, Session
-from quizbackend.settings import DB_URL, TEST_DB_URL
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from quizbackend.settings import DB_URL
+from quizcommon.backend import configure_sqlite, database_url, driver_url
+from quizcommon.pool import MeasuredAsyncQueuePool, MeasuredQueuePool, engine_options
 from fastapi import Depends
 
-# Replace part of database connection strings
-db_connection_str = str(DB_URL).replace("postgresql", "postqresql+psycopg")
-test_db_connection_str = str(TEST_DB_URL).replace(
-    "postgresql", "postqresql+psycopg")
+# Connection strings of the configured backend (Postgres or SQLite)
+db_connection_str = database_url(DB_URL)
+async_db_connection_str = driver_url(db_connection_str, asynchronous=True)
 
 # Create database engine
-db_engine = create_engine(db_connection_str, pool_pre_ping=True, connect_args={
-    "sslmode": "require"
-}, pool_recycle=600)
+db_engine = create_engine(db_connection_str, **engine_options(db_connection_str, MeasuredQueuePool))
+configure_sqlite(db_engine)
 
-def create_table():
-    """Creates tables in the database."""
-    print("Creating Tables...")
-    SQLModel.metadata.create_all(db_engine)
+# Create asyncio database engine, used by the async routes
+async_db_engine = create_async_engine(async_db_connection_str,
+                                      **engine_options(async_db_connection_str, MeasuredAsyncQueuePool))
+configure_sqlite(async_db_engine.sync_engine)
 
 def get_session():
     """Returns a database session."""
     with Session(db_engine) as session:
         yield session
 
+async def get_async_session():
+    """Returns an asyncio database session."""
+    # Loaded attributes stay usable after commit, since an async session cannot lazily refresh them
+    async with AsyncSession(async_db_engine, expire_on_commit=False) as session:
+        yield session
+
 # Annotate dependency for database session
 DB_SESSION = Annotated[Session, Depends(get_session)]
+ASYNC_DB_SESSION = Annotated[AsyncSession, Depends(get_async_session)]
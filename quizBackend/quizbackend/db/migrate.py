@@ -0,0 +1,128 @@
+"""
+Apply pending schema migrations to the database.
+
+Run once per deploy, before any service starts:
+
+    poetry run python -m quizbackend.db.migrate
+"""
+import importlib
+import pkgutil
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import ModuleType
+from typing import Iterator
+from sqlalchemy import Column, DateTime, Engine, Integer, MetaData, String, Table, insert, select, text
+
+from quizbackend.db import migrations
+
+# Key of the Postgres advisory lock held while migrating, so concurrent deploys apply each migration once
+MIGRATION_LOCK_ID = 7_202_401
+
+# Versions applied to the database, kept apart from the model metadata so the baseline never creates it
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False)
+)
+
+MIGRATION_MODULE_NAME = re.compile(r"^v(\d{4})_\w+$")
+
+
+# ================================================================================================================================
+def load_migrations() -> list[tuple[int, ModuleType]]:
+    """
+    Import every migration module of the migrations package.
+
+    Returns:
+        list[tuple[int, ModuleType]]: Version and module of every migration, in version order.
+    """
+    found_migrations = []
+    for module_info in pkgutil.iter_modules(migrations.__path__):
+        match = MIGRATION_MODULE_NAME.match(module_info.name)
+        if match:
+            module = importlib.import_module(f"{migrations.__name__}.{module_info.name}")
+            found_migrations.append((int(match.group(1)), module))
+    return sorted(found_migrations, key=lambda migration: migration[0])
+
+
+# ================================================================================================================================
+@contextmanager
+def migration_lock(engine: Engine) -> Iterator[None]:
+    """
+    Hold the migration lock for the duration of the block.
+
+    Postgres uses a session advisory lock; other backends are single-writer and need none.
+
+    Args:
+        engine (Engine): Engine bound to the database.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+
+
+# ================================================================================================================================
+def apply_migration(engine: Engine, version: int, module: ModuleType):
+    """
+    Apply one migration and record its version.
+
+    Transactional migrations are recorded in the same transaction as their changes. The others run in
+    autocommit mode and are recorded once they finish, so they are applied again after an interruption.
+
+    Args:
+        engine (Engine): Engine bound to the database.
+        version (int): Version of the migration.
+        module (ModuleType): The migration module.
+    """
+    description = (module.__doc__ or module.__name__).strip().splitlines()[0]
+    record = insert(schema_migrations).values(version=version, description=description,
+                                              applied_at=datetime.now(timezone.utc))
+    if module.transactional:
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(record)
+    else:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            module.upgrade(connection)
+            connection.execute(record)
+    print(f"Applied migration {version:04d}: {description}")
+
+
+# ================================================================================================================================
+def migrate(engine: Engine) -> list[int]:
+    """
+    Apply every migration that the database has not recorded yet.
+
+    Args:
+        engine (Engine): Engine bound to the database.
+
+    Returns:
+        list[int]: Versions applied by this run.
+    """
+    applied = []
+    with migration_lock(engine):
+        schema_migrations.create(engine, checkfirst=True)
+        with engine.connect() as connection:
+            applied_versions = set(connection.execute(select(schema_migrations.c.version)).scalars())
+        for version, module in load_migrations():
+            if version not in applied_versions:
+                apply_migration(engine, version, module)
+                applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from quizbackend.db.db_connector import db_engine
+
+    applied_versions = migrate(db_engine)
+    if not applied_versions:
+        print("Database schema is up to date")
@@ -0,0 +1,16 @@
+"""
+Versioned schema migrations of the shared quiz database.
+
+Every module named ``v<NNNN>_<name>.py`` is one migration, applied in version
+order by ``python -m quizbackend.db.migrate`` and recorded in the
+``schema_migrations`` table. A migration module provides:
+
+- a docstring whose first line describes the migration,
+- ``transactional``: False for statements that cannot run inside a transaction
+  (``CREATE INDEX CONCURRENTLY``), which run in autocommit mode instead,
+- ``upgrade(connection)``: applies the change on the given connection.
+
+The baseline creates fresh databases from the current models, so later
+migrations must be idempotent (``IF NOT EXISTS``) to run on both fresh and
+existing databases. Every schema change after the baseline gets a new module.
+"""
@@ -0,0 +1,59 @@
+from sqlalchemy import Connection, text
+
+
+# ================================================================================================================================
+def create_index(connection: Connection, name: str, table: str, columns: list[str], unique: bool = False):
+    """
+    Create an index unless it already exists, without blocking writes on Postgres.
+
+    On Postgres the index is built concurrently, so the connection must be in autocommit mode.
+    An invalid index left behind by an interrupted concurrent build is dropped and built again.
+
+    Args:
+        connection (Connection): Connection to the database.
+        name (str): Name of the index.
+        table (str): Name of the indexed table.
+        columns (list[str]): Indexed columns, in order.
+        unique (bool): Whether the index enforces unique values.
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    concurrently = ""
+    if connection.dialect.name == "postgresql":
+        concurrently = "CONCURRENTLY "
+        is_valid = connection.execute(text("SELECT index.indisvalid FROM pg_index AS index "
+                                           "JOIN pg_class AS class ON class.oid = index.indexrelid "
+                                           "WHERE class.relname = :name"), {"name": name}).scalar()
+        if is_valid is False:
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {quote(name)}"))
+
+    column_list = ", ".join(quote(column) for column in columns)
+    connection.execute(text(f"CREATE {'UNIQUE ' if unique else ''}INDEX {concurrently}IF NOT EXISTS "
+                            f"{quote(name)} ON {quote(table)} ({column_list})"))
+
+
+class MigrationConflictError(RuntimeError):
+    """Raised when existing rows conflict with a migration and must be resolved by an operator first."""
+
+    def __init__(self, description: str, conflicts: list[str]):
+        super().__init__("\n".join([f"{description}, resolve them and run the migration again:", *conflicts]))
+        self.conflicts = conflicts
+
+
+# ================================================================================================================================
+def find_duplicates(connection: Connection, table: str, columns: list[str]) -> list[str]:
+    """
+    Find the values of some columns shared by more than one row of a table.
+
+    Args:
+        connection (Connection): Connection to the database.
+        table (str): Name of the table.
+        columns (list[str]): Columns whose combined values must be unique.
+
+    Returns:
+        list[str]: One line per duplicated value, with the number of rows sharing it.
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    column_list = ", ".join(quote(column) for column in columns)
+    duplicates = connection.execute(text(f"SELECT {column_list}, COUNT(*) FROM {quote(table)} "
+                                         f"GROUP BY {column_list} HAVING COUNT(*) > 1 ORDER BY {column_list}"))
+    return [f"{table} ({', '.join(columns)}) = {tuple(row[:-1])!r}: {row[-1]} rows" for row in duplicates]
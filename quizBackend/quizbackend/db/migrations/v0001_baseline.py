@@ -0,0 +1,19 @@
+"""Create the tables of every model that does not exist yet."""
+from sqlalchemy import Connection
+from sqlmodel import SQLModel
+
+# Import every model module so all tables are registered on the metadata
+from quizbackend.models import admin_model, quiz_model, user_model  # noqa: F401
+
+transactional = True
+
+
+# ================================================================================================================================
+def upgrade(connection: Connection):
+    """
+    Create missing tables, leaving tables created before migrations existed untouched.
+
+    Args:
+        connection (Connection): Connection to the database.
+    """
+    SQLModel.metadata.create_all(connection)
@@ -0,0 +1,51 @@
+"""Add the indexes of the login, token, category and quiz lookups to existing tables."""
+from sqlalchemy import Connection, inspect
+
+from quizbackend.db.migrations.helpers import MigrationConflictError, create_index, find_duplicates
+
+# Built concurrently on Postgres, which cannot run inside a transaction
+transactional = False
+
+# (index name, table, columns, unique)
+LOOKUP_INDEXES = [
+    ("ix_user_user_email", "user", ["user_email"], True),
+    ("ix_token_user_id", "token", ["user_id"], True),
+    ("ix_token_refresh_token", "token", ["refresh_token"], True),
+    ("ix_admin_admin_email", "admin", ["admin_email"], False),
+    ("ix_admintoken_admin_token", "admintoken", ["admin_token"], True),
+    ("ix_category_category_name", "category", ["category_name"], True),
+    ("ix_question_category_id", "question", ["category_id"], False),
+    ("ix_choice_question_id", "choice", ["question_id"], False),
+    ("ix_categorymarks_category_id", "categorymarks", ["category_id"], False),
+    ("ix_categoryquizdetails_user_id_category_id", "categoryquizdetails", ["user_id", "category_id"], True),
+]
+
+
+# ================================================================================================================================
+def upgrade(connection: Connection):
+    """
+    Build every lookup index, after checking that no existing rows break the unique ones.
+
+    Duplicate rows are listed and the migration fails before building any index, so an operator can
+    decide which rows to keep and run it again.
+
+    Args:
+        connection (Connection): Connection to the database in autocommit mode.
+
+    Raises:
+        MigrationConflictError: Some rows share the value of a new unique index.
+    """
+    indexes = []
+    for name, table, columns, unique in LOOKUP_INDEXES:
+        # Tables created by the baseline from newer models lack the columns later migrations dropped
+        table_columns = {table_column["name"] for table_column in inspect(connection).get_columns(table)}
+        if table_columns.issuperset(columns):
+            indexes.append((name, table, columns, unique))
+
+    duplicates = [duplicate for _, table, columns, unique in indexes if unique
+                  for duplicate in find_duplicates(connection, table, columns)]
+    if duplicates:
+        raise MigrationConflictError("Rows share the value of a new unique index", duplicates)
+
+    for name, table, columns, unique in indexes:
+        create_index(connection, name, table, columns, unique)
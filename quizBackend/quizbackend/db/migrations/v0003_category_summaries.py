@@ -0,0 +1,29 @@
+"""Backfill the summary row of categories created before summaries existed."""
+from sqlalchemy import Connection, insert
+from sqlmodel import select, func
+
+from quizbackend.controllers.summary_controller import QUIZ_QUESTION_COUNT
+from quizbackend.models.quiz_model import Category, CategoryMarks, CategorySummary, Question
+
+transactional = True
+
+
+# ================================================================================================================================
+def upgrade(connection: Connection):
+    """
+    Insert a summary row for every category without one, computed from its questions and marks.
+
+    Args:
+        connection (Connection): Connection to the database.
+    """
+    question_count = (select(func.count()).select_from(Question)
+                      .where(Question.category_id == Category.category_id)
+                      .scalar_subquery())
+    marks = (select(func.max(CategoryMarks.marks))
+             .where(CategoryMarks.category_id == Category.category_id)
+             .scalar_subquery())
+    missing_summaries = (select(Category.category_id, question_count, func.coalesce(marks, 50),
+                                question_count >= QUIZ_QUESTION_COUNT)
+                         .where(Category.category_id.not_in(select(CategorySummary.category_id))))
+    connection.execute(insert(CategorySummary).from_select(
+        ["category_id", "question_count", "marks", "is_available"], missing_summaries))
@@ -0,0 +1,36 @@
+"""Store user emails normalized, as signup and login now look them up."""
+from sqlalchemy import Connection, func, update
+from sqlmodel import select
+
+from quizbackend.db.migrations.helpers import MigrationConflictError
+from quizbackend.models.user_model import User
+
+transactional = True
+
+
+# ================================================================================================================================
+def upgrade(connection: Connection):
+    """
+    Normalize the email of every user, after checking that no two users share a normalized email.
+
+    Emails differing only by case or surrounding spaces belong to one person. Left unnormalized, all but one
+    of their users could never log in again, so they are listed and the migration fails for an operator to
+    merge them and run it again.
+
+    Args:
+        connection (Connection): Connection to the database.
+
+    Raises:
+        MigrationConflictError: Some users share a normalized email.
+    """
+    # Same normalization as auth_controller.normalizeEmail
+    normalized_email = func.lower(func.trim(User.user_email))
+    shared_emails = select(normalized_email).group_by(normalized_email).having(func.count() > 1)
+    colliding = connection.execute(select(normalized_email, User.user_id, User.user_email)
+                                   .where(normalized_email.in_(shared_emails))
+                                   .order_by(normalized_email, User.user_id)).all()
+    if colliding:
+        raise MigrationConflictError("Users share a normalized email", [
+            f"{email!r}: user {user_id} ({user_email!r})" for email, user_id, user_email in colliding])
+
+    connection.execute(update(User).where(User.user_email != normalized_email).values(user_email=normalized_email))
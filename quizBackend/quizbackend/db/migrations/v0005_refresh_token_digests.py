@@ -0,0 +1,89 @@
+"""Store refresh tokens as digests with an expiry time, and drop the plain refresh token column."""
+import hashlib
+from datetime import datetime, timezone
+from jose import jwt
+from jose.exceptions import JOSEError
+from sqlalchemy import Connection, DateTime, String, bindparam, column, delete, inspect, table, text, update
+from sqlmodel import select
+
+from quizbackend.db.migrations.helpers import create_index
+from quizbackend.models.user_model import Token
+
+# Built concurrently on Postgres, which cannot run inside a transaction
+transactional = False
+
+# Tokens digested per statement, so the backfill never holds locks on the whole table
+BACKFILL_BATCH_SIZE = 1000
+
+# The token table as it was, with the plain refresh token the model no longer has
+legacy_token = table("token",
+                     column("id"),
+                     column("refresh_token", String),
+                     column("refresh_token_digest", String),
+                     column("expires_at", DateTime(timezone=True)))
+
+
+# ================================================================================================================================
+def upgrade(connection: Connection):
+    """
+    Add the digest and expiry columns, fill them from the stored refresh tokens, then drop the plain tokens.
+
+    A stored token keeps working: its digest is the one tokenService computes from it, and its expiry is
+    read from its claims. Tokens that are not readable JWTs could never be refreshed and are deleted.
+    Every step checks the current schema, so the migration can be run again after an interruption.
+
+    Args:
+        connection (Connection): Connection to the database in autocommit mode.
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    token_columns = {token_column["name"] for token_column in inspect(connection).get_columns("token")}
+    for name in ("refresh_token_digest", "expires_at"):
+        if name not in token_columns:
+            column_type = Token.__table__.c[name].type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE token ADD COLUMN {quote(name)} {column_type}"))
+
+    if "refresh_token" in token_columns:
+        backfill_digests(connection)
+        connection.execute(text(f"DROP INDEX IF EXISTS {quote('ix_token_refresh_token')}"))
+        connection.execute(text(f"ALTER TABLE token DROP COLUMN {quote('refresh_token')}"))
+
+    # SQLite cannot add a constraint to an existing column, the model keeps both filled there
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("ALTER TABLE token ALTER COLUMN refresh_token_digest SET NOT NULL, "
+                                "ALTER COLUMN expires_at SET NOT NULL"))
+    create_index(connection, "ix_token_refresh_token_digest", "token", ["refresh_token_digest"], unique=True)
+
+
+# ================================================================================================================================
+def backfill_digests(connection: Connection):
+    """
+    Fill the digest and expiry of every token still without a digest, one batch at a time.
+
+    Args:
+        connection (Connection): Connection to the database in autocommit mode.
+    """
+    set_digest = (update(legacy_token).where(legacy_token.c.id == bindparam("token_id"))
+                  .values(refresh_token_digest=bindparam("digest"), expires_at=bindparam("expires")))
+    while True:
+        pending = connection.execute(select(legacy_token.c.id, legacy_token.c.refresh_token)
+                                     .where(legacy_token.c.refresh_token_digest.is_(None))
+                                     .order_by(legacy_token.c.id)
+                                     .limit(BACKFILL_BATCH_SIZE)).all()
+        if not pending:
+            return
+
+        digested, unreadable = [], []
+        for token_id, refresh_token in pending:
+            try:
+                expires = datetime.fromtimestamp(jwt.get_unverified_claims(refresh_token)["exp"], timezone.utc)
+            except (JOSEError, KeyError, TypeError, ValueError):
+                unreadable.append(token_id)
+                continue
+            # Same digest as auth_controller.digestRefreshToken
+            digested.append({"token_id": token_id, "expires": expires,
+                             "digest": hashlib.sha256(refresh_token.encode()).hexdigest()})
+
+        if digested:
+            connection.execute(set_digest, digested)
+        if unreadable:
+            connection.execute(delete(legacy_token).where(legacy_token.c.id.in_(unreadable)))
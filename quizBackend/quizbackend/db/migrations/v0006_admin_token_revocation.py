@@ -0,0 +1,44 @@
+"""Record admin tokens by ID with an expiry and revocation time, and drop the stored token strings."""
+from sqlalchemy import Connection, inspect, text
+
+from quizbackend.db.migrations.helpers import create_index
+from quizbackend.models.admin_model import AdminToken
+
+# Built concurrently on Postgres, which cannot run inside a transaction
+transactional = False
+
+# Legacy tokens deleted per statement, so the cleanup never holds locks on the whole table
+DELETE_BATCH_SIZE = 1000
+
+
+# ================================================================================================================================
+def upgrade(connection: Connection):
+    """
+    Add the expiry and revocation columns, delete the tokens issued before them, then drop the token strings.
+
+    Tokens issued before this migration carry no jti claim and are refused by admin_verify_func,
+    so their rows are deleted and admins log in again. Every step checks the current schema,
+    so the migration can be run again after an interruption.
+
+    Args:
+        connection (Connection): Connection to the database in autocommit mode.
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    token_columns = {token_column["name"] for token_column in inspect(connection).get_columns("admintoken")}
+    for name in ("expires_at", "revoked_at"):
+        if name not in token_columns:
+            column_type = AdminToken.__table__.c[name].type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE admintoken ADD COLUMN {quote(name)} {column_type}"))
+
+    if "admin_token" in token_columns:
+        legacy_ids = (f"SELECT {quote('admin_tokenId')} FROM admintoken WHERE expires_at IS NULL "
+                      f"LIMIT {DELETE_BATCH_SIZE}")
+        while connection.execute(text(f"DELETE FROM admintoken WHERE {quote('admin_tokenId')} IN ({legacy_ids})")).rowcount:
+            pass
+        connection.execute(text(f"DROP INDEX IF EXISTS {quote('ix_admintoken_admin_token')}"))
+        connection.execute(text(f"ALTER TABLE admintoken DROP COLUMN {quote('admin_token')}"))
+
+    # SQLite cannot add a constraint to an existing column, the model keeps it filled there
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("ALTER TABLE admintoken ALTER COLUMN expires_at SET NOT NULL"))
+    create_index(connection, "ix_admintoken_revoked_at", "admintoken", ["revoked_at"])
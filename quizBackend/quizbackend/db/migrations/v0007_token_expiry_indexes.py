@@ -0,0 +1,19 @@
+"""Index the expiry of refresh and admin tokens, which the token reaper deletes by."""
+from sqlalchemy import Connection
+
+from quizbackend.db.migrations.helpers import create_index
+
+# Built concurrently on Postgres, which cannot run inside a transaction
+transactional = False
+
+
+# ================================================================================================================================
+def upgrade(connection: Connection):
+    """
+    Build the expiry indexes of the token tables.
+
+    Args:
+        connection (Connection): Connection to the database in autocommit mode.
+    """
+    create_index(connection, "ix_token_expires_at", "token", ["expires_at"])
+    create_index(connection, "ix_admintoken_expires_at", "admintoken", ["expires_at"])
@@ -0,0 +1,19 @@
+"""Record the questions answered in every quiz, so a question cannot be answered twice."""
+from sqlalchemy import Connection
+
+from quizbackend.models.quiz_model import AnsweredQuestion
+
+transactional = True
+
+
+# ================================================================================================================================
+def upgrade(connection: Connection):
+    """
+    Create the answered question table unless the baseline already created it.
+
+    Quizzes started before this migration have no answers recorded, only answers given from now on are refused twice.
+
+    Args:
+        connection (Connection): Connection to the database.
+    """
+    AnsweredQuestion.__table__.create(connection, checkfirst=True)
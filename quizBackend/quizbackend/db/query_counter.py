@@ -0,0 +1,27 @@
+from contextlib import contextmanager
+from typing import Iterator
+from sqlalchemy import Engine, event
+
+
+# ================================================================================================================================
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[list[str]]:
+    """
+    Record every SQL statement an engine sends to the database inside the block.
+
+    Args:
+        engine (Engine): Engine whose statements are recorded.
+
+    Yields:
+        list[str]: Statements executed so far, filled while the block runs.
+    """
+    statements: list[str] = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record_statement)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record_statement)
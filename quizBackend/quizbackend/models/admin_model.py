@@ -1,4 +1,6 @@
+from datetime import datetime
 from typing import Optional
+from sqlalchemy import DateTime
 from sqlmodel import SQLModel, Field
 from quizbackend.utils.types import ChoiceType
 from pydantic import BaseModel
@@ -11,11 +13,13 @@ class AdminBaseModel(SQLModel):
 class Admin(AdminBaseModel, table=True):
     """Model for admin with primary key."""
     id: Optional[int] = Field(None, primary_key=True)
+    admin_email: str = Field(index=True)
 
 class AdminToken(SQLModel, table=True):
-    """Model for admin token."""
-    admin_tokenId: Optional[int] = Field(None, primary_key=True)
-    admin_token: str
+    """Model for issued admin tokens, the tokens are verified by their signature so only their ID is stored."""
+    admin_tokenId: Optional[int] = Field(None, primary_key=True)  # Token ID, the jti claim of the token
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True), index=True)  # Time the token expires
+    revoked_at: Optional[datetime] = Field(None, sa_type=DateTime(timezone=True), index=True)  # Time the token was revoked, None while it is valid
 
 class QuestionModel(BaseModel):
     """Model for quiz question."""
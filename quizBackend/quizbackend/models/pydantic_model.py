@@ -3,10 +3,19 @@ from pydantic import BaseModel
 class QuizAttemptModel(BaseModel):
     user_id: int
     category_id: int
-    quiz_numbers: int
+    question_id: int
+    choice_id: int
     isFinished: bool = False
 
 class GetQuizDetailsModel(BaseModel):
     user_id: int
-    category_name: str  
-    
\ No newline at end of file
+    category_name: str
+
+class QuizAnswerModel(BaseModel):
+    question_id: int
+    choice_id: int
+
+class QuizSubmissionModel(BaseModel):
+    user_id: int
+    category_id: int
+    answers: list[QuizAnswerModel]
@@ -1,10 +1,10 @@
 from typing import Optional
-from sqlmodel import Relationship, SQLModel, Field
+from sqlmodel import Index, Relationship, SQLModel, Field
 
 class Category(SQLModel, table=True):
     """Model for quiz categories."""
     category_id: int | None = Field(None, primary_key=True)
-    category_name: str  # Name of the category
+    category_name: str = Field(unique=True, index=True)  # Name of the category
     category_description: str  # Description of the category
 
 
@@ -12,12 +12,15 @@ class Question(SQLModel, table=True):
     """Model for quiz questions."""
     question_id: int | None = Field(None, primary_key=True)
     question: str  # Text of the question
-    category_id: int = Field(int, foreign_key="category.category_id")  # ID of the associated category
+    category_id: int = Field(int, foreign_key="category.category_id", index=True)  # ID of the associated category
     choices: list["Choice"] = Relationship(back_populates="question")  # Choices associated with the question
 
 
 class CategoryQuizDetails(SQLModel, table=True):
     """Model for details of quizzes taken by users in specific categories."""
+    # A user has one quiz details row per category
+    __table_args__ = (Index("ix_categoryquizdetails_user_id_category_id",
+                            "user_id", "category_id", unique=True),)
     id: Optional[int] = Field(None, primary_key=True)
     user_id: int = Field(None, foreign_key="user.user_id")  # ID of the user
     category_id: int = Field(int, foreign_key="category.category_id")  # ID of the category
@@ -28,10 +31,16 @@ class CategoryQuizDetails(SQLModel, table=True):
     is_finished: bool = False  # Flag indicating if the quiz is finished
 
 
+class AnsweredQuestion(SQLModel, table=True):
+    """Model for the questions already answered in a user's quiz, so none is graded twice."""
+    quiz_details_id: int = Field(foreign_key="categoryquizdetails.id", primary_key=True)  # ID of the quiz details row
+    question_id: int = Field(foreign_key="question.question_id", primary_key=True)  # ID of the answered question
+
+
 class CategoryMarks(SQLModel, table=True):
     """Model for marks obtained in quiz categories."""
     id: Optional[int] = Field(None, primary_key=True)
-    category_id: int = Field(int, foreign_key="category.category_id")  # ID of the category
+    category_id: int = Field(int, foreign_key="category.category_id", index=True)  # ID of the category
     marks: int = 50  # Marks obtained
 
 
@@ -41,5 +50,13 @@ class Choice(SQLModel, table=True):
     choice: str  # Text of the choice
     choice_status: bool  # Status of the choice (correct/incorrect)
     question_id: Optional[int] = Field(
-        None, foreign_key="question.question_id")  # ID of the associated question
-    question: Optional[Question] = Relationship(back_populates="choices")  # Question associated with the choice
\ No newline at end of file
+        None, foreign_key="question.question_id", index=True)  # ID of the associated question
+    question: Optional[Question] = Relationship(back_populates="choices")  # Question associated with the choice
+
+
+class CategorySummary(SQLModel, table=True):
+    """Model for per-category counters kept in step with the question bank."""
+    category_id: int = Field(foreign_key="category.category_id", primary_key=True)  # ID of the category
+    question_count: int = 0  # Number of questions in the category
+    marks: int = 50  # Total marks of the category
+    is_available: bool = False  # Flag indicating if the category holds enough questions for a quiz
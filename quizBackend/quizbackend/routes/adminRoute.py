@@ -1,24 +1,26 @@
 from typing import Annotated
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 
 from quizbackend.controllers.admin_controller import (
-    add_marks, admin_login_func, admin_verify_func, delete_admin_token_from_db, add_category, add_quiz)
+    add_marks, admin_login_func, admin_verify_func, revoke_admin_token, add_category, add_quiz)
 from quizbackend.controllers.openai_controller import generate_question
 from quizbackend.models.quiz_model import Category
 from quizbackend.routes.userRoute import app
 from quizbackend.controllers.auth_controller import passwordIntoHash
 from quizbackend.utils.apierrors import NotFoundException
+from quizcommon.login_limiter import check_login_attempt
 from quizbackend.models.admin_model import Admin, AdminBaseModel
 from quizbackend.db.db_connector import DB_SESSION
 
 
 # ================================================================================================================================
 @app.post("/api/adminLogin")
-def adminLogin(adminForm: AdminBaseModel, session: DB_SESSION):
+def adminLogin(request: Request, adminForm: AdminBaseModel, session: DB_SESSION):
     """
     Endpoint for admin login.
 
     Args:
+        request (Request): The incoming request, identifying the client for the login limiter.
         adminForm (AdminBaseModel): Admin login form data.
         session (DB_SESSION): Database session.
 
@@ -27,7 +29,10 @@ def adminLogin(adminForm: AdminBaseModel, session: DB_SESSION):
 
     Raises:
         HTTPException: If admin is not found.
+        TooManyRequestsException: If the email or the client has made too many attempts.
     """
+    # Refuse excess attempts before verifying the password
+    check_login_attempt(adminForm.admin_email, request)
     # Call the admin_login_func to verify admin login
     admin_data = admin_login_func(adminForm, session=session)
 
@@ -66,10 +71,10 @@ def adminVerify(verification_message: Annotated[str, Depends(admin_verify_func)]
 @app.delete("/api/deleteToken")
 def deleteAdminToken(token_id: int, session: DB_SESSION):
     """
-    Delete admin token endpoint.
+    Delete admin token endpoint, the token is revoked and refused from then on.
 
     Args:
-        token_id (int): ID of the token to be deleted.
+        token_id (int): ID of the token to be revoked.
         session (DB_SESSION): Database session.
 
     Returns:
@@ -78,8 +83,8 @@ def deleteAdminToken(token_id: int, session: DB_SESSION):
     Raises:
         NotFoundException: If token is not found.
     """
-    # Attempt to delete the token
-    delete_message = delete_admin_token_from_db(token_id, session)
+    # Attempt to revoke the token
+    delete_message = revoke_admin_token(token_id, session)
 
     # Check if delete message exists
     if delete_message:
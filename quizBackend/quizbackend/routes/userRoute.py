@@ -5,17 +5,31 @@ from typing import Annotated, Any
 from contextlib import asynccontextmanager
 
 
-from quizbackend.db.db_connector import DB_SESSION, create_table
+from quizcommon.backend import is_memory_database
+from quizbackend.db.db_connector import ASYNC_DB_SESSION, async_db_engine, db_engine
+from quizbackend.db.migrate import migrate
+from quizcommon.token_reaper import ReapedTables, get_token_reaper_metrics, start_token_reaper, stop_token_reaper
+from quizcommon.pool import get_pool_metrics
 from quizbackend.controllers.quiz_controller import (
-    get_categories, get_quiz, attempt_quiz, isAvailableQuiz, getQuizDetails, delete_quiz, get_categories_details)
+    get_categories, get_quiz, attempt_quiz, submit_quiz, isAvailableQuiz, getQuizDetails, delete_quiz, get_categories_details)
 from quizbackend.controllers.auth_controller import tokenService
 from quizbackend.models.quiz_model import Category
 from quizbackend.settings import ACCESS_TOKEN_EXPIRE_TIME, REFRESH_TOKEN_EXPIRE_TIME
-from quizbackend.models.pydantic_model import QuizAttemptModel
-from quizbackend.models.user_model import User, UserSignUpModel, UserLogInModel
+from quizbackend.models.pydantic_model import QuizAttemptModel, QuizSubmissionModel
+from quizbackend.models.admin_model import AdminToken
+from quizbackend.models.user_model import Token, User, UserSignUpModel, UserLogInModel
 from quizbackend.controllers.user_controller import (
     signup_func, logIn_func, deleteUser_func, getUserDetails, logout_func, updateUserDetails)
-from quizbackend.utils.apierrors import InvalidInputException, NotFoundException, ConflictsException
+from quizbackend.utils.apierrors import (
+    InvalidInputException, NotFoundException, ConflictsException, ServiceUnavailableException, TooManyRequestsException)
+from quizcommon.login_limiter import check_login_attempt, get_login_limiter_metrics
+from quizcommon.password_pool import get_password_pool_metrics
+
+# Key and expiry column of every table the token reaper empties of expired tokens
+REAPED_TABLES: ReapedTables = {
+    "token": (Token.__table__.c.id, Token.__table__.c.expires_at),
+    "admintoken": (AdminToken.__table__.c.admin_tokenId, AdminToken.__table__.c.expires_at)
+}
 
 
 # =================================================================================================================================
@@ -30,9 +44,14 @@ async def lifespan(app: FastAPI):
     Yields:
         None: Yields control back to the caller.
     """
-    # Create necessary database tables
-    create_table()
+    # Tables are managed by migrations (python -m quizbackend.db.migrate), not at startup,
+    # except for an in-memory database which starts empty in every process
+    if is_memory_database():
+        migrate(db_engine)
+    # Expired refresh and admin tokens are deleted in the background while the service runs
+    token_reaper = start_token_reaper(db_engine, REAPED_TABLES)
     yield
+    await stop_token_reaper(token_reaper)
 
 # Create the FastAPI application instance with the lifespan context manager
 app = FastAPI(lifespan=lifespan)
@@ -97,24 +116,78 @@ async def existingInputException(request: Request, exception: ConflictsException
     return JSONResponse(status_code=400, content={"message": f"This {exception.message} already exists. Please choose another."})
 
 
+# =================================================================================================================================
+@app.exception_handler(ServiceUnavailableException)
+async def serviceUnavailableException(request: Request, exception: ServiceUnavailableException):
+    """
+    Exception handler for ServiceUnavailableException.
+
+    Args:
+        request (Request): The incoming request object.
+        exception (ServiceUnavailableException): The ServiceUnavailableException instance.
+
+    Returns:
+        JSONResponse: JSON response asking the client to retry shortly.
+    """
+    return JSONResponse(status_code=503, headers={"Retry-After": "1"},
+                        content={"message": f"{exception.message} is busy. Please try again in a moment."})
+
+
+# =================================================================================================================================
+@app.exception_handler(TooManyRequestsException)
+async def tooManyRequestsException(request: Request, exception: TooManyRequestsException):
+    """
+    Exception handler for TooManyRequestsException.
+
+    Args:
+        request (Request): The incoming request object.
+        exception (TooManyRequestsException): The TooManyRequestsException instance.
+
+    Returns:
+        JSONResponse: JSON response telling the client when to try again.
+    """
+    return JSONResponse(status_code=429, headers={"Retry-After": str(exception.retry_after)},
+                        content={"message": f"Too many {exception.message.lower()}. Please try again in {exception.retry_after} seconds."})
+
+
 # =================================================================================================================================
 @app.get("/")
 async def main():
     return "Welcome to the Quiz Web!"
 
 
+# =================================================================================================================================
+@app.get("/api/metrics")
+async def metrics():
+    """
+    Endpoint reporting the live state of the database connection pools, of the password worker pool, of the token reaper and of the login limiter.
+
+    Returns:
+        dict: Usage and checkout telemetry of the sync and asyncio engine pools, password queue depth, expired tokens removed and login attempts rejected.
+    """
+    return {
+        "database_pool": get_pool_metrics(db_engine.pool),
+        "async_database_pool": get_pool_metrics(async_db_engine.pool),
+        "password_pool": get_password_pool_metrics(),
+        "token_reaper": get_token_reaper_metrics(),
+        "login_limiter": get_login_limiter_metrics()
+    }
+
+
 # =================================================================================================================================
 @app.post("/api/signup")
-async def signup(response: Response, user_signup_form: UserSignUpModel, session: DB_SESSION):
+async def signup(request: Request, response: Response, user_signup_form: UserSignUpModel, session: ASYNC_DB_SESSION):
     """
     Endpoint for user signup.
 
     Args:
+        request (Request): The incoming request, identifying the client for the login limiter.
         user_signup_form (UserSignUpModel): User signup form data.
-        session (DB_SESSION): Database session.
+        session (ASYNC_DB_SESSION): Database session.
 
     Raises:
         InvalidInputException: If required fields in the signup form are not provided.
+        TooManyRequestsException: If the email or the client has made too many attempts.
 
     Returns:
         dict: Dictionary containing access token and refresh token along with their expiration time.
@@ -122,9 +195,11 @@ async def signup(response: Response, user_signup_form: UserSignUpModel, session:
     # Check if required fields in the signup form are provided
     if not (user_signup_form.user_name and user_signup_form.user_email and user_signup_form.user_password):
         raise InvalidInputException("Signup form")
+    # Refuse excess attempts before hashing the password
+    check_login_attempt(user_signup_form.user_email, request)
 
     # Call signup function to perform user signup
-    data = signup_func(**user_signup_form.model_dump(), session=session)
+    data = await signup_func(**user_signup_form.model_dump(), session=session)
 
 # Calculate expiration time for access and refresh tokens
     access_expire = int(ACCESS_TOKEN_EXPIRE_TIME.total_seconds())
@@ -139,20 +214,23 @@ async def signup(response: Response, user_signup_form: UserSignUpModel, session:
 
 # =================================================================================================================================
 @app.post("/api/login")
-async def login(response: Response, user_login_form: UserLogInModel, session: DB_SESSION):
+async def login(request: Request, response: Response, user_login_form: UserLogInModel, session: ASYNC_DB_SESSION):
     """
     Endpoint for user login.
 
     Args:
+        request (Request): The incoming request, identifying the client for the login limiter.
         user_login_form (UserLogInModel): User login form data.
-        session (DB_SESSION): Database session.
+        session (ASYNC_DB_SESSION): Database session.
 
     Returns:
         dict: Dictionary containing access token and refresh token along with their expiration time.
     """
+    # Refuse excess attempts before verifying the password
+    check_login_attempt(user_login_form.user_email, request)
     # Call the logIn_func function to authenticate the user and obtain tokens
-    access_token, refresh_token = logIn_func(
-        **user_login_form.model_dump(), session=session).values()
+    access_token, refresh_token = (await logIn_func(
+        **user_login_form.model_dump(), session=session)).values()
 
     # Calculate expiration time for access and refresh tokens
     access_expire = int(ACCESS_TOKEN_EXPIRE_TIME.total_seconds())
@@ -211,47 +289,53 @@ async def getUser(userData: Annotated[User, Depends(getUserDetails)]):
 
 # =================================================================================================================================
 @app.get("/api/getToken", response_model=dict[str, str | int])
-async def getToken(accessToken: Annotated[str, Depends(tokenService)]):
+async def getToken(response: Response, tokens: Annotated[dict[str, str], Depends(tokenService)]):
     """
-    Endpoint to retrieve an access token.
+    Endpoint to exchange a refresh token for a new access token and a new refresh token.
 
     Args:
-        accessToken (Annotated[str, Depends(tokenService)]): Access token obtained from the token service.
+        response (Response): The response object, carrying the new refresh token cookie.
+        tokens (Annotated[dict[str, str], Depends(tokenService)]): Access and rotated refresh token obtained from the token service.
 
     Raises:
         NotFoundException: If the access token is not found.
 
     Returns:
-        dict: Dictionary containing the access token and its expiration time.
+        dict: Dictionary containing the access token, the refresh token replacing the one sent and their expiration time.
     """
     # Check if access token exists
-    if not accessToken:
+    if not tokens["access_token"]:
         # Raise exception if access token is not found
         raise NotFoundException("Token")
-    # Calculate expiration time of the access token
+    # Calculate expiration time of the access and refresh tokens
     access_expire = int(ACCESS_TOKEN_EXPIRE_TIME.total_seconds())
-    # Return access token and its expiration time
+    refresh_expire = int(REFRESH_TOKEN_EXPIRE_TIME.total_seconds())
+    # The refresh token sent is no longer valid, the client keeps the new one
+    response.set_cookie("refresh_token", tokens["refresh_token"], expires=refresh_expire, secure=True)
+    # Return access token, refresh token and their expiration time
     return {
-        "access_token": accessToken,
-        "expires_in": access_expire
+        "access_token": tokens["access_token"],
+        "expires_in": access_expire,
+        "refresh_token": tokens["refresh_token"],
+        "refresh_expires_in": refresh_expire
     }
 
 
 # =================================================================================================================================
 @app.delete("/api/userDelete")
-async def deleteUser(id: int, session: DB_SESSION):
+async def deleteUser(id: int, session: ASYNC_DB_SESSION):
     """
     Endpoint to delete a user.
 
     Args:
         id (int): User ID to be deleted.
-        session (DB_SESSION): Database session.
+        session (ASYNC_DB_SESSION): Database session.
 
     Returns:
         str: Message indicating whether the user has been deleted successfully.
     """
     # Call the deleteUser_func function to delete the user
-    message = deleteUser_func(id, session)
+    message = await deleteUser_func(id, session)
     # Return the message indicating the status of user deletion
     return message
 
@@ -266,18 +350,18 @@ def updateUser(update_message: Annotated[str, Depends(updateUserDetails)]):
 
 # =================================================================================================================================
 @app.get("/api/getQuizCategories", response_model=list[Category])
-async def getCategories(session: DB_SESSION):
+async def getCategories(session: ASYNC_DB_SESSION):
     """
     Endpoint to get all quiz categories.
 
     Args:
-        session (DB_SESSION): Database session.
+        session (ASYNC_DB_SESSION): Database session.
 
     Returns:
         list[Category]: List of quiz categories.
     """
     # Retrieve all quiz categories from the database
-    all_categories = get_categories(session)
+    all_categories = await get_categories(session)
 
     # Check if categories are retrieved successfully
     if all_categories:
@@ -291,7 +375,7 @@ async def getCategories(session: DB_SESSION):
 
 # =================================================================================================================================
 @app.get("/api/getQuiz", response_model=dict[str, Any])
-async def getQuiz(user_id: int, category_name: str, session: DB_SESSION):
+async def getQuiz(user_id: int, category_name: str, session: ASYNC_DB_SESSION):
     print(user_id)
     """
     Endpoint to get a quiz for a specific user and category.
@@ -299,25 +383,25 @@ async def getQuiz(user_id: int, category_name: str, session: DB_SESSION):
     Args:
         user_id (int): User ID.
         category_name (str): Name of the quiz category.
-        session (DB_SESSION): Database session.
+        session (ASYNC_DB_SESSION): Database session.
 
     Returns:
         dict[str, Any]: Dictionary containing quiz details.
     """
     # Retrieve quiz questions for the specified user and category
-    questions = get_quiz(user_id, category_name, session)
+    questions = await get_quiz(user_id, category_name, session)
     return questions
 
 
 # =================================================================================================================================
 @app.get("/api/isAvailableQuiz", response_model=bool)
-async def availableQuiz(category_name: str, session: DB_SESSION):
+async def availableQuiz(category_name: str, session: ASYNC_DB_SESSION):
     """
     Endpoint to check if a quiz is available for a specific category.
 
     Args:
         category_name (str): Name of the quiz category.
-        session (DB_SESSION): Database session.
+        session (ASYNC_DB_SESSION): Database session.
 
     Returns:
         bool: True if quiz is available, False otherwise.
@@ -325,65 +409,65 @@ async def availableQuiz(category_name: str, session: DB_SESSION):
     if not category_name:
         # raise not implemented error if category name does not exist
         raise NotImplementedError("Category name")
-    return isAvailableQuiz(category_name=category_name, session=session)
+    return await isAvailableQuiz(category_name=category_name, session=session)
 
 
 # =================================================================================================================================
 @app.get("/api/getCategoryQuizDetails")
-async def getCategoryQuizDetails(user_id: int, category_name: str, session: DB_SESSION):
+async def getCategoryQuizDetails(user_id: int, category_name: str, session: ASYNC_DB_SESSION):
     """
     Endpoint to get quiz details for a specific category and user.
 
     Args:
         user_id (int): User ID.
         category_name (str): Name of the quiz category.
-        session (DB_SESSION): Database session.
+        session (ASYNC_DB_SESSION): Database session.
 
     Returns:
         dict: Quiz details including remaining questions, marks, and attempt status.
     """
     # Call the getQuizDetails function to retrieve quiz details
-    details = getQuizDetails(user_id=user_id,
-                             category_name=category_name, session=session)
+    details = await getQuizDetails(user_id=user_id,
+                                   category_name=category_name, session=session)
     return details
 
 
 # =================================================================================================================================
 @app.get("/api/getAllCategoryDetails")
-async def getCategoriesDetails(user_id: int, session: DB_SESSION):
+async def getCategoriesDetails(user_id: int, session: ASYNC_DB_SESSION):
     """
     Endpoint to retrieve details of all quiz categories for a specific user.
 
     Args:
         user_id (int): User ID.
-        session (DB_SESSION): Database session.
+        session (ASYNC_DB_SESSION): Database session.
 
     Returns:
         dict: Details of all quiz categories including attempt status and total marks.
     """
     # Retrieve details of all quiz categories for the specified user
-    categories_details = get_categories_details(user_id, session)
+    categories_details = await get_categories_details(user_id, session)
     return categories_details
 
 
 # =================================================================================================================================
 @app.post("/api/attemptQuiz")
-async def attemptQuiz(attempt_quiz_form: QuizAttemptModel, session: DB_SESSION):
+async def attemptQuiz(attempt_quiz_form: QuizAttemptModel, session: ASYNC_DB_SESSION):
     """
     Endpoint to attempt a quiz.
 
     Args:
         attempt_quiz_form (QuizAttemptModel): Data model containing information about the attempted quiz.
-        session (DB_SESSION): Database session.
+        session (ASYNC_DB_SESSION): Database session.
 
     Returns:
-        str: Message indicating the success or failure of the quiz attempt.
+        dict: Message indicating the success or failure of the quiz attempt and whether the answer was correct.
     """
     # Print the attempted quiz data
     print(attempt_quiz_form)
 
     # Attempt the quiz using the provided data and database session
-    response_message = attempt_quiz(
+    response_message = await attempt_quiz(
         session=session, **attempt_quiz_form.model_dump())
 
     # Raise exception if no response message is returned
@@ -394,22 +478,41 @@ async def attemptQuiz(attempt_quiz_form: QuizAttemptModel, session: DB_SESSION):
     return response_message
 
 
+# =================================================================================================================================
+@app.post("/api/submitQuiz")
+async def submitQuiz(submission_form: QuizSubmissionModel, session: ASYNC_DB_SESSION):
+    """
+    Endpoint to submit every answer of a quiz in one request.
+
+    Args:
+        submission_form (QuizSubmissionModel): User, category and the chosen choice for every answered question.
+        session (ASYNC_DB_SESSION): Database session.
+
+    Returns:
+        dict: Result message, number of correct answers and obtained marks.
+    """
+    # Grade the answers and record the final result in one transaction
+    result = await submit_quiz(session=session, user_id=submission_form.user_id,
+                               category_id=submission_form.category_id, answers=submission_form.answers)
+    return result
+
+
 # =================================================================================================================================
 @app.delete("/api/deleteQuiz")
-def deleteQuiz(user_id: int, category_id: int, session: DB_SESSION):
+async def deleteQuiz(user_id: int, category_id: int, session: ASYNC_DB_SESSION):
     """
     Endpoint to delete a quiz for a user.
 
     Args:
         user_id (int): The ID of the user whose quiz is to be deleted.
         category_id (int): The ID of the category for which the quiz is to be deleted.
-        session (DB_SESSION): Database session.
+        session (ASYNC_DB_SESSION): Database session.
 
     Returns:
         str: Message indicating the success or failure of the quiz deletion.
     """
     # Call the delete_quiz function to delete the quiz
-    delete_quiz_message = delete_quiz(user_id, category_id, session)
+    delete_quiz_message = await delete_quiz(user_id, category_id, session)
 
     # Return the delete quiz message if available
     if delete_quiz_message:
@@ -30,4 +30,20 @@ ADMIN_TOKEN_EXPIRE_TIME = timedelta(minutes=int(admin_time))
 ADMIN_SECRET_KEY = config.get("ADMIN_SECRET_KEY")
 
 # OPENAPI KEY
-OPEN_AI_KEY = config.get("OPEN_AI_KEY")
\ No newline at end of file
+OPEN_AI_KEY = config.get("OPEN_AI_KEY")
+
+# Question sampling settings (seconds a cached category pool stays valid, and so how long a question added
+# through another worker may be missing from this worker's quizzes)
+QUESTION_POOL_TTL = config.get("QUESTION_POOL_TTL", cast=int, default=300)
+
+# Grading settings (number of questions whose correct choices are kept in memory)
+ANSWER_KEY_CACHE_SIZE = config.get("ANSWER_KEY_CACHE_SIZE", cast=int, default=100000)
+
+# Password hash cost (bcrypt log2 rounds, measured with benchmarks/calibrate_password_hash.py, hashes of another cost are rehashed at login)
+BCRYPT_ROUNDS = config.get("BCRYPT_ROUNDS", cast=int, default=12)
+
+# User token verification settings (JWKS published by user-sphere, empty to accept only the tokens signed here, seconds its keys are
+# cached, and seconds between two fetches caused by a key ID not in the cache)
+USER_JWKS_URL = config.get("USER_JWKS_URL", default="")
+JWKS_CACHE_TTL = config.get("JWKS_CACHE_TTL", cast=int, default=300)
+JWKS_MIN_REFETCH = config.get("JWKS_MIN_REFETCH", cast=int, default=10)
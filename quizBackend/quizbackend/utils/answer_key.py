@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from threading import Lock
+from sqlmodel import Session, select, and_
+
+from quizbackend.models.quiz_model import Choice, Question
+from quizbackend.settings import ANSWER_KEY_CACHE_SIZE
+
+# Answer key of every cached question: question id -> (category id, ids of its correct choices),
+# kept in least recently used order so the cache stays bounded
+answer_keys: OrderedDict[int, tuple[int, tuple[int, ...]]] = OrderedDict()
+answer_keys_lock = Lock()
+
+
+# ================================================================================================================================
+def remember_answer_key(question_id: int, category_id: int, correct_choice_ids: tuple[int, ...]):
+    """
+    Store the answer key of a question in the cache.
+
+    Args:
+        question_id (int): The ID of the question.
+        category_id (int): The ID of the category the question belongs to.
+        correct_choice_ids (tuple[int, ...]): IDs of the correct choices of the question.
+    """
+    with answer_keys_lock:
+        answer_keys[question_id] = (category_id, correct_choice_ids)
+        answer_keys.move_to_end(question_id)
+        while len(answer_keys) > ANSWER_KEY_CACHE_SIZE:
+            answer_keys.popitem(last=False)
+
+
+# ================================================================================================================================
+def get_answer_keys(question_ids: set[int], session: Session) -> dict[int, tuple[int, tuple[int, ...]]]:
+    """
+    Get the answer keys of several questions, loading every cache miss in a single query.
+
+    Args:
+        question_ids (set[int]): IDs of the questions.
+        session (Session): Database session.
+
+    Returns:
+        dict[int, tuple[int, tuple[int, ...]]]: Category ID and correct choice IDs of every existing question.
+    """
+    found_keys = {}
+    with answer_keys_lock:
+        for question_id in question_ids:
+            if question_id in answer_keys:
+                answer_keys.move_to_end(question_id)
+                found_keys[question_id] = answer_keys[question_id]
+
+    missing_ids = question_ids - found_keys.keys()
+    if not missing_ids:
+        return found_keys
+
+    # Questions without a correct choice still come back through the outer join
+    rows = session.exec(select(Question.question_id, Question.category_id, Choice.choice_id)
+                        .outerjoin(Choice, and_(Choice.question_id == Question.question_id,
+                                                Choice.choice_status == True))
+                        .where(Question.question_id.in_(missing_ids))).all()
+    loaded_keys: dict[int, tuple[int, list[int]]] = {}
+    for question_id, category_id, choice_id in rows:
+        _, correct_choice_ids = loaded_keys.setdefault(question_id, (category_id, []))
+        if choice_id is not None:
+            correct_choice_ids.append(choice_id)
+
+    for question_id, (category_id, correct_choice_ids) in loaded_keys.items():
+        remember_answer_key(question_id, category_id, tuple(correct_choice_ids))
+        found_keys[question_id] = (category_id, tuple(correct_choice_ids))
+    return found_keys
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import time
+from threading import Lock
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from quizbackend.settings import JWKS_CACHE_TTL, JWKS_MIN_REFETCH, USER_JWKS_URL
+
+# Algorithm of the access tokens signed by user-sphere, verified with its public keys only
+USER_TOKEN_ALGORITHM = "RS256"
+# Seconds a JWKS request may take before the cached keys are kept
+JWKS_FETCH_TIMEOUT = 5
+
+# Public keys of user-sphere by key ID, the only key state read per request
+public_keys: dict[str, dict] = {}
+# Monotonic times of the last successful fetch and of the last attempt, 0 forces a fetch
+keys_loaded_at = 0.0
+keys_requested_at = 0.0
+keys_lock = Lock()
+
+
+# ================================================================================================================================
+async def get_user_public_key(key_id: str | None) -> dict | None:
+    """
+    Get the public key of a user-sphere key ID, fetching the JWKS again once JWKS_CACHE_TTL has passed.
+
+    A key ID not in the cache, as after user-sphere published a new key, fetches the JWKS again
+    at most once per JWKS_MIN_REFETCH, so tokens with made-up key IDs cannot flood user-sphere.
+
+    Args:
+        key_id (str | None): The kid of a token header.
+
+    Returns:
+        dict | None: The public JWK, None if user-sphere publishes no such key or USER_JWKS_URL is not set.
+    """
+    if not USER_JWKS_URL:
+        return None
+    now = time.monotonic()
+    if (now - keys_loaded_at >= JWKS_CACHE_TTL or key_id not in public_keys) and now - keys_requested_at >= JWKS_MIN_REFETCH:
+        await asyncio.to_thread(load_public_keys)
+    return public_keys.get(key_id)
+
+
+# ================================================================================================================================
+def load_public_keys():
+    """
+    Fetch the JWKS of user-sphere and replace the cached public keys.
+
+    The lock is held during the fetch, so concurrent requests wait for one fetch instead of making their own.
+    A failed fetch keeps the previous keys and is retried after JWKS_MIN_REFETCH.
+    """
+    global public_keys, keys_loaded_at, keys_requested_at
+    with keys_lock:
+        # Another request may have fetched them while this one waited
+        if time.monotonic() - keys_requested_at < JWKS_MIN_REFETCH:
+            return
+        keys_requested_at = time.monotonic()
+        try:
+            with urlopen(USER_JWKS_URL, timeout=JWKS_FETCH_TIMEOUT) as response:
+                jwks = json.load(response)
+            public_keys = {key["kid"]: key for key in jwks["keys"] if key.get("alg") == USER_TOKEN_ALGORITHM}
+        except (URLError, OSError, ValueError, KeyError, TypeError) as error:
+            print(f"Fetching {USER_JWKS_URL} failed, keeping the {len(public_keys)} cached keys: {error}")
+            return
+        keys_loaded_at = keys_requested_at
@@ -0,0 +1,109 @@
+import random
+import time
+from array import array
+from collections.abc import Collection
+from threading import Lock
+from sqlmodel import Session, select
+
+from quizbackend.models.quiz_model import Question
+from quizbackend.settings import QUESTION_POOL_TTL
+from quizbackend.utils.types import QuestionPoolType
+
+# Question id pools for every category, keyed by category id
+category_pools: dict[int, QuestionPoolType] = {}
+pools_lock = Lock()
+
+
+# ================================================================================================================================
+def load_category_pool(category_id: int, session: Session) -> array:
+    """
+    Load the ids of every question in a category into the pool cache.
+
+    Args:
+        category_id (int): The ID of the category.
+        session (Session): Database session.
+
+    Returns:
+        array: Compact array holding the question ids of the category.
+    """
+    # Only the primary keys are fetched, so this scan stays narrow even for large banks
+    question_ids = session.exec(select(Question.question_id).where(
+        Question.category_id == category_id)).all()
+    pool = array("q", question_ids)
+    with pools_lock:
+        category_pools[category_id] = {
+            "question_ids": pool,
+            "loaded_at": time.monotonic()
+        }
+    return pool
+
+
+# ================================================================================================================================
+def get_category_pool(category_id: int, session: Session) -> array:
+    """
+    Return the cached question id pool of a category, reloading it when missing or stale.
+
+    Args:
+        category_id (int): The ID of the category.
+        session (Session): Database session.
+
+    Returns:
+        array: Compact array holding the question ids of the category.
+    """
+    cached_pool = category_pools.get(category_id)
+    if cached_pool and time.monotonic() - cached_pool["loaded_at"] < QUESTION_POOL_TTL:
+        return cached_pool["question_ids"]
+    return load_category_pool(category_id, session)
+
+
+# ================================================================================================================================
+def add_question_to_pool(category_id: int, question_id: int):
+    """
+    Append a newly added question to the pool of its category if that pool is cached.
+
+    Only the pool of this worker process is updated. Other workers keep serving their cached pool
+    without the question until it is older than QUESTION_POOL_TTL and reloaded.
+
+    Args:
+        category_id (int): The ID of the category.
+        question_id (int): The ID of the new question.
+    """
+    with pools_lock:
+        cached_pool = category_pools.get(category_id)
+        if cached_pool:
+            cached_pool["question_ids"].append(question_id)
+
+
+# ================================================================================================================================
+def invalidate_category_pool(category_id: int):
+    """
+    Drop the cached pool of a category so the next draw reloads it from the database.
+
+    Args:
+        category_id (int): The ID of the category.
+    """
+    with pools_lock:
+        category_pools.pop(category_id, None)
+
+
+# ================================================================================================================================
+def sample_question_ids(category_id: int, count: int, session: Session, exclude: Collection[int] = ()) -> list[int]:
+    """
+    Draw random question ids from a category without sorting the question table.
+
+    Args:
+        category_id (int): The ID of the category.
+        count (int): Number of question ids to draw.
+        session (Session): Database session.
+        exclude (Collection[int]): Question ids never to draw, such as the questions already answered.
+
+    Returns:
+        list[int]: Distinct question ids drawn uniformly at random.
+    """
+    pool = get_category_pool(category_id, session)
+    excluded = set(exclude)
+    with pools_lock:
+        # random.sample only touches the drawn positions, so the cost is O(count);
+        # drawing as many extra ids as are excluded leaves count ids once the excluded ones are dropped
+        drawn = random.sample(pool, min(count + len(excluded), len(pool)))
+    return [question_id for question_id in drawn if question_id not in excluded][:count]
@@ -1,3 +1,4 @@
+from array import array
 from typing import TypedDict
 
 # Define the structure of the ChoiceType TypedDict
@@ -9,3 +10,12 @@ ChoiceType = TypedDict(
     }
 )
 
+
+# Define the structure of the QuestionPoolType TypedDict
+QuestionPoolType = TypedDict(
+    "QuestionPoolType",  # Name of the TypedDict
+    {
+        "question_ids": array,  # Compact array of question ids in the category
+        "loaded_at": float  # Monotonic time at which the pool was loaded
+    }
+)
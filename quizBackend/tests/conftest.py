@@ -0,0 +1,114 @@
+"""
+Fixtures of the quizBackend tests.
+
+The tests run on the in-memory SQLite backend, so they need no database server. quizbackend
+reads its settings when first imported, so the environment is set before any of it is imported.
+"""
+import os
+
+os.environ.update({
+    "DB_BACKEND": "sqlite",
+    "SQLITE_PATH": ":memory:",
+    "ALGORITHM": "HS256",
+    "SECRET_KEY": "tests-secret-key",
+    "ADMIN_SECRET_KEY": "tests-admin-secret-key",
+    "ACCESS_TOKEN_EXPIRE_TIME": "30",
+    "OPEN_AI_KEY": "tests",
+    # The lowest bcrypt cost, the tests count statements rather than time password hashing
+    "BCRYPT_ROUNDS": "4",
+    "TOKEN_REAPER_INTERVAL": "0"
+})
+os.environ.pop("DB_CONNECTION_STR", None)
+os.environ.pop("TEST_DB_CONNECTION_STR", None)
+
+from typing import AsyncIterator, Iterator  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import Engine, delete  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+from quizbackend.db.db_connector import async_db_connection_str, db_engine  # noqa: E402
+from quizbackend.db.migrate import migrate  # noqa: E402
+from quizbackend.models.quiz_model import (  # noqa: E402
+    AnsweredQuestion, Category, CategoryMarks, CategoryQuizDetails, CategorySummary, Choice, Question)
+from quizbackend.models.user_model import User  # noqa: E402
+from quizbackend.utils.answer_key import answer_keys, answer_keys_lock  # noqa: E402
+from quizbackend.utils.question_sampler import invalidate_category_pool  # noqa: E402
+from quizcommon.backend import configure_sqlite  # noqa: E402
+from quizcommon.pool import MeasuredAsyncQueuePool, engine_options  # noqa: E402
+
+QUESTIONS_PER_CATEGORY = 12
+CHOICES_PER_QUESTION = 4
+CATEGORY_MARKS = 50
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def engine() -> Engine:
+    """The engine of the app, on the in-memory database with every migration applied."""
+    migrate(db_engine)
+    return db_engine
+
+
+@pytest.fixture
+async def async_engine(engine: Engine) -> AsyncIterator[AsyncEngine]:
+    """An asyncio engine of the test's own event loop, on the same in-memory database."""
+    async_engine = create_async_engine(async_db_connection_str,
+                                       **engine_options(async_db_connection_str, MeasuredAsyncQueuePool))
+    configure_sqlite(async_engine.sync_engine)
+    yield async_engine
+    await async_engine.dispose()
+
+
+@pytest.fixture
+def quiz(engine: Engine) -> Iterator[dict]:
+    """
+    A user with an untouched quiz in a category holding QUESTIONS_PER_CATEGORY questions.
+
+    Yields:
+        dict: IDs of the user and the category, the category name and the correct choice of every question.
+    """
+    with Session(engine) as session:
+        user = User(user_name="tests", user_email="tests@tests.local", user_password="not-a-real-hash")
+        category = Category(category_name="tests-category", category_description="Tests")
+        session.add(user)
+        session.add(category)
+        session.commit()
+        session.refresh(user)
+        session.refresh(category)
+        for number in range(QUESTIONS_PER_CATEGORY):
+            choices = [Choice(choice=f"Choice {index}", choice_status=index == 0)
+                       for index in range(CHOICES_PER_QUESTION)]
+            session.add(Question(question=f"Question {number}", category_id=category.category_id, choices=choices))
+        session.add(CategoryMarks(category_id=category.category_id, marks=CATEGORY_MARKS))
+        # As kept by the admin routes, which create the summary with the category and count every added question
+        session.add(CategorySummary(category_id=category.category_id, question_count=QUESTIONS_PER_CATEGORY,
+                                    marks=CATEGORY_MARKS, is_available=True))
+        session.add(CategoryQuizDetails(user_id=user.user_id, category_id=category.category_id))
+        session.commit()
+        correct_choices = dict(session.exec(select(Choice.question_id, Choice.choice_id)
+                                            .join(Question).where(Question.category_id == category.category_id)
+                                            .where(Choice.choice_status == True)).all())
+        seeded = {"user_id": user.user_id, "category_id": category.category_id,
+                  "category_name": category.category_name, "correct_choices": correct_choices}
+
+    yield seeded
+
+    with Session(engine) as session:
+        session.execute(delete(AnsweredQuestion).where(AnsweredQuestion.question_id.in_(correct_choices)))
+        session.execute(delete(Choice).where(Choice.question_id.in_(correct_choices)))
+        session.execute(delete(Question).where(Question.category_id == seeded["category_id"]))
+        session.execute(delete(CategoryQuizDetails).where(CategoryQuizDetails.category_id == seeded["category_id"]))
+        session.execute(delete(CategoryMarks).where(CategoryMarks.category_id == seeded["category_id"]))
+        session.execute(delete(CategorySummary).where(CategorySummary.category_id == seeded["category_id"]))
+        session.execute(delete(Category).where(Category.category_id == seeded["category_id"]))
+        session.execute(delete(User).where(User.user_id == seeded["user_id"]))
+        session.commit()
+    # Row IDs can be reused once deleted, so cached pools and answer keys must not outlive the quiz
+    invalidate_category_pool(seeded["category_id"])
+    with answer_keys_lock:
+        answer_keys.clear()
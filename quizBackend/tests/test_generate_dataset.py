@@ -0,0 +1,22 @@
+"""Distributions of the synthetic scale test dataset."""
+import pytest
+from sqlalchemy import Engine, literal, select
+
+from quizbackend.controllers.quiz_controller import rank_for_marks
+from quizbackend.controllers.summary_controller import QUIZ_QUESTION_COUNT
+from benchmarks.generate_dataset import QUIZ_MARKS, category_weights, rank_name, split_questions
+
+
+@pytest.mark.parametrize("questions, categories", [(500, 7), (1000, 3), (10, 5), (12345, 100)])
+def test_split_questions_loads_every_requested_question(questions: int, categories: int):
+    counts = split_questions(questions, category_weights(categories, 1.0))
+
+    assert sum(counts) == max(questions, categories * QUIZ_QUESTION_COUNT)
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_rank_name_matches_rank_for_marks(engine: Engine):
+    with engine.connect() as connection:
+        ranks = [connection.execute(select(rank_for_marks(literal(marks)))).scalar() for marks in range(QUIZ_MARKS + 1)]
+
+    assert [rank_name(marks) for marks in range(QUIZ_MARKS + 1)] == ranks
@@ -0,0 +1,50 @@
+"""Index coverage of the hot lookups of the quiz and auth schema."""
+import pytest
+from sqlalchemy import Connection, Engine
+from sqlmodel import select
+
+from quizbackend.models.admin_model import Admin, AdminToken
+from quizbackend.models.quiz_model import Category, CategoryMarks, CategoryQuizDetails, Choice, Question
+from quizbackend.models.user_model import Token, User
+
+# Lookups issued on every login, token refresh, admin revocation read, quiz attempt and category listing
+INDEXED_LOOKUPS = {
+    "user by email": select(User).where(User.user_email == "someone@example.com"),
+    "token by refresh token digest": select(Token).where(Token.refresh_token_digest == "0" * 64),
+    "token by user": select(Token).where(Token.user_id == 1),
+    "admin by email": select(Admin).where(Admin.admin_email == "admin@example.com"),
+    "revoked admin tokens": select(AdminToken.admin_tokenId).where(AdminToken.revoked_at.is_not(None)),
+    "category by name": select(Category).where(Category.category_name == "General"),
+    "questions by category": select(Question.question_id).where(Question.category_id == 1),
+    "choices by question": select(Choice).where(Choice.question_id == 1),
+    "marks by category": select(CategoryMarks).where(CategoryMarks.category_id == 1),
+    "quiz details by user and category": select(CategoryQuizDetails)
+    .where(CategoryQuizDetails.user_id == 1)
+    .where(CategoryQuizDetails.category_id == 1),
+}
+
+
+# ================================================================================================================================
+def explain(connection: Connection, statement) -> list[str]:
+    """
+    Get the SQLite query plan of a statement as lines of text.
+
+    Args:
+        connection (Connection): Connection to the test database.
+        statement: The SELECT statement to explain.
+
+    Returns:
+        list[str]: Lines of the query plan.
+    """
+    sql = str(statement.compile(connection, compile_kwargs={"literal_binds": True}))
+    # Each row is (id, parent, notused, detail)
+    return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+@pytest.mark.parametrize("name", INDEXED_LOOKUPS)
+def test_lookup_is_served_by_an_index(engine: Engine, name: str):
+    with engine.connect() as connection:
+        plan = explain(connection, INDEXED_LOOKUPS[name])
+
+    # SQLite reports "SEARCH ... USING INDEX" for index lookups and "SCAN <table>" otherwise
+    assert not [line for line in plan if line.startswith("SCAN") and "INDEX" not in line], "\n".join(plan)
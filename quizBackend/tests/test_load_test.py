@@ -0,0 +1,23 @@
+"""Saturation rules of the load test."""
+from benchmarks.load_test import saturated_stages
+
+
+def stage(error_rate: float, abort_rate: float, flow_p50_ms: float | None) -> dict:
+    return {"error_rate": error_rate, "abort_rate": abort_rate,
+            "flow": {"p50_ms": flow_p50_ms} if flow_p50_ms is not None else None}
+
+
+def test_saturated_stages_count_aborted_flows_as_failures():
+    reports = [stage(0.0, 0.0, 100.0),
+               # Slower, but within the slowdown limit
+               stage(0.0, 0.0, 150.0),
+               # Every flow aborted without a failed request, as on a category without questions
+               stage(0.0, 1.0, None),
+               stage(0.05, 0.0, 100.0),
+               stage(0.0, 0.0, 250.0)]
+
+    assert saturated_stages(reports, max_error_rate=0.01, max_slowdown=2.0) == [False, False, True, True, True]
+
+
+def test_saturated_stages_without_a_completed_flow():
+    assert saturated_stages([stage(0.0, 1.0, None), stage(0.0, 0.0, None)], 0.01, 2.0) == [True, False]
@@ -0,0 +1,37 @@
+"""Data checks of the migrations that rewrite existing rows."""
+import pytest
+from sqlalchemy import Engine, insert
+from sqlmodel import select
+
+from quizbackend.db.migrations import v0004_normalize_emails
+from quizbackend.db.migrations.helpers import MigrationConflictError
+from quizbackend.models.user_model import User
+
+
+def test_normalize_emails_lists_users_sharing_an_email(engine: Engine):
+    # Rolled back with the unfinished transaction
+    with engine.connect() as connection:
+        connection.execute(insert(User), [
+            {"user_name": "first", "user_email": "Shared@Tests.local", "user_password": "not-a-real-hash"},
+            {"user_name": "second", "user_email": " shared@tests.local", "user_password": "not-a-real-hash"},
+            {"user_name": "third", "user_email": "Alone@Tests.local", "user_password": "not-a-real-hash"}])
+
+        with pytest.raises(MigrationConflictError) as conflict:
+            v0004_normalize_emails.upgrade(connection)
+
+        assert [line.split(" (")[0] for line in conflict.value.conflicts] == [
+            f"'shared@tests.local': user {user_id}" for user_id in connection.execute(
+                select(User.user_id).where(User.user_name.in_(["first", "second"])).order_by(User.user_id)).scalars()]
+        assert connection.execute(select(User.user_email).where(User.user_name == "third")).scalar() == "Alone@Tests.local"
+
+
+def test_normalize_emails_normalizes_every_user(engine: Engine):
+    with engine.connect() as connection:
+        connection.execute(insert(User), [
+            {"user_name": "first", "user_email": " First@Tests.local ", "user_password": "not-a-real-hash"},
+            {"user_name": "second", "user_email": "SECOND@tests.local", "user_password": "not-a-real-hash"}])
+
+        v0004_normalize_emails.upgrade(connection)
+
+        assert set(connection.execute(select(User.user_email).where(User.user_name.in_(["first", "second"])))
+                   .scalars()) == {"first@tests.local", "second@tests.local"}
@@ -0,0 +1,37 @@
+"""Statement budgets of the quiz hot paths."""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from quizbackend.controllers.quiz_controller import get_quiz, isAvailableQuiz
+from quizbackend.db.query_counter import count_queries
+
+# Statement budget of get_quiz with a warm question pool:
+# quiz details, questions and one batched load of their choices
+GET_QUIZ_QUERY_BUDGET = 3
+# Statement budget of isAvailableQuiz once the category summary exists
+IS_AVAILABLE_QUERY_BUDGET = 1
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_get_quiz_loads_choices_in_one_batch(async_engine: AsyncEngine, quiz: dict):
+    async with AsyncSession(async_engine) as session:
+        # Warm the question pool so only the per-request statements are counted
+        await get_quiz(quiz["user_id"], quiz["category_name"], session)
+    async with AsyncSession(async_engine) as session:
+        # get_quiz serializes every choice, so any lazy load shows up in the count
+        with count_queries(async_engine.sync_engine) as statements:
+            response = await get_quiz(quiz["user_id"], quiz["category_name"], session)
+
+    assert len(response["questions"]) == 10
+    assert len(statements) <= GET_QUIZ_QUERY_BUDGET, "\n\n".join(statements)
+
+
+async def test_is_available_quiz_reads_the_summary_only(async_engine: AsyncEngine, quiz: dict):
+    async with AsyncSession(async_engine) as session:
+        with count_queries(async_engine.sync_engine) as statements:
+            is_available = await isAvailableQuiz(quiz["category_name"], session)
+
+    assert is_available is True
+    assert len(statements) <= IS_AVAILABLE_QUERY_BUDGET, "\n\n".join(statements)
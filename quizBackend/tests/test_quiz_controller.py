@@ -0,0 +1,114 @@
+"""Behaviour of the quiz controller on a seeded quiz."""
+import pytest
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Session, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import quizbackend.controllers.quiz_controller as quiz_controller
+from quizbackend.controllers.quiz_controller import (MARKS_PER_QUESTION, attempt_quiz, get_quiz, isAvailableQuiz,
+                                                     submit_quiz)
+from quizbackend.db.query_counter import count_queries
+from quizbackend.models.pydantic_model import QuizAnswerModel
+from quizbackend.models.quiz_model import CategoryQuizDetails, CategorySummary
+from quizbackend.utils.apierrors import ConflictsException, InvalidInputException
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_get_quiz_keeps_the_sampled_order(async_engine: AsyncEngine, quiz: dict, monkeypatch: pytest.MonkeyPatch):
+    # Descending IDs, the opposite of the order an IN lookup returns the rows in
+    sampled = sorted(quiz["correct_choices"], reverse=True)[:10]
+    monkeypatch.setattr(quiz_controller, "sample_question_ids", lambda category_id, count, session, exclude: sampled)
+
+    async with AsyncSession(async_engine) as session:
+        response = await get_quiz(quiz["user_id"], quiz["category_name"], session)
+
+    assert [question.question_id for question in response["questions"]] == sampled
+    assert [choices[0]["question_id"] for choices in response["choices"]] == sampled
+
+
+async def test_get_quiz_resumed_skips_the_answered_questions(async_engine: AsyncEngine, quiz: dict):
+    answered = list(quiz["correct_choices"].items())[:5]
+    for question_id, choice_id in answered:
+        async with AsyncSession(async_engine) as session:
+            await attempt_quiz(session, quiz["user_id"], quiz["category_id"], question_id, choice_id, False)
+
+    # Every draw of the 5 remaining questions among the 7 unanswered ones
+    for _ in range(20):
+        async with AsyncSession(async_engine) as session:
+            response = await get_quiz(quiz["user_id"], quiz["category_name"], session)
+        served = {question.question_id for question in response["questions"]}
+
+        assert len(served) == response["remaining_questions"] == 5
+        assert not served & dict(answered).keys()
+
+
+async def test_attempt_quiz_refuses_a_second_answer_to_a_question(async_engine: AsyncEngine, quiz: dict):
+    question_id, choice_id = next(iter(quiz["correct_choices"].items()))
+    async with AsyncSession(async_engine) as session:
+        first = await attempt_quiz(session, quiz["user_id"], quiz["category_id"], question_id, choice_id, False)
+    async with AsyncSession(async_engine) as session:
+        with pytest.raises(ConflictsException):
+            await attempt_quiz(session, quiz["user_id"], quiz["category_id"], question_id, choice_id, False)
+        details = (await session.exec(select(CategoryQuizDetails)
+                                      .where(CategoryQuizDetails.user_id == quiz["user_id"]))).one()
+
+    assert first["is_correct"] is True
+    assert (details.obtaining_marks, details.remaining_questions) == (MARKS_PER_QUESTION, 9)
+
+
+async def test_attempt_quiz_refuses_a_question_of_another_category(async_engine: AsyncEngine, quiz: dict):
+    question_id = max(quiz["correct_choices"]) + 1000
+    async with AsyncSession(async_engine) as session:
+        with pytest.raises(InvalidInputException):
+            await attempt_quiz(session, quiz["user_id"], quiz["category_id"], question_id, 1, False)
+
+
+async def test_submit_quiz_grades_only_the_questions_not_attempted(async_engine: AsyncEngine, quiz: dict):
+    correct_answers = [QuizAnswerModel(question_id=question_id, choice_id=choice_id)
+                       for question_id, choice_id in quiz["correct_choices"].items()]
+    async with AsyncSession(async_engine) as session:
+        for answer in correct_answers[:2]:
+            await attempt_quiz(session, quiz["user_id"], quiz["category_id"], answer.question_id, answer.choice_id, False)
+    async with AsyncSession(async_engine) as session:
+        # The attempted questions are sent again with the 8 questions left
+        result = await submit_quiz(session, quiz["user_id"], quiz["category_id"], correct_answers[:10])
+        details = (await session.exec(select(CategoryQuizDetails)
+                                      .where(CategoryQuizDetails.user_id == quiz["user_id"]))).one()
+
+    assert result["correct_answers"] == 8
+    assert (details.obtaining_marks, details.remaining_questions, details.percentage) == (10 * MARKS_PER_QUESTION, 0, 100)
+
+
+async def test_submit_quiz_refuses_more_answers_than_questions_left(async_engine: AsyncEngine, quiz: dict):
+    answers = [QuizAnswerModel(question_id=question_id, choice_id=choice_id)
+               for question_id, choice_id in quiz["correct_choices"].items()]
+    async with AsyncSession(async_engine) as session:
+        for answer in answers[:2]:
+            await attempt_quiz(session, quiz["user_id"], quiz["category_id"], answer.question_id, answer.choice_id, False)
+    async with AsyncSession(async_engine) as session:
+        with pytest.raises(InvalidInputException):
+            # 9 questions not attempted yet, with 8 left in the quiz
+            await submit_quiz(session, quiz["user_id"], quiz["category_id"], answers[2:11])
+        details = (await session.exec(select(CategoryQuizDetails)
+                                      .where(CategoryQuizDetails.user_id == quiz["user_id"]))).one()
+
+    assert (details.obtaining_marks, details.remaining_questions, details.is_finished) == (2 * MARKS_PER_QUESTION, 8, False)
+
+
+async def test_is_available_quiz_computes_a_missing_summary_without_storing_it(engine: Engine, async_engine: AsyncEngine,
+                                                                              quiz: dict):
+    with Session(engine) as session:
+        session.exec(delete(CategorySummary).where(CategorySummary.category_id == quiz["category_id"]))
+        session.commit()
+
+    async with AsyncSession(async_engine) as session:
+        with count_queries(async_engine.sync_engine) as statements:
+            is_available = await isAvailableQuiz(quiz["category_name"], session)
+
+    assert is_available is True
+    # Concurrent first reads would race to insert it
+    assert not [statement for statement in statements if not statement.lstrip().upper().startswith("SELECT")]
+    with Session(engine) as session:
+        assert session.get(CategorySummary, quiz["category_id"]) is None
@@ -0,0 +1,61 @@
+"""Regression checks of the controller benchmark suite that need no timing."""
+import pytest
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from quizbackend.db.query_counter import count_queries
+from benchmarks.suite import drop_dataset, find_regressions, prepare_hot_paths, seed_dataset
+
+# Data sizes the statement counts are compared at, a hot path issuing a query per row shows up between them
+SMALL_SIZE = 5
+LARGE_SIZE = 50
+
+
+# ================================================================================================================================
+async def count_hot_path_queries(engine: Engine, async_engine: AsyncEngine, size: int) -> dict[str, int]:
+    """
+    Seed the suite dataset at a size and count the statements of one warm call of every hot path.
+
+    Args:
+        engine (Engine): Engine bound to the test database, for seeding.
+        async_engine (AsyncEngine): Asyncio engine bound to the test database, for the hot paths.
+        size (int): Number of users and categories to seed.
+
+    Returns:
+        dict[str, int]: Statements issued by every hot path.
+    """
+    dataset = seed_dataset(engine, size)
+    try:
+        counts = {}
+        for name, hot_path in (await prepare_hot_paths(async_engine, dataset)).items():
+            async with AsyncSession(async_engine) as session:
+                await hot_path(session)
+            with count_queries(async_engine.sync_engine) as statements:
+                async with AsyncSession(async_engine) as session:
+                    await hot_path(session)
+            counts[name] = len(statements)
+        return counts
+    finally:
+        drop_dataset(engine, dataset["prefix"])
+
+
+@pytest.mark.anyio
+async def test_hot_path_queries_do_not_grow_with_the_data(engine: Engine, async_engine: AsyncEngine):
+    small = await count_hot_path_queries(engine, async_engine, SMALL_SIZE)
+    large = await count_hot_path_queries(engine, async_engine, LARGE_SIZE)
+
+    assert {name: (small[name], count) for name, count in large.items() if count > small[name]} == {}
+
+
+def test_find_regressions_flags_queries_latency_and_allocations():
+    baseline = [{"hot_path": "get_quiz", "size": 10, "queries": 3, "p95_ms": 2.0, "alloc_peak_kib": 100.0},
+                {"hot_path": "logIn_func", "size": 10, "queries": 2, "p95_ms": 0.2, "alloc_peak_kib": 10.0}]
+    results = [{"hot_path": "get_quiz", "size": 10, "queries": 4, "p95_ms": 5.0, "alloc_peak_kib": 130.0},
+               # Doubled, but by less than the latency noise floor
+               {"hot_path": "logIn_func", "size": 10, "queries": 2, "p95_ms": 0.4, "alloc_peak_kib": 10.0},
+               # Not in the baseline
+               {"hot_path": "get_quiz", "size": 100, "queries": 30, "p95_ms": 50.0, "alloc_peak_kib": 1000.0}]
+
+    assert find_regressions(baseline, results, 0.2) == {
+        ("get_quiz", 10): ["queries 3 -> 4", "p95 2.0 -> 5.0 ms", "allocations 100.0 -> 130.0 KiB"]}
@@ -0,0 +1,133 @@
+"""
+Verification of the access tokens signed by user-sphere.
+
+Tokens are signed with the keyring of user-sphere, whose JWKS is served locally the way its
+/.well-known/jwks.json route does, and verified through decodeAccessToken and the JWKS cache.
+"""
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
+from typing import Iterator
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+import quizbackend.utils.jwks_cache as jwks_cache
+from quizbackend.controllers.auth_controller import decodeAccessToken
+
+# The app package of user-sphere, its settings read the environment set by conftest
+USER_SPHERE_DIR = Path(__file__).resolve().parents[2] / "user-sphere"
+sys.path.append(str(USER_SPHERE_DIR))
+from app.config import keyring  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+# ================================================================================================================================
+def sign_token(private_key: bytes, key_id: str) -> str:
+    """
+    Sign an access token valid for a minute the way user-sphere does, so only its key can refuse it.
+
+    Args:
+        private_key (bytes): PEM private key to sign with.
+        key_id (str): Key ID named in the kid header.
+
+    Returns:
+        str: The token.
+    """
+    claims = {"user_email": "someone@example.com", "user_id": 1, "exp": datetime.now(timezone.utc) + timedelta(minutes=1)}
+    return jwt.encode(claims, private_key, algorithm=keyring.TOKEN_ALGORITHM, headers={"kid": key_id})
+
+
+class JwksHandler(BaseHTTPRequestHandler):
+    """Answer every GET with the JWKS of the user-sphere keyring."""
+
+    def do_GET(self):
+        body = json.dumps(keyring.get_jwks()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def user_sphere_keyring(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[str]:
+    """
+    Give user-sphere a keyring of two keys and point the JWKS cache of quizBackend at its JWKS.
+
+    Yields:
+        str: ID of the active key, the other key is published but no longer signs.
+    """
+    retired_kid, active_kid = keyring.new_key_id(), keyring.new_key_id()
+    for key_id in (retired_kid, active_kid):
+        (tmp_path / f"{key_id}.pem").write_bytes(keyring.generate_private_key())
+    monkeypatch.setattr(keyring, "JWT_KEYS_DIR", str(tmp_path))
+    monkeypatch.setattr(keyring, "JWT_ACTIVE_KID", active_kid)
+    keyring.load_keyring.cache_clear()
+    keyring.get_jwks.cache_clear()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), JwksHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(jwks_cache, "USER_JWKS_URL", f"http://127.0.0.1:{server.server_port}/.well-known/jwks.json")
+    monkeypatch.setattr(jwks_cache, "public_keys", {})
+    monkeypatch.setattr(jwks_cache, "keys_loaded_at", 0.0)
+    monkeypatch.setattr(jwks_cache, "keys_requested_at", 0.0)
+    yield active_kid
+    server.shutdown()
+    keyring.load_keyring.cache_clear()
+    keyring.get_jwks.cache_clear()
+
+
+async def test_user_sphere_token_is_verified_with_its_published_key(user_sphere_keyring: str):
+    key_id, private_key = keyring.get_signing_key()
+    token = sign_token(private_key, key_id)
+
+    claims = await decodeAccessToken(token)
+
+    assert key_id == user_sphere_keyring
+    assert (claims["user_email"], claims["user_id"]) == ("someone@example.com", 1)
+    assert set(jwks_cache.public_keys) == {key["kid"] for key in keyring.get_jwks()["keys"]}
+
+
+async def test_user_sphere_token_of_an_unknown_key_is_refused(user_sphere_keyring: str):
+    token = sign_token(keyring.generate_private_key(), "unknown")
+
+    with pytest.raises(HTTPException) as refused:
+        await decodeAccessToken(token)
+
+    assert refused.value.status_code == 401
+
+
+async def test_user_sphere_token_signed_by_another_key_is_refused(user_sphere_keyring: str):
+    # Names the active key but was signed with a key user-sphere never had
+    token = sign_token(keyring.generate_private_key(), user_sphere_keyring)
+
+    with pytest.raises(HTTPException) as refused:
+        await decodeAccessToken(token)
+
+    assert refused.value.status_code == 401
+
+
+
+def test_user_sphere_app_publishes_its_keyring(user_sphere_keyring: str):
+    # In its own process, as the models of both services would share one SQLModel metadata here
+    serve_jwks = ("import json\n"
+                  "from fastapi.testclient import TestClient\n"
+                  "from app.main import app\n"
+                  "with TestClient(app) as client:\n"
+                  "    print(json.dumps(client.get('/.well-known/jwks.json').json()))")
+    user_sphere = subprocess.run([sys.executable, "-c", serve_jwks], cwd=USER_SPHERE_DIR, capture_output=True, text=True,
+                                 env={**os.environ, "JWT_KEYS_DIR": keyring.JWT_KEYS_DIR, "JWT_ACTIVE_KID": user_sphere_keyring})
+
+    assert user_sphere.returncode == 0, user_sphere.stderr
+    published = json.loads(user_sphere.stdout.splitlines()[-1])
+    assert [key["kid"] for key in published["keys"]] == [key["kid"] for key in keyring.get_jwks()["keys"]]
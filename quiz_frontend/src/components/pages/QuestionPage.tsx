@@ -34,22 +34,26 @@ const QuestionPage = ({ category }: {
         getQuiz(category, user.user_id)
     }, [])
 
-    const quiz_attempt = async (isFinished: boolean) => {
-
+    const quiz_attempt = async (choice_id: number) => {
+        setIsAttempt(true);
+        // The server grades the chosen choice, the quiz payload carries no answer keys
         const res = await attemptQuiz({
             category_id: questions[quizNumber].category_id,
             user_id: user?.user_id,
-            quiz_numbers: isCorrect ? 5 : 0,
-            isFinished
+            question_id: questions[quizNumber].question_id,
+            choice_id,
+            isFinished: quizNumber >= questions.length - 1
         });
+        const data = await res.json();
+        setIsCorrect(Boolean(data.is_correct));
+    };
+
+    const next_question = (isFinished: boolean) => {
         if (isFinished) {
             dispatch(fetchUser())
             router.push(`/quiz/${category}`);
         };
-        console.log(await res.json());
-
         setIsAttempt(false);
-        // setIsCorrect(false);
         console.log(quizNumber);
         setQuizNumber(quizNumber + 1);
     };
@@ -78,19 +82,18 @@ const QuestionPage = ({ category }: {
                                         }
                                         {quizNumber < questions.length - 1 ?
                                             <Button isDeleted={false} ButtonType='button' onClick={() => {
-                                                quiz_attempt(false)
+                                                next_question(false)
                                             }}>Next Question</Button>
                                             :
                                             <Button isDeleted={false} ButtonType='button' onClick={() => {
-                                                quiz_attempt(true)
+                                                next_question(true)
                                             }}>Finish Question</Button>
                                         }
                                     </div>
                                 ) :
                                     choices[quizNumber] && choices[quizNumber].map((item, index) => (
                                         <li className=" w-full hover:cursor-pointer p-1.5 rounded-xl bg-gradient-to-r from-gray-600 to-slate-900 hover:bg-gradient-to-r hover:from-purple-700 hover:via-blue-500 hover:to-[#082B44]" onClick={() => {
-                                            setIsAttempt(true);
-                                            setIsCorrect(item.choice_status);
+                                            quiz_attempt(item.choice_id);
                                         }}>
                                             <div className='flex p-2 gap-3 items-center bg-black w-full'>
                                                 <h2 className='font-heading text-xl'>{index + 1}</h2>
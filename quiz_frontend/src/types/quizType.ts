@@ -17,7 +17,6 @@ export interface Questions {
 }
 export type Choices = [
     {
-        choice_status: boolean,
         question_id: number,
         choice: string,
         choice_id: number
@@ -53,7 +52,8 @@ export interface Options {
 export interface AttemptQuizType {
     user_id: number,
     category_id: number,
-    quiz_numbers: number,
+    question_id: number,
+    choice_id: number,
     isFinished: boolean
 }
 
@@ -1,7 +1,8 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 
-from app.config.settings import ACCESS_TOKEN_EXPIRE_TIME
+from app.config.keyring import get_jwks
+from app.config.settings import ACCESS_TOKEN_EXPIRE_TIME, JWKS_MAX_AGE, REFRESH_TOKEN_EXPIRE_TIME
 from app.controllers.auth_controller.auth import tokenService
 from app.controllers.crud_controller.authenticate_user import getUserDetails
 from app.models.user_model import User
@@ -37,27 +38,49 @@ async def getUser(userData: Annotated[User, Depends(getUserDetails)]):
 
 # =================================================================================================================================
 @router.get("/api/getToken", response_model=dict[str, str | int])
-async def getToken(accessToken: Annotated[str, Depends(tokenService)]):
+async def getToken(response: Response, tokens: Annotated[dict[str, str], Depends(tokenService)]):
     """
-    Endpoint to retrieve an access token.
+    Endpoint to exchange a refresh token for a new access token and a new refresh token.
 
     Args:
-        accessToken (Annotated[str, Depends(tokenService)]): Access token obtained from the token service.
+        response (Response): The response object, carrying the new refresh token cookie.
+        tokens (Annotated[dict[str, str], Depends(tokenService)]): Access and rotated refresh token obtained from the token service.
 
     Raises:
         NotFoundException: If the access token is not found.
 
     Returns:
-        dict: Dictionary containing the access token and its expiration time.
+        dict: Dictionary containing the access token, the refresh token replacing the one sent and their expiration time.
     """
     # Check if access token exists
-    if not accessToken:
+    if not tokens["access_token"]:
         # Raise exception if access token is not found
         raise NotFoundException("Token")
-    # Calculate expiration time of the access token
+    # Calculate expiration time of the access and refresh tokens
     access_expire = int(ACCESS_TOKEN_EXPIRE_TIME.total_seconds())
-    # Return access token and its expiration time
+    refresh_expire = int(REFRESH_TOKEN_EXPIRE_TIME.total_seconds())
+    # The refresh token sent is no longer valid, the client keeps the new one
+    response.set_cookie("refresh_token", tokens["refresh_token"], expires=refresh_expire, secure=True)
+    # Return access token, refresh token and their expiration time
     return {
-        "access_token": accessToken,
-        "expires_in": access_expire
+        "access_token": tokens["access_token"],
+        "expires_in": access_expire,
+        "refresh_token": tokens["refresh_token"],
+        "refresh_expires_in": refresh_expire
     }
+
+
+# =================================================================================================================================
+@router.get("/.well-known/jwks.json", response_model=dict[str, list[dict]])
+async def getJwks(response: Response):
+    """
+    Endpoint publishing the public keys of the access tokens, for the services verifying them without calling this one.
+
+    Args:
+        response (Response): The response object, allowing verifiers to cache the keys for JWKS_MAX_AGE.
+
+    Returns:
+        dict: JSON Web Key Set with the public key of every key ID of the keyring.
+    """
+    response.headers["Cache-Control"] = f"public, max-age={JWKS_MAX_AGE}"
+    return get_jwks()
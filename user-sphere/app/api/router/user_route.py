@@ -1,5 +1,5 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, Response
+from fastapi import APIRouter, Depends, Request, Response
 
 from app.config.database import DB_SESSION
 from app.config.settings import ACCESS_TOKEN_EXPIRE_TIME, REFRESH_TOKEN_EXPIRE_TIME
@@ -9,21 +9,24 @@ from app.controllers.crud_controller.delete_user import deleteUser_func, logout_
 from app.controllers.crud_controller.update_user import updateUserDetails
 from app.models.user_model import UserLogInModel, UserSignUpModel
 from app.utils.apierrors import InvalidInputException, NotFoundException
+from quizcommon.login_limiter import check_login_attempt
 
 router = APIRouter()
 
 # =================================================================================================================================
 @router.post("/api/signup", response_model=str)
-async def signup(response: Response, user_signup_form: UserSignUpModel, session: DB_SESSION):
+async def signup(request: Request, response: Response, user_signup_form: UserSignUpModel, session: DB_SESSION):
     """
     Endpoint for user signup.
 
     Args:
+        request (Request): The incoming request, identifying the client for the login limiter.
         user_signup_form (UserSignUpModel): User signup form data.
         session (DB_SESSION): Database session.
 
     Raises:
         InvalidInputException: If required fields in the signup form are not provided.
+        TooManyRequestsException: If the email or the client has made too many attempts.
 
     Returns:
         dict: Dictionary containing access token and refresh token along with their expiration time.
@@ -31,9 +34,11 @@ async def signup(response: Response, user_signup_form: UserSignUpModel, session:
     # Check if required fields in the signup form are provided
     if not (user_signup_form.user_name and user_signup_form.user_email and user_signup_form.user_password):
         raise InvalidInputException("Signup form")
+    # Refuse excess attempts before hashing the password
+    check_login_attempt(user_signup_form.user_email, request)
 
     # Call signup function to perform user signup
-    data = signup_func(**user_signup_form.model_dump(), session=session)
+    data = await signup_func(**user_signup_form.model_dump(), session=session)
 
     # Calculate expiration time for access and refresh tokens
     access_expire = int(ACCESS_TOKEN_EXPIRE_TIME.total_seconds())
@@ -50,20 +55,23 @@ async def signup(response: Response, user_signup_form: UserSignUpModel, session:
 
 # =================================================================================================================================
 @router.post("/api/login", response_model=str)
-async def login(response: Response, user_login_form: UserLogInModel, session: DB_SESSION):
+async def login(request: Request, response: Response, user_login_form: UserLogInModel, session: DB_SESSION):
     """
     Endpoint for user login.
 
     Args:
+        request (Request): The incoming request, identifying the client for the login limiter.
         user_login_form (UserLogInModel): User login form data.
         session (DB_SESSION): Database session.
 
     Returns:
         dict: Dictionary containing access token and refresh token along with their expiration time.
     """
+    # Refuse excess attempts before verifying the password
+    check_login_attempt(user_login_form.user_email, request)
     # Call the logIn_func function to authenticate the user and obtain tokens
-    access_token, refresh_token = logIn_func(
-        **user_login_form.model_dump(), session=session).values()
+    access_token, refresh_token = (await logIn_func(
+        **user_login_form.model_dump(), session=session)).values()
 
     # Calculate expiration time for access and refresh tokens
     access_expire = int(ACCESS_TOKEN_EXPIRE_TIME.total_seconds())
@@ -0,0 +1,129 @@
+"""
+Keys signing the access tokens of this service, published as a JWKS for the services verifying them.
+
+Every PEM private key of JWT_KEYS_DIR is named after its key ID (<kid>.pem). New tokens are signed
+with JWT_ACTIVE_KID and carry it in their header, and /.well-known/jwks.json publishes the public
+key of every file, so verifiers pick the key of a token by its kid. To rotate keys:
+
+    1. python -m app.config.keyring adds a key, restart the service to publish it;
+    2. once verifiers have refreshed their JWKS (JWKS_MAX_AGE), set JWT_ACTIVE_KID to it and restart;
+    3. once the last token of the previous key has expired (ACCESS_TOKEN_EXPIRE_TIME), delete its file.
+"""
+import secrets
+from datetime import datetime, timezone
+from functools import cache
+from pathlib import Path
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk
+
+from app.config.settings import JWT_ACTIVE_KID, JWT_EPHEMERAL_KEY, JWT_KEYS_DIR
+
+# Algorithm of the access tokens, verifiers only need the public keys
+TOKEN_ALGORITHM = "RS256"
+KEY_SIZE = 2048
+
+
+# ================================================================================================================================
+def generate_private_key() -> bytes:
+    """
+    Generate an RSA private key.
+
+    Returns:
+        bytes: The key in unencrypted PKCS#8 PEM.
+    """
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=KEY_SIZE)
+    return private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                     serialization.NoEncryption())
+
+
+# ================================================================================================================================
+def new_key_id() -> str:
+    """
+    Make the ID of a new key, its creation date followed by a random suffix.
+
+    Returns:
+        str: The key ID.
+    """
+    return f"{datetime.now(timezone.utc):%Y%m%d}-{secrets.token_hex(4)}"
+
+
+# ================================================================================================================================
+@cache
+def load_keyring() -> tuple[dict[str, bytes], str]:
+    """
+    Read the private keys of JWT_KEYS_DIR once per process.
+
+    Without JWT_KEYS_DIR the service refuses to start, unless JWT_EPHEMERAL_KEY is set for local development:
+    a key is then generated for this process only, its tokens do not outlive it and no other process can verify them.
+
+    Raises:
+        RuntimeError: If JWT_KEYS_DIR is not set without JWT_EPHEMERAL_KEY, or JWT_ACTIVE_KID has no key in it.
+
+    Returns:
+        tuple[dict[str, bytes], str]: Private keys by key ID, and the key ID new tokens are signed with.
+    """
+    if not JWT_KEYS_DIR:
+        if not JWT_EPHEMERAL_KEY:
+            raise RuntimeError("JWT_KEYS_DIR is not set, point it at the keyring directory "
+                               "or set JWT_EPHEMERAL_KEY for local development")
+        print("JWT_KEYS_DIR is not set, access tokens are signed with a key generated for this process")
+        key_id = new_key_id()
+        return {key_id: generate_private_key()}, key_id
+
+    private_keys = {path.stem: path.read_bytes() for path in sorted(Path(JWT_KEYS_DIR).glob("*.pem"))}
+    if JWT_ACTIVE_KID not in private_keys:
+        raise RuntimeError(f"JWT_ACTIVE_KID {JWT_ACTIVE_KID!r} has no key in {JWT_KEYS_DIR}")
+    return private_keys, JWT_ACTIVE_KID
+
+
+# ================================================================================================================================
+def get_signing_key() -> tuple[str, bytes]:
+    """
+    Get the key new access tokens are signed with.
+
+    Returns:
+        tuple[str, bytes]: Key ID and PEM private key.
+    """
+    private_keys, active_kid = load_keyring()
+    return active_kid, private_keys[active_kid]
+
+
+# ================================================================================================================================
+@cache
+def get_jwks() -> dict[str, list[dict]]:
+    """
+    Get the public keys of the keyring as a JSON Web Key Set.
+
+    Returns:
+        dict[str, list[dict]]: The JWKS, one RSA public key per key ID.
+    """
+    private_keys, _ = load_keyring()
+    return {"keys": [{**jwk.construct(private_key, TOKEN_ALGORITHM).public_key().to_dict(), "kid": key_id, "use": "sig"}
+                     for key_id, private_key in private_keys.items()]}
+
+
+# ================================================================================================================================
+def get_public_key(key_id: str) -> dict | None:
+    """
+    Get the public key of a key ID.
+
+    Args:
+        key_id (str): The kid of a token header.
+
+    Returns:
+        dict | None: The public JWK, None if the keyring has no such key.
+    """
+    return next((key for key in get_jwks()["keys"] if key["kid"] == key_id), None)
+
+
+if __name__ == "__main__":
+    # Add a key to the keyring, published at the next restart
+    if not JWT_KEYS_DIR:
+        raise SystemExit("Set JWT_KEYS_DIR to the keyring directory first")
+    key_id = new_key_id()
+    key_path = Path(JWT_KEYS_DIR) / f"{key_id}.pem"
+    key_path.parent.mkdir(parents=True, exist_ok=True)
+    key_path.touch(mode=0o600)
+    key_path.write_bytes(generate_private_key())
+    print(f"Added {key_path}, restart the service to publish it, then set JWT_ACTIVE_KID = {key_id}")
@@ -12,9 +12,13 @@ except FileNotFoundError:
 DB_URL = os.getenv("DB_CONNECTION_STR")
 TEST_DB_URL = os.getenv("TEST_DB_CONNECTION_STR")
 
-# JWT settings
-ALGORITHM = config.get("ALGORITHM")
-SECRET_KEY = config.get("SECRET_KEY")
+# JWT settings (directory of the PEM private keys signing access tokens, key ID new tokens are signed with,
+# and seconds verifiers may cache the published public keys, see app/config/keyring.py)
+JWT_KEYS_DIR = config.get("JWT_KEYS_DIR", default="")
+JWT_ACTIVE_KID = config.get("JWT_ACTIVE_KID", default="")
+JWKS_MAX_AGE = config.get("JWKS_MAX_AGE", cast=int, default=300)
+# Without JWT_KEYS_DIR, sign access tokens with a key generated per process instead of refusing to start (local development only)
+JWT_EPHEMERAL_KEY = config.get("JWT_EPHEMERAL_KEY", cast=bool, default=False)
 
 access_time: Any = config.get("ACCESS_TOKEN_EXPIRE_TIME")
 refresh_time: Any = config.get("ACCESS_TOKEN_EXPIRE_TIME")
@@ -24,3 +28,6 @@ admin_time: Any = config.get("ACCESS_TOKEN_EXPIRE_TIME")
 # Token expiration times
 ACCESS_TOKEN_EXPIRE_TIME = timedelta(minutes=int(access_time))
 REFRESH_TOKEN_EXPIRE_TIME = timedelta(days=int(refresh_time))
+
+# Password hash cost (bcrypt log2 rounds, measured with quizBackend/benchmarks/calibrate_password_hash.py, hashes of another cost are rehashed at login)
+BCRYPT_ROUNDS = config.get("BCRYPT_ROUNDS", cast=int, default=12)
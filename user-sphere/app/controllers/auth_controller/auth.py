@@ -1,26 +1,36 @@
+import hashlib
+import secrets
 from typing import Annotated
 from fastapi import Depends, HTTPException
+from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlmodel import select
+from sqlmodel import select, update
 
 from app.config.database import DB_SESSION
 from app.models.user_model import User
-from app.controllers.auth_controller.auth import auth_schema
-from app.config.settings import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_TIME
+from app.config.keyring import TOKEN_ALGORITHM, get_public_key, get_signing_key
+from app.config.settings import ACCESS_TOKEN_EXPIRE_TIME, REFRESH_TOKEN_EXPIRE_TIME, BCRYPT_ROUNDS
 from app.utils.apierrors import NotFoundException
+from quizcommon.password_pool import run_password_job, run_password_job_sync
+from quizcommon.principal_cache import get_principal, get_principal_generation, remember_principal
 from app.models.user_model import Token
-from app.controllers.crud_controller.authenticate_user import getUserDetails
 
 
-# Password context for hashing and verification
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Bearer token scheme of the routes taking an access token
+auth_schema = OAuth2PasswordBearer(tokenUrl="/token")
+
+# Password context for hashing and verification, hashes of another cost are flagged for a rehash
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# Random bytes of a refresh token
+REFRESH_TOKEN_BYTES = 32
 
 # ===============================================================================================================================
 def generateToken(data: dict, expires_delta: timedelta) -> str:
     """
-    Generate a token.
+    Generate a token, signed with the active key of the keyring and naming it in its kid header.
 
     Args:
         data (dict): User data to be encoded.
@@ -30,47 +40,122 @@ def generateToken(data: dict, expires_delta: timedelta) -> str:
         str: Generated token.
     """
     to_encode = data.copy()
-    # Print user data
-    print("user", data)
     # Calculate expiry time
     expire = datetime.now(timezone.utc) + expires_delta
     to_encode.update({
         "exp": expire
     })
-    # Encode token with user data and secret key
-    token = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # Encode token with user data and the private key, verifiers find its public key by the kid
+    key_id, private_key = get_signing_key()
+    token = jwt.encode(to_encode, private_key, algorithm=TOKEN_ALGORITHM, headers={"kid": key_id})
     return token
 
 
+# ===============================================================================================================================
+def generateRefreshToken() -> str:
+    """
+    Generate a refresh token.
+
+    Refresh tokens are random strings rather than JWTs: only their digest is stored,
+    and the token table says which user they belong to and until when.
+
+    Returns:
+        str: Generated refresh token.
+    """
+    return secrets.token_urlsafe(REFRESH_TOKEN_BYTES)
+
+
+# ===============================================================================================================================
+def digestRefreshToken(refresh_token: str) -> str:
+    """
+    Compute the digest a refresh token is stored and looked up by.
+
+    Refresh tokens carry enough entropy that an unsalted SHA-256 cannot be reversed,
+    and the fixed-size digest keeps the unique index small.
+
+    Args:
+        refresh_token (str): The refresh token.
+
+    Returns:
+        str: SHA-256 hex digest of the token.
+    """
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+# ===============================================================================================================================
+def normalizeEmail(email: str) -> str:
+    """
+    Normalize an email address, so each address is stored and looked up in one form.
+
+    Args:
+        email (str): The email address as typed by the user.
+
+    Returns:
+        str: The email address without surrounding whitespace, in lower case.
+    """
+    return email.strip().lower()
+
+
 # ===============================================================================================================================
 def passwordIntoHash(password: str) -> str:
     """
-    Hashes the provided password using bcrypt.
+    Hashes the provided password using bcrypt on the password worker pool.
 
     Args:
         password (str): The password to be hashed.
 
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
     Returns:
         str: The hashed password.
     """
-    hash_password = pwd_context.hash(password)
+    hash_password = run_password_job_sync(pwd_context.hash, password)
+    return hash_password
+
+
+# ===============================================================================================================================
+async def passwordIntoHashAsync(password: str) -> str:
+    """
+    Hashes the provided password using bcrypt on the password worker pool, leaving the event loop free.
+
+    Args:
+        password (str): The password to be hashed.
+
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
+    Returns:
+        str: The hashed password.
+    """
+    hash_password = await run_password_job(pwd_context.hash, password)
     return hash_password
 
 def verifyUser(token: Annotated[str, Depends(auth_schema)], session: DB_SESSION):
     # Check if token is provided
     if not token:
         raise NotFoundException("Token")
+
+    # A cached token was verified and its user read before, neither is needed again
+    principal = get_principal(token)
+    if principal:
+        return User(**principal["user"])
+    generation = get_principal_generation()
+
     try:
-        # Decode the token to extract user information
-        decoded_token = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # Decode the token with the public key it was signed for to extract user information
+        public_key = get_public_key(jwt.get_unverified_header(token).get("kid"))
+        if public_key is None:
+            raise JWTError("Unknown key ID")
+        decoded_token = jwt.decode(token, public_key, algorithms=[TOKEN_ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token.")
 
-    user_email = decoded_token["user_email"]
-    db_user = session.exec(select(User).where(
-        User.user_email == user_email)).one_or_none()
+    # Tokens carry the user ID, the user is read by its primary key
+    db_user = session.get(User, decoded_token["user_id"])
 
     if db_user:
+        remember_principal(token, decoded_token, db_user, generation)
         return db_user
     return False
 
@@ -78,66 +163,107 @@ def verifyUser(token: Annotated[str, Depends(auth_schema)], session: DB_SESSION)
 # ===============================================================================================================================
 def verifyPassword(plainText: str, hashedPassword: str) -> bool:
     """
-    Verifies if the provided plaintext password matches the hashed password.
+    Verifies if the provided plaintext password matches the hashed password on the password worker pool.
 
     Args:
         plainText (str): The plaintext password.
         hashedPassword (str): The hashed password to compare against.
 
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
     Returns:
         bool: True if the passwords match, False otherwise.
     """
-    # Print the plaintext and hashed passwords for debugging
-    print(plainText, hashedPassword)
-
     # Verify if the plaintext password matches the hashed password
-    isPasswordCorrect = pwd_context.verify(plainText, hash=hashedPassword)
-
-    # Print the result of password verification for debugging
-    print(isPasswordCorrect)
+    isPasswordCorrect = run_password_job_sync(pwd_context.verify, plainText, hashedPassword)
 
     return isPasswordCorrect
 
 
+# ===============================================================================================================================
+async def verifyAndUpdatePasswordAsync(plainText: str, hashedPassword: str) -> tuple[bool, str | None]:
+    """
+    Verifies the provided plaintext password on the password worker pool, and rehashes it when the stored
+    hash was made with another cost than BCRYPT_ROUNDS, leaving the event loop free.
+
+    Args:
+        plainText (str): The plaintext password.
+        hashedPassword (str): The hashed password to compare against.
+
+    Raises:
+        ServiceUnavailableException: If the password worker pool is full.
+
+    Returns:
+        tuple[bool, str | None]: Whether the passwords match, and the hash to store instead of hashedPassword, if any.
+    """
+    # Verify the password and rehash it in the same job, so an outdated hash costs one trip to the pool
+    isPasswordCorrect, newHash = await run_password_job(pwd_context.verify_and_update, plainText, hashedPassword)
+
+    return isPasswordCorrect, newHash
+
+
 # ===============================================================================================================================
 def tokenService(token: Annotated[str, Depends(auth_schema)], session: DB_SESSION):
     """
-    Service function to generate an access token from a refresh token.
+    Service function to exchange a refresh token for a new access token and a new refresh token.
+
+    The token is resolved to its user in one join on the unique digest index, then rotated by an UPDATE
+    that only matches the digest just read, so a token is used once and concurrent refreshes with it
+    cannot both succeed.
 
     Args:
         token (str): Refresh token.
         session (Session): Database session.
 
     Returns:
-        str: Generated access token.
+        dict: New access and refresh tokens.
 
     Raises:
-        NotFoundException: If the token is not found in the database.
+        NotFoundException: If the token is unknown, already rotated or expired.
         HTTPException: If the access token cannot be generated.
     """
-    print(token)
-    # Retrieve the refresh token from the database
-    db_token = session.exec(select(Token).where(Token.refresh_token == token)).one()
-    
+    now = datetime.now(timezone.utc)
+    token_digest = digestRefreshToken(token)
+
+    # Retrieve the refresh token and its user from the database
+    db_user = session.exec(select(Token.id, User.user_id, User.user_name, User.user_email)
+                           .join(User, User.user_id == Token.user_id)
+                           .where(Token.refresh_token_digest == token_digest)
+                           .where(Token.expires_at > now)).first()
+
     # Check if the token exists
-    if not db_token:
+    if db_user is None:
         raise NotFoundException("Token")
 
-    # Get user details based on the refresh token
-    db_user = getUserDetails(token=db_token.refresh_token, session=session)
-    
+    # Replace the refresh token, unless a concurrent refresh already did
+    refresh_token = generateRefreshToken()
+    rotated = session.execute(update(Token)
+                              .where(Token.id == db_user.id)
+                              .where(Token.refresh_token_digest == token_digest)
+                              .values(refresh_token_digest=digestRefreshToken(refresh_token),
+                                      expires_at=now + REFRESH_TOKEN_EXPIRE_TIME)
+                              .execution_options(synchronize_session=False))
+    if rotated.rowcount != 1:
+        raise NotFoundException("Token")
+    session.commit()
+
     # Prepare user data for token generation
     user_data = {
+        "user_id": db_user.user_id,
         "user_name": db_user.user_name,
         "user_email": db_user.user_email
     }
-    
+
     # Generate an access token
     access_token = generateToken(user_data, expires_delta=ACCESS_TOKEN_EXPIRE_TIME)
-    
+
     # Check if the access token was successfully generated
     if not access_token:
         raise HTTPException(status_code=401, detail="Invalid Token ")
 
-    return access_token
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token
+    }
 
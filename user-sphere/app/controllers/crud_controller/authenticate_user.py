@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import Annotated
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
@@ -5,6 +6,7 @@ from sqlmodel import Session, select
 
 from app.models.user_model import Token, User
 from app.utils.apierrors import InvalidInputException, NotFoundException
+from quizcommon.principal_cache import forget_user_principals
 from app.controllers.auth_controller import auth
 from app.config.settings import ACCESS_TOKEN_EXPIRE_TIME, REFRESH_TOKEN_EXPIRE_TIME
 
@@ -13,7 +15,7 @@ from app.config.settings import ACCESS_TOKEN_EXPIRE_TIME, REFRESH_TOKEN_EXPIRE_T
 auth_schema = OAuth2PasswordBearer(tokenUrl="/token")
 
 
-def logIn_func(user_email: str, user_password: str, session: Session):
+async def logIn_func(user_email: str, user_password: str, session: Session):
     """
     Log in a user.
 
@@ -29,24 +31,29 @@ def logIn_func(user_email: str, user_password: str, session: Session):
     Returns:
         dict: Access and refresh tokens for the user.
     """
-    # Retrieve the user from the database based on the provided email
+    # Retrieve the user from the database based on the provided email, stored normalized
     user_exist = session.exec(select(User).where(
-        User.user_email == user_email)).first()
+        User.user_email == auth.normalizeEmail(user_email))).first()
 
     # Check if the user exists
     if not user_exist:
         raise InvalidInputException("Email")
 
     # Verify the provided password against the hashed password stored in the database
-    pass_verification_status = auth.verifyPassword(
+    pass_verification_status, new_hash = await auth.verifyAndUpdatePasswordAsync(
         user_password, user_exist.user_password)
 
     # If password verification fails, raise an exception
     if not pass_verification_status:
         raise InvalidInputException("Password")
 
+    # Store the hash at the configured cost, saved with the token below
+    if new_hash:
+        user_exist.user_password = new_hash
+
     # Prepare user data for token generation
     user_data = {
+        "user_id": user_exist.user_id,
         "user_name": user_exist.user_name,
         "user_email": user_exist.user_email
     }
@@ -54,14 +61,16 @@ def logIn_func(user_email: str, user_password: str, session: Session):
     # Generate access and refresh tokens
     access_token = auth.generateToken(
         data=user_data, expires_delta=ACCESS_TOKEN_EXPIRE_TIME)
-    refresh_token = auth.generateToken(
-        data=user_data, expires_delta=REFRESH_TOKEN_EXPIRE_TIME)
+    refresh_token = auth.generateRefreshToken()
 
     # If tokens are not generated, raise an exception
     if not (access_token or refresh_token):
         raise NotFoundException("Token")
     
     addTokenInDB(user_exist.user_id, refresh_token, session)
+    # Cached principals of older tokens still hold the previous hash
+    if new_hash:
+        forget_user_principals(user_exist.user_id)
     # Return the access and refresh tokens
     return {
         "access_token": access_token,
@@ -74,14 +83,19 @@ def addTokenInDB(user_id: int | None, refresh_token: str, session: Session):
     selected_token = session.exec(select(Token).where(
         Token.user_id == user_id)).one_or_none()
 
+    # Only the digest of the token is stored, with the time it stops being accepted
+    refresh_token_digest = auth.digestRefreshToken(refresh_token)
+    expires_at = datetime.now(timezone.utc) + REFRESH_TOKEN_EXPIRE_TIME
+
     # If no refresh token exists, create a new token entry in the database
     if selected_token is None:
-        token = Token(user_id=user_id, refresh_token=refresh_token)
+        token = Token(user_id=user_id, refresh_token_digest=refresh_token_digest, expires_at=expires_at)
         session.add(token)
         session.commit()
     else:
-        # Update the existing refresh token
-        selected_token.refresh_token = refresh_token
+        # Replace the existing refresh token
+        selected_token.refresh_token_digest = refresh_token_digest
+        selected_token.expires_at = expires_at
         session.commit()
 
 
@@ -1,3 +1,4 @@
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
 from app.models.user_model import User
@@ -7,10 +8,13 @@ from app.controllers.crud_controller.authenticate_user import logIn_func
 
 # =================================================================================================================================
 
-def signup_func(user_name: str, user_email: str, user_password: str, session: Session):
+async def signup_func(user_name: str, user_email: str, user_password: str, session: Session):
     """
     Register a new user.
 
+    The email is normalized and checked with one indexed lookup; the unique index on the email
+    decides between concurrent signups of the same address.
+
     Args:
         user_name (str): The name of the user.
         user_email (str): The email of the user.
@@ -18,32 +22,32 @@ def signup_func(user_name: str, user_email: str, user_password: str, session: Se
         session (Session): Database session.
 
     Raises:
-        ConflictsException: Raised if the email or password already exists.
+        ConflictsException: Raised if the email already exists.
 
     Returns:
         dict: Data of the logged-in user.
     """
-    users = session.exec(select(User))
-
-    for user in users:
-        password_exist = auth.verifyPassword(user_password, user.user_password)
-        if user.user_email == user_email and password_exist:
-            raise ConflictsException("email and password")
-        elif user.user_email == user_email:
-            raise ConflictsException("email")
-        elif password_exist:
-            raise ConflictsException("password")
+    user_email = auth.normalizeEmail(user_email)
+    # Check the email before hashing, so a taken address costs no bcrypt round
+    email_exist = session.exec(select(User.user_id).where(
+        User.user_email == user_email)).first()
+    if email_exist is not None:
+        raise ConflictsException("email")
 
     # Hash the password before storing it
-    hash_password = auth.passwordIntoHash(user_password)
+    hash_password = await auth.passwordIntoHashAsync(user_password)
     user = User(user_name=user_name,
                 user_email=user_email, user_password=hash_password)
     session.add(user)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError:
+        # Another signup took the email between the check and the insert
+        session.rollback()
+        raise ConflictsException("email")
     session.refresh(user)
     # Login the newly registered user and return the data
-    data = logIn_func(user.user_email, user_password, session)
-    print("data from login", data)
+    data = await logIn_func(user.user_email, user_password, session)
     return data
 
 # =================================================================================================================================
@@ -1,7 +1,8 @@
-from sqlmodel import Session, select
+from sqlmodel import Session, delete, select
 from app.config.database import DB_SESSION
 from app.models.user_model import Token, User
 from app.utils.apierrors import NotFoundException
+from quizcommon.principal_cache import forget_user_principals
 
 
 def logout_func(user_id: int, session: DB_SESSION):
@@ -60,9 +61,11 @@ def deleteUser_func(userId: int, session: Session):
     if not user:
         raise NotFoundException("User")
 
-    # Delete the user from the database
+    # Delete the user from the database, with its refresh token which could no longer be used
+    session.execute(delete(Token).where(Token.user_id == userId))
     session.delete(user)
     session.commit()
+    forget_user_principals(userId)
 
     # Return a confirmation message
     return "User has been deleted successfully"
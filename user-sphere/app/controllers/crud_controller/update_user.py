@@ -1,11 +1,13 @@
 from typing import Annotated
 from fastapi import Depends, Response
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session
 
 from app.config.database import DB_SESSION
 from app.config.settings import ACCESS_TOKEN_EXPIRE_TIME, REFRESH_TOKEN_EXPIRE_TIME
 from app.models.user_model import UpdateUserModel, User
-from app.utils.apierrors import NotFoundException
+from app.utils.apierrors import ConflictsException, NotFoundException
+from quizcommon.principal_cache import forget_user_principals
 from app.controllers.auth_controller import auth
 from app.controllers.crud_controller.authenticate_user import addTokenInDB as updateToken
 
@@ -18,13 +20,20 @@ def updateUserDetails(response: Response, user_Details: UpdateUserModel, verify_
         raise NotFoundException("User")
     user = session.get(User, user_Details.user_id)
     if user:
-        user.user_email = user_Details.user_email
+        user.user_email = auth.normalizeEmail(user_Details.user_email)
         user.user_name = user_Details.user_name
         session.add(user)
-        session.commit()
+        try:
+            session.commit()
+        except IntegrityError:
+            # The new email belongs to another user
+            session.rollback()
+            raise ConflictsException("email")
+        forget_user_principals(user.user_id)
         session.refresh(user)
         # Prepare user data for token generation
         user_data = {
+            "user_id": user.user_id,
             "user_name": user.user_name,
             "user_email": user.user_email
         }
@@ -32,8 +41,7 @@ def updateUserDetails(response: Response, user_Details: UpdateUserModel, verify_
         # Generate access and refresh tokens
         access_token = auth.generateToken(
             data=user_data, expires_delta=ACCESS_TOKEN_EXPIRE_TIME)
-        refresh_token = auth.generateToken(
-            data=user_data, expires_delta=REFRESH_TOKEN_EXPIRE_TIME)
+        refresh_token = auth.generateRefreshToken()
         message = setTokenInCookie(
             user.user_id, access_token, refresh_token, session, response)
 
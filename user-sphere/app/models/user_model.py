@@ -1,3 +1,5 @@
+from datetime import datetime
+from sqlalchemy import DateTime
 from sqlmodel import SQLModel, Field
 
 class UserBase(SQLModel):
@@ -23,11 +25,13 @@ class UpdateUserModel(SQLModel):
 class User(UserSignUpModel, table=True):
     """Model for registered users."""
     user_id: int | None = Field(None, primary_key=True)  # ID of the user
+    user_email: str = Field(unique=True, index=True)  # Email of the user, looked up on every login
     total_points: int = 0  # Total points accumulated by the user
 
 
 class Token(SQLModel, table=True):
-    """Model for user tokens."""
+    """Model for user refresh tokens, stored as digests so a leaked table holds no usable token."""
     id: int | None = Field(None, primary_key=True)  # Token ID
-    user_id: int  # ID of the associated user
-    refresh_token: str  # Refresh token
\ No newline at end of file
+    user_id: int = Field(unique=True, index=True)  # ID of the associated user, one token per user
+    refresh_token_digest: str = Field(max_length=64, unique=True, index=True)  # SHA-256 hex digest of the refresh token
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True), index=True)  # Time after which the refresh token is refused
\ No newline at end of file
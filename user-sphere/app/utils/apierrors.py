@@ -1,3 +1,6 @@
+# Raised by the shared password pool and login limiter, imported here so the exception handlers of this service catch them
+from quizcommon.errors import ServiceUnavailableException, TooManyRequestsException  # noqa: F401
+
 class NotFoundException(Exception):
     """Exception raised when the requested resource is not found."""
     def __init__(self, message: str) -> None:
@@ -8,4 +8,3 @@ ChoiceType = TypedDict(
         "status": bool   # Key "status" with value of type bool
     }
 )
-